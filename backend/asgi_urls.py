@@ -0,0 +1,26 @@
+"""
+URL configuration of the ASGI application.
+
+Async implementations of hot endpoints take precedence over the DRF views at
+the same paths, everything else is served as in backend.urls. Long-lived
+streams, which would tie up a WSGI worker each, exist only here.
+"""
+
+from django.urls import include, path, re_path
+
+from gotale.async_views import game_current_step, game_events_stream
+
+urlpatterns = [
+    # Same pattern and name as the route of GameViewsets.current_step
+    re_path(
+        r"^api/games/(?P<pk>[^/.]+)/step/$",
+        game_current_step,
+        name="game-current-step",
+    ),
+    re_path(
+        r"^api/games/(?P<pk>[^/.]+)/events/$",
+        game_events_stream,
+        name="game-events",
+    ),
+    path("", include("backend.urls")),
+]
@@ -10,10 +10,14 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
+import tempfile
 import tomllib
 from datetime import timedelta
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -23,6 +27,11 @@ with pyproject.open("rb") as f:
 
 PACKAGE_VERSION = pyproject_data["project"]["version"]
 
+
+def env_flag(name: str) -> bool:
+    return os.environ.get(name, "").lower() in ("1", "true", "yes")
+
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
 
@@ -59,7 +68,13 @@ REST_FRAMEWORK = {
         "rest_framework.authentication.SessionAuthentication",
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
+    "DEFAULT_RENDERER_CLASSES": (
+        "core.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_PAGINATION_CLASS": "core.pagination.CursorPagination",
+    "PAGE_SIZE": 50,
 }
 
 SPECTACULAR_SETTINGS = {
@@ -77,8 +92,63 @@ SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
 
+# Caches
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Has to be shared by all worker processes: graph versions, and game
+    # versions notifying event streams, are bumped there. Files by default,
+    # or e.g. SCENARIO_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+    # with SCENARIO_CACHE_LOCATION=redis://127.0.0.1:6379
+    "scenarios": {
+        "BACKEND": os.environ.get(
+            "SCENARIO_CACHE_BACKEND",
+            "django.core.cache.backends.filebased.FileBasedCache",
+        ),
+        "LOCATION": os.environ.get(
+            "SCENARIO_CACHE_LOCATION",
+            str(Path(tempfile.gettempdir()) / "gotale-scenarios"),
+        ),
+    },
+}
+if CACHES["scenarios"]["BACKEND"].endswith(".FileBasedCache"):
+    # Culling drops random entries, including version counters
+    CACHES["scenarios"]["OPTIONS"] = {"MAX_ENTRIES": 100_000}
+
+# Number of worker processes serving requests, as read by gunicorn. More than
+# one can't share a locmem scenario cache (see the gotale.E001 check)
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", "1"))
+
+# Compiled scenario graphs are shared through this cache alias
+SCENARIO_CACHE_ALIAS = "scenarios"
+SCENARIO_GRAPH_CACHE_TIMEOUT = 60 * 60 * 24
+# Number of compiled scenario graphs kept in memory by each process
+SCENARIO_GRAPH_CACHE_SIZE = 128
+
+# Game decisions are written to History in batches of at most this many rows,
+# or once the oldest pending decision is older than the max age (in seconds)
+HISTORY_BUFFER_SIZE = 100
+HISTORY_BUFFER_MAX_AGE = 5.0
+
+# Scenarios written per transaction by the bulk import endpoint
+SCENARIO_IMPORT_CHUNK_SIZE = 100
+# Largest single scenario accepted by the bulk import endpoint
+SCENARIO_IMPORT_MAX_ITEM_SIZE = 1024 * 1024
+# Rows fetched per query by the scenario export endpoint
+SCENARIO_EXPORT_CHUNK_SIZE = 2000
+
+# Game event streams (ASGI only) notice moves made by other processes within
+# the poll interval, and send a keep-alive comment after this many idle seconds
+GAME_EVENTS_POLL_INTERVAL = 1.0
+GAME_EVENTS_KEEPALIVE = 15.0
+GAME_EVENTS_VERSION_TIMEOUT = 60 * 60 * 24
+
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "core.middleware.replica_routing_middleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -111,13 +181,100 @@ WSGI_APPLICATION = "backend.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# Configured from the environment in production, e.g. for PostgreSQL with
+# DATABASE_ENGINE=django.db.backends.postgresql
+# DATABASE_NAME=gotale DATABASE_USER=gotale DATABASE_PASSWORD=...
+# DATABASE_HOST=127.0.0.1 DATABASE_PORT=5432
+#
+# DATABASE_CONN_MAX_AGE keeps connections open for that many seconds instead
+# of opening one per request, DATABASE_CONN_HEALTH_CHECKS=true then checks
+# them before reuse. Under ASGI every request runs in a thread of its own, so
+# persistent connections can't be reused there, use DATABASE_POOL=true
+# instead: psycopg's connection pool (PostgreSQL only, needs psycopg[pool]),
+# sized by DATABASE_POOL_MIN_SIZE and DATABASE_POOL_MAX_SIZE.
+# `manage.py benchmark_db_connections` compares these setups.
+
+DATABASE_ENGINE = os.environ.get("DATABASE_ENGINE", "django.db.backends.sqlite3")
+DATABASE_POOL = env_flag("DATABASE_POOL")
+DATABASE_OPTIONS = {}
+
+if DATABASE_POOL:
+    if DATABASE_ENGINE != "django.db.backends.postgresql":
+        raise ImproperlyConfigured("DATABASE_POOL is only supported with PostgreSQL.")
+    DATABASE_OPTIONS["pool"] = {
+        "min_size": int(os.environ.get("DATABASE_POOL_MIN_SIZE", 2)),
+        "max_size": int(os.environ.get("DATABASE_POOL_MAX_SIZE", 10)),
+    }
+
+# Single node installs on SQLite enable the production profile with
+# DATABASE_SQLITE_PRODUCTION=true. Its PRAGMAs are run on every new connection
+# (see core.signals): WAL lets readers work alongside the writer, and in WAL
+# mode synchronous=NORMAL is still safe against corruption, only the last
+# commits may be lost on power failure. Transactions start IMMEDIATE, taking
+# the write lock up front, so concurrent writers wait for it (up to
+# busy_timeout) rather than fail with "database is locked" when a read lock
+# can't be upgraded.
+SQLITE_PRODUCTION_PRAGMAS = {
+    # First, so the other PRAGMAs wait for locks too
+    "busy_timeout": 5000,  # ms
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64 * 1024,  # Negative sizes are in KiB
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
+SQLITE_PRAGMAS = {}
+
+if env_flag("DATABASE_SQLITE_PRODUCTION"):
+    if DATABASE_ENGINE != "django.db.backends.sqlite3":
+        raise ImproperlyConfigured(
+            "DATABASE_SQLITE_PRODUCTION is only supported with SQLite."
+        )
+    SQLITE_PRAGMAS = SQLITE_PRODUCTION_PRAGMAS
+    DATABASE_OPTIONS["transaction_mode"] = "IMMEDIATE"
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "ENGINE": DATABASE_ENGINE,
+        "NAME": os.environ.get("DATABASE_NAME", BASE_DIR / "db.sqlite3"),
+        "USER": os.environ.get("DATABASE_USER", ""),
+        "PASSWORD": os.environ.get("DATABASE_PASSWORD", ""),
+        "HOST": os.environ.get("DATABASE_HOST", ""),
+        "PORT": os.environ.get("DATABASE_PORT", ""),
+        # Django refuses to pool persistent connections
+        "CONN_MAX_AGE": (
+            0 if DATABASE_POOL else int(os.environ.get("DATABASE_CONN_MAX_AGE", 0))
+        ),
+        "CONN_HEALTH_CHECKS": env_flag("DATABASE_CONN_HEALTH_CHECKS"),
+        "OPTIONS": DATABASE_OPTIONS,
     }
 }
 
+# Read replicas of the primary, e.g. DATABASE_REPLICAS=10.0.0.2,10.0.0.3 for
+# their hosts. With SQLite the entries are database files instead, like the
+# primary's own file to try the routing out locally. Safe-method requests read
+# from a random replica, clients read from the primary for a while after they
+# write (see core.routers).
+DATABASE_REPLICAS = []
+for number, replica in enumerate(
+    filter(None, os.environ.get("DATABASE_REPLICAS", "").split(",")), start=1
+):
+    DATABASES[f"replica{number}"] = {
+        **DATABASES["default"],
+        "NAME" if DATABASE_ENGINE == "django.db.backends.sqlite3" else "HOST": (
+            replica.strip()
+        ),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica{number}")
+
+DATABASE_ROUTERS = ["core.routers.PrimaryReplicaRouter"]
+DATABASE_REPLICA_PIN_SECONDS = 10
+# Clients are pinned by a cookie, and JWT clients also by their user in this
+# cache, which has to be shared by the worker processes. Anonymous clients
+# without a cookie jar can still read a lagging replica right after writing
+DATABASE_REPLICA_PIN_CACHE_ALIAS = SCENARIO_CACHE_ALIAS
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -0,0 +1,172 @@
+"""
+Compiled read path for read-only model serializers.
+
+Rendering through DRF costs a get_attribute and to_representation call per
+field and object, most of which only copy a value. A CompiledSerializer walks
+the serializer tree once, turning it into the .values() lookups it needs and
+a converter for the few fields whose representation differs from the column
+value, then builds the same plain dicts directly from rows.
+
+Nested serializers are joined into the same query, reverse relations rendered
+with `many=True` are fetched with one query per relation.
+"""
+
+import functools
+from collections import defaultdict
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models.constants import LOOKUP_SEP
+from rest_framework import serializers
+
+# Fields whose representation is the column value itself
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.FloatField,
+    serializers.IntegerField,
+)
+
+
+class ManyRelation:
+    """Reverse foreign key rendered as a list of nested objects or ids."""
+
+    def __init__(self, model, source: str, child: "CompiledSerializer | None"):
+        related = model._meta.get_field(source)
+        if not related.one_to_many:
+            raise ImproperlyConfigured(
+                f"Only reverse foreign keys can be compiled, not {model.__name__}.{source}."
+            )
+
+        self.related_model = related.related_model
+        self.field_name = related.field.name
+        self.attname = related.field.attname
+        self.child = child
+
+    def queryset(self, pks):
+        """Rows of the objects related to the parents `pks`."""
+        queryset = self.related_model._default_manager.filter(
+            **{f"{self.field_name}__in": pks}
+        )
+        if self.child is None:
+            return queryset.values_list(self.attname, "pk")
+        return self.child.values(queryset, self.attname)
+
+    def fetch(self, pks) -> dict:
+        """Representations of the related objects, grouped by parent pk."""
+        grouped = defaultdict(list)
+        if self.child is None:
+            for parent_pk, pk in self.queryset(pks):
+                grouped[parent_pk].append(pk)
+            return grouped
+
+        rows = list(self.queryset(pks))
+        for row, data in zip(rows, self.child.to_representation(rows)):
+            grouped[row[self.attname]].append(data)
+        return grouped
+
+
+class CompiledSerializer:
+    """
+    Builds the representation of a read-only model serializer from .values()
+    rows. Raises ImproperlyConfigured for fields it cannot compile (method
+    fields, sources that aren't model fields), which must stay on DRF.
+    """
+
+    COLUMN, NESTED, MANY = range(3)
+
+    def __init__(self, serializer: serializers.ModelSerializer, prefix: str = ""):
+        self.model = serializer.Meta.model
+        self.prefix = prefix
+        self.lookups: dict[str, None] = {}  # Ordered set
+        self.fields = []
+
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if field.source == "*":
+                raise ImproperlyConfigured(f"Cannot compile field {name!r}.")
+
+            source = LOOKUP_SEP.join(field.source_attrs)
+            lookup = prefix + source
+
+            if isinstance(field, serializers.ListSerializer):
+                child = CompiledSerializer(field.child)
+                self.add_many(name, ManyRelation(self.model, source, child))
+            elif isinstance(field, serializers.ManyRelatedField):
+                self.add_many(name, ManyRelation(self.model, source, None))
+            elif isinstance(field, serializers.BaseSerializer):
+                nested = CompiledSerializer(field, prefix=lookup + LOOKUP_SEP)
+                pk_lookup = nested.prefix + nested.model._meta.pk.attname
+                self.lookups[pk_lookup] = None
+                self.lookups.update(nested.lookups)
+                self.fields.append((name, self.NESTED, pk_lookup, nested))
+            else:
+                self.lookups[lookup] = None
+                self.fields.append(
+                    (name, self.COLUMN, lookup, self.get_converter(name, field))
+                )
+
+    def add_many(self, name: str, relation: ManyRelation) -> None:
+        pk_lookup = self.prefix + self.model._meta.pk.attname
+        self.lookups[pk_lookup] = None
+        self.fields.append((name, self.MANY, pk_lookup, relation))
+
+    @staticmethod
+    def get_converter(name: str, field: serializers.Field):
+        if isinstance(field, serializers.RelatedField):
+            if not isinstance(field, serializers.PrimaryKeyRelatedField) or (
+                field.pk_field is not None
+            ):
+                raise ImproperlyConfigured(f"Cannot compile related field {name!r}.")
+            return None
+        if isinstance(field, PASSTHROUGH_FIELDS):
+            return None
+        if isinstance(field, serializers.UUIDField) and (
+            field.uuid_format == "hex_verbose"
+        ):
+            return str
+        if isinstance(field, serializers.SerializerMethodField):
+            raise ImproperlyConfigured(f"Cannot compile method field {name!r}.")
+        return field.to_representation
+
+    def values(self, queryset, *extra_lookups: str):
+        """`queryset` reduced to the rows needed by to_representation."""
+        return queryset.prefetch_related(None).values(
+            *self.lookups,
+            *(lookup for lookup in extra_lookups if lookup not in self.lookups),
+        )
+
+    def build(self, row: dict, pending: list) -> dict:
+        data = {}
+        for name, kind, lookup, extra in self.fields:
+            value = row[lookup]
+            if kind == self.COLUMN:
+                data[name] = value if value is None or extra is None else extra(value)
+            elif kind == self.NESTED:
+                data[name] = None if value is None else extra.build(row, pending)
+            else:
+                data[name] = []
+                pending.append((extra, value, data[name]))
+        return data
+
+    def to_representation(self, rows) -> list[dict]:
+        pending = []
+        data = [self.build(row, pending) for row in rows]
+
+        relations = defaultdict(list)
+        for relation, pk, items in pending:
+            relations[relation].append((pk, items))
+        for relation, parents in relations.items():
+            grouped = relation.fetch({pk for pk, _ in parents})
+            for pk, items in parents:
+                items.extend(grouped.get(pk, ()))
+
+        return data
+
+    def data(self, queryset) -> list[dict]:
+        return self.to_representation(self.values(queryset))
+
+
+@functools.cache
+def compile_serializer(serializer_class) -> CompiledSerializer:
+    return CompiledSerializer(serializer_class())
@@ -0,0 +1,96 @@
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.decorators import sync_and_async_middleware
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from core.routers import RoutingState, routing_state
+
+# Set on responses to requests which wrote, pins the client to the primary
+PIN_COOKIE = "db_primary"
+
+
+def pin_key(user_id) -> str:
+    return f"db-primary:{user_id}"
+
+
+def token_user_id(request):
+    """
+    Id of the user a valid JWT access token of the request was issued to,
+    read from the token without a query, or None.
+    """
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    try:
+        raw_token = authentication.get_raw_token(header) if header else None
+        if raw_token is None:
+            return None
+        token = authentication.get_validated_token(raw_token)
+    except AuthenticationFailed:
+        return None
+    return token.get(jwt_settings.USER_ID_CLAIM)
+
+
+@sync_and_async_middleware
+def replica_routing_middleware(get_response):
+    """
+    Lets safe-method requests read from replicas (see core.routers), unless
+    their client wrote within the last DATABASE_REPLICA_PIN_SECONDS: clients
+    are pinned to the primary by a cookie, and by their JWT user, as token
+    clients often keep no cookies.
+    """
+
+    def start(request) -> tuple[RoutingState, object]:
+        if not settings.DATABASE_REPLICAS:
+            return RoutingState(replicas=False), None
+
+        user_id = token_user_id(request)
+        replicas = request.method in SAFE_METHODS and PIN_COOKIE not in request.COOKIES
+        if replicas and user_id is not None:
+            pins = caches[settings.DATABASE_REPLICA_PIN_CACHE_ALIAS]
+            replicas = pins.get(pin_key(user_id)) is None
+        return RoutingState(replicas=replicas), user_id
+
+    def finish(state: RoutingState, user_id, response):
+        if state.wrote:
+            response.set_cookie(
+                PIN_COOKIE,
+                "1",
+                max_age=settings.DATABASE_REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+            if user_id is not None:
+                caches[settings.DATABASE_REPLICA_PIN_CACHE_ALIAS].set(
+                    pin_key(user_id),
+                    1,
+                    timeout=settings.DATABASE_REPLICA_PIN_SECONDS,
+                )
+        return response
+
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            state, user_id = start(request)
+            token = routing_state.set(state)
+            try:
+                response = await get_response(request)
+            finally:
+                routing_state.reset(token)
+            return finish(state, user_id, response)
+
+    else:
+
+        def middleware(request):
+            state, user_id = start(request)
+            token = routing_state.set(state)
+            try:
+                response = get_response(request)
+            finally:
+                routing_state.reset(token)
+            return finish(state, user_id, response)
+
+    return middleware
@@ -53,5 +53,12 @@ class User(BaseModel, AbstractUser):
         null=False,
     )
 
+    class Meta(AbstractUser.Meta):
+        swappable = "AUTH_USER_MODEL"
+        indexes = [
+            # Cursor pagination order (see core.pagination)
+            models.Index(fields=["date_joined", "id"], name="user_joined_idx"),
+        ]
+
     def __str__(self):
         return self.username
@@ -0,0 +1,20 @@
+from rest_framework import pagination
+
+
+class CursorPagination(pagination.CursorPagination):
+    """
+    Keyset pagination ordered by creation time, with the id as a tie breaker.
+
+    Views whose model has no `created_at` field declare their own
+    `cursor_ordering`.
+    """
+
+    ordering = ("created_at", "id")
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, "cursor_ordering", None)
+        if ordering is not None:
+            return tuple(ordering)
+        return super().get_ordering(request, queryset, view)
@@ -0,0 +1,73 @@
+"""
+JSON renderer backed by orjson when it is installed.
+
+orjson is an optional dependency, without it (or when the response has to be
+indented, e.g. in the browsable API) rendering falls back to DRF's stdlib
+based JSONRenderer, as it does for data orjson can't encode (e.g. integers
+beyond 64 bits). Both produce the same compact UTF-8 output, except for floats:
+orjson writes some of them in another notation (1e16 for 1e+16, 0.00001 for
+1e-05), and NaN and infinities as null, where JSONRenderer raises ValueError.
+"""
+
+import json
+
+from rest_framework import renderers
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class RawJSON(bytes):
+    """Already encoded JSON, written to the response body as is."""
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if isinstance(data, RawJSON):
+            if indent is None:
+                return bytes(data)
+            data = json.loads(data)
+
+        if (
+            orjson is None
+            or indent is not None
+            or self.ensure_ascii
+            or not self.compact
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b""
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                # Leave datetimes to the DRF encoder, which formats them differently
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same escaping as JSONRenderer, keeping the output a javascript subset
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+
+
+def encode_json(data) -> RawJSON:
+    return RawJSON(FastJSONRenderer().render(data))
+
+
+class NDJSONRenderer(FastJSONRenderer):
+    """Newline delimited JSON, a list rendered as one line per element."""
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        render = super().render
+        items = data if isinstance(data, list) else [data]
+        return b"".join(render(item) + b"\n" for item in items)
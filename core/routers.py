@@ -0,0 +1,73 @@
+"""
+Routing of reads to the read replicas in settings.DATABASE_REPLICAS.
+
+Only reads made while handling a safe-method request go to a replica (see
+core.middleware.replica_routing_middleware), all writes and everything else
+use the primary. A request sticks to the primary from its first write on,
+and its client for settings.DATABASE_REPLICA_PIN_SECONDS afterwards, so
+users read their own writes despite replication lag. Clients are pinned by a
+cookie, and JWT clients by their user as well, anonymous clients which keep
+no cookies aren't pinned.
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+@dataclass
+class RoutingState:
+    """Routing of the request being handled."""
+
+    replicas: bool
+    wrote: bool = False
+
+
+routing_state: ContextVar[RoutingState | None] = ContextVar(
+    "routing_state", default=None
+)
+_primary_only: ContextVar[bool] = ContextVar("primary_only", default=False)
+
+
+@contextmanager
+def use_primary():
+    """Reads in this block go to the primary, e.g. to fill a shared cache."""
+    token = _primary_only.set(True)
+    try:
+        yield
+    finally:
+        _primary_only.reset(token)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = routing_state.get()
+        if (
+            state is None
+            or not state.replicas
+            or state.wrote
+            or _primary_only.get()
+            or not settings.DATABASE_REPLICAS
+            # Reads in a transaction have to see its writes
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        state = routing_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get the schema by replication
+        return db not in settings.DATABASE_REPLICAS
@@ -1,17 +1,139 @@
 from django.contrib.auth import get_user_model
+from django.db.models.constants import LOOKUP_SEP
 from rest_framework import serializers
 
 User = get_user_model()
 
+FIELDS_PARAM = "fields"
+EXPAND_PARAM = "expand"
+
+
+def _path_tree(value: str) -> dict:
+    """Parses "a,b.c,b.d" into {"a": {}, "b": {"c": {}, "d": {}}}."""
+    tree = {}
+    for path in value.split(","):
+        node = tree
+        for name in filter(None, path.strip().split(".")):
+            node = node.setdefault(name, {})
+    return tree
+
+
+class SparseFieldset:
+    """
+    Fields to render and relations to inline, as requested with `?fields=` and
+    `?expand=` (comma separated, nested names dotted like `root_step.title`).
+
+    `fields=None` renders every field. `expand=None` inlines every nested
+    serializer, otherwise relations that are not expanded render as ids.
+    Naming a nested field in `fields` expands its relation implicitly.
+    """
+
+    def __init__(self, fields: dict | None = None, expand: dict | None = None):
+        self.fields = fields
+        self.expand = expand
+
+    @classmethod
+    def from_request(cls, request) -> "SparseFieldset | None":
+        """None when the request doesn't ask for a sparse representation."""
+        if request is None:
+            return None
+        params = request.query_params
+        if FIELDS_PARAM not in params and EXPAND_PARAM not in params:
+            return None
+
+        fields = params.get(FIELDS_PARAM)
+        expand = params.get(EXPAND_PARAM)
+        return cls(
+            fields=_path_tree(fields) or None if fields is not None else None,
+            expand=_path_tree(expand) if expand is not None else None,
+        )
+
+    def includes(self, name: str) -> bool:
+        return self.fields is None or name in self.fields
+
+    def expands(self, name: str) -> bool:
+        return self.includes(name) and (
+            self.expand is None
+            or name in self.expand
+            or bool(self.fields and self.fields[name])
+        )
+
+    def nested(self, name: str) -> "SparseFieldset":
+        return SparseFieldset(
+            fields=self.fields and self.fields.get(name) or None,
+            expand=self.expand.get(name, {}) if self.expand is not None else None,
+        )
+
+    def requires(self, lookup: str, expand_last: bool = True) -> bool:
+        """
+        Whether rendering needs the relation at the ORM `lookup`, which must
+        follow serializer field names. Relations rendered as ids only don't
+        need to be joined, unless `expand_last` is False (prefetched ids).
+        """
+        *parents, last = lookup.split(LOOKUP_SEP)
+        fieldset = self
+        for name in parents:
+            if not fieldset.expands(name):
+                return False
+            fieldset = fieldset.nested(name)
+
+        return fieldset.expands(last) if expand_last else fieldset.includes(last)
+
 
 class BaseModelSerializer(serializers.ModelSerializer):
-    """Base serializer for all models."""
+    """
+    Base serializer for all models.
+
+    When rendering instances for a request, supports sparse fieldsets and
+    expansion control (see SparseFieldset). Nested serializers receive the
+    fieldset of their relation from the parent.
+    """
+
+    fieldset: SparseFieldset | None = None
 
     class Meta:
         abstract = True
         fields = ("id",)
         read_only_fields = fields
 
+    def get_fieldset(self) -> SparseFieldset | None:
+        if self.fieldset is not None:
+            return self.fieldset
+
+        root = self.root
+        # Input serializers always keep every field
+        if root not in (self, self.parent) or hasattr(root, "initial_data"):
+            return None
+
+        return SparseFieldset.from_request(self.context.get("request"))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fieldset = self.get_fieldset()
+        if fieldset is None:
+            return fields
+
+        for name, field in list(fields.items()):
+            if not fieldset.includes(name):
+                del fields[name]
+                continue
+
+            many = isinstance(field, serializers.ListSerializer)
+            nested = field.child if many else field
+            if not isinstance(nested, serializers.BaseSerializer):
+                continue
+
+            if fieldset.expands(name):
+                nested.fieldset = fieldset.nested(name)
+                continue
+
+            kwargs = {"source": field.source} if field.source else {}
+            fields[name] = serializers.PrimaryKeyRelatedField(
+                read_only=True, many=many, **kwargs
+            )
+
+        return fields
+
 
 class UserSerializer(BaseModelSerializer):
     created_at = serializers.DateTimeField(source="date_joined", read_only=True)
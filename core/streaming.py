@@ -0,0 +1,148 @@
+"""
+Incremental parsing of JSON arrays and NDJSON read from file-like streams.
+
+Only one element (plus a read chunk) is held in memory at a time, so uploads
+of any size can be processed with bounded memory. Both parsers yield
+`(value, error)` pairs: an error in an NDJSON line only affects that line,
+while a malformed JSON array cannot be resynchronized and ends the iteration.
+"""
+
+import codecs
+import json
+from collections.abc import Iterator
+
+CHUNK_SIZE = 64 * 1024
+WHITESPACE = " \t\n\r"
+
+
+class StreamParseError(ValueError):
+    pass
+
+
+class _TextBuffer:
+    """UTF-8 text read from `stream` on demand, consumed from the front."""
+
+    def __init__(self, stream, chunk_size: int):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Reads the next chunk, returns False at the end of the stream."""
+        if self.eof:
+            return False
+
+        chunk = self.stream.read(self.chunk_size)
+        self.eof = not chunk
+        try:
+            decoded = self.decoder.decode(chunk, final=self.eof)
+        except UnicodeDecodeError as e:
+            raise StreamParseError(f"Invalid UTF-8: {e.reason}.") from e
+        self.text = self.text[self.pos :] + decoded
+        self.pos = 0
+        return not self.eof or bool(decoded)
+
+    def peek(self) -> str:
+        """Next non-whitespace character, or "" at the end of the stream."""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, characters: str) -> str:
+        character = self.peek()
+        if not character or character not in characters:
+            found = repr(character) if character else "end of input"
+            raise StreamParseError(f"Expected one of {characters!r}, found {found}.")
+        self.pos += 1
+        return character
+
+
+def iter_json_array(
+    stream, max_item_size: int, chunk_size: int = CHUNK_SIZE
+) -> Iterator[tuple[object, str | None]]:
+    """Yields the elements of the JSON array read from `stream`."""
+    decoder = json.JSONDecoder()
+    buffer = _TextBuffer(stream, chunk_size)
+
+    try:
+        buffer.expect("[")
+        if buffer.peek() == "]":
+            buffer.pos += 1
+        else:
+            while True:
+                yield _decode_element(decoder, buffer, max_item_size), None
+                if buffer.expect(",]") == "]":
+                    break
+
+        if buffer.peek():
+            raise StreamParseError("Unexpected data after the array.")
+    except StreamParseError as e:
+        yield None, str(e)
+
+
+def _decode_element(decoder: json.JSONDecoder, buffer: _TextBuffer, max_size: int):
+    buffer.peek()
+    while True:
+        try:
+            value, end = decoder.raw_decode(buffer.text, buffer.pos)
+        except json.JSONDecodeError as e:
+            if buffer.eof:
+                raise StreamParseError(f"Invalid JSON: {e.msg}.") from e
+        else:
+            # A number may continue in the next chunk ("1" of "1.5"), so only
+            # trust values followed by a delimiter
+            if buffer.eof or (
+                end < len(buffer.text) and buffer.text[end] in ",]" + WHITESPACE
+            ):
+                buffer.pos = end
+                return value
+
+        if len(buffer.text) - buffer.pos > max_size:
+            raise StreamParseError(f"Element larger than {max_size} bytes.")
+        buffer.fill()
+
+
+def iter_ndjson(
+    stream, max_item_size: int, chunk_size: int = CHUNK_SIZE
+) -> Iterator[tuple[object, str | None]]:
+    """Yields the value of every non-empty line read from `stream`."""
+    pending = b""
+    oversized = False
+    while True:
+        chunk = stream.read(chunk_size)
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop() if chunk else b""
+
+        for line in lines:
+            if oversized:
+                # Remainder of a line already reported as too large
+                oversized = False
+                continue
+            if line.strip():
+                yield _decode_line(line, max_item_size)
+
+        if len(pending) > max_item_size:
+            if not oversized:
+                yield None, f"Line larger than {max_item_size} bytes."
+            pending = b""
+            oversized = True
+        if not chunk:
+            return
+
+
+def _decode_line(line: bytes, max_size: int) -> tuple[object, str | None]:
+    if len(line) > max_size:
+        return None, f"Line larger than {max_size} bytes."
+    try:
+        return json.loads(line), None
+    except UnicodeDecodeError as e:
+        return None, f"Invalid UTF-8: {e.reason}."
+    except json.JSONDecodeError as e:
+        return None, f"Invalid JSON: {e.msg}."
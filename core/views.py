@@ -1 +1,223 @@
-# Create your views here.
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.generics import get_object_or_404
+from rest_framework.pagination import CursorPagination
+from rest_framework.permissions import BasePermission
+from rest_framework.response import Response
+
+from core.compiled import compile_serializer
+from core.serializers import SparseFieldset
+
+
+class QueryPlanMixin:
+    """
+    Applies a declared select/prefetch plan to the viewset queryset.
+
+    The plan should mirror the nested read serializer tree, so serializing a
+    page of objects costs a constant number of queries regardless of its size.
+    Paths are dropped when the request's sparse fieldset doesn't render their
+    relation inline, so they must follow the serializer field names.
+    """
+
+    select_related_fields: tuple[str, ...] = ()
+    prefetch_related_fields: tuple[str, ...] = ()
+    query_plan_actions: tuple[str, ...] = ("list", "retrieve")
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if getattr(self, "action", None) not in self.query_plan_actions:
+            return queryset
+
+        select_related_fields = self.select_related_fields
+        prefetch_related_fields = self.prefetch_related_fields
+        fieldset = SparseFieldset.from_request(getattr(self, "request", None))
+        if fieldset is not None:
+            select_related_fields = [
+                lookup for lookup in select_related_fields if fieldset.requires(lookup)
+            ]
+            # Relations rendered as lists of ids still need their rows
+            prefetch_related_fields = [
+                lookup
+                for lookup in prefetch_related_fields
+                if fieldset.requires(lookup, expand_last=False)
+            ]
+
+        if select_related_fields:
+            queryset = queryset.select_related(*select_related_fields)
+        if prefetch_related_fields:
+            queryset = queryset.prefetch_related(*prefetch_related_fields)
+
+        return queryset
+
+
+class CompiledReadMixin:
+    """
+    Serves list and retrieve from .values() rows through the compiled read
+    serializer (see core.compiled), producing the same data without DRF's
+    per field machinery.
+
+    Falls back to DRF when the request asks for a sparse fieldset or when a
+    permission class has to inspect the object itself.
+    """
+
+    compiled_read_actions: tuple[str, ...] = ("list", "retrieve")
+
+    def use_compiled_read(self) -> bool:
+        if self.action not in self.compiled_read_actions:
+            return False
+        if SparseFieldset.from_request(self.request) is not None:
+            return False
+        if self.action == "retrieve":
+            return all(
+                type(permission).has_object_permission
+                is BasePermission.has_object_permission
+                for permission in self.get_permissions()
+            )
+        return True
+
+    def get_compiled_serializer(self):
+        return compile_serializer(self.get_read_serializer_class())
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_compiled_read():
+            return super().list(request, *args, **kwargs)
+
+        compiled = self.get_compiled_serializer()
+        queryset = self.filter_queryset(self.get_queryset())
+        # Cursor positions are read from the rows
+        ordering = ()
+        if isinstance(self.paginator, CursorPagination):
+            ordering = self.paginator.get_ordering(request, queryset, self)
+        queryset = compiled.values(queryset, *(field.lstrip("-") for field in ordering))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(compiled.to_representation(page))
+
+        return Response(compiled.to_representation(queryset))
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self.use_compiled_read():
+            return super().retrieve(request, *args, **kwargs)
+
+        compiled = self.get_compiled_serializer()
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(
+            compiled.values(self.filter_queryset(self.get_queryset())),
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]},
+        )
+
+        return Response(compiled.to_representation([row])[0])
+
+
+class ConditionalReadMixin:
+    """
+    Adds an ETag header to list and retrieve, and a Last-Modified header to
+    retrieve, and answers If-None-Match / If-Modified-Since with 304 Not
+    Modified.
+
+    Validators are computed from the ids and `last_modified_field` of the
+    rows in the response, without serializing the body: the object, or the
+    requested page fetched the way the paginator does (one index range scan
+    with cursor pagination) along with its links. Changes to nested objects
+    must therefore touch that field. Embedded users (created_by, modified_by)
+    have no such field: their changes show once the object itself is
+    modified again.
+
+    Lists get no Last-Modified, as deleting a row doesn't move the latest
+    `last_modified_field` of the rest.
+    """
+
+    conditional_actions: tuple[str, ...] = ("list", "retrieve")
+    last_modified_field = "modified_at"
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
+
+    def get_validators(self):
+        """(etag, last_modified timestamp or None)."""
+        queryset = (
+            self.filter_queryset(self.get_queryset())
+            .select_related(None)
+            .prefetch_related(None)
+        )
+
+        if self.action == "retrieve":
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            obj = get_object_or_404(
+                queryset.only("pk", self.last_modified_field),
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]},
+            )
+            self.check_object_permissions(self.request, obj)
+            state = (1, str(obj.pk), getattr(obj, self.last_modified_field))
+            last_modified = state[-1]
+        else:
+            state = self.get_page_state(queryset)
+            last_modified = None
+
+        # Responses vary with the query string and the negotiated renderer
+        variant = (self.request.get_full_path(), self.request.accepted_media_type)
+        digest = hashlib.md5(
+            repr((state, variant)).encode(), usedforsecurity=False
+        ).hexdigest()
+        return (
+            quote_etag(digest),
+            # HTTP dates have a precision of seconds
+            int(last_modified.timestamp()) if last_modified is not None else None,
+        )
+
+    def get_page_state(self, queryset):
+        """Ids and `last_modified_field` of the rows of the requested page."""
+        rows = None
+        if self.pagination_class is not None:
+            # A paginator of its own, the view's one serves the page itself
+            paginator = self.pagination_class()
+            ordering = ()
+            if isinstance(paginator, CursorPagination):
+                ordering = paginator.get_ordering(self.request, queryset, self)
+            rows = paginator.paginate_queryset(
+                queryset.values(
+                    "pk",
+                    self.last_modified_field,
+                    *(field.lstrip("-") for field in ordering),
+                ),
+                self.request,
+                view=self,
+            )
+
+        if rows is None:
+            # Unpaginated lists cost a whole scan anyway
+            return tuple(
+                queryset.aggregate(
+                    count=Count("pk"), last_modified=Max(self.last_modified_field)
+                ).values()
+            )
+        return (
+            [(str(row["pk"]), row[self.last_modified_field]) for row in rows],
+            paginator.get_next_link(),
+            paginator.get_previous_link(),
+        )
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        if self.action not in self.conditional_actions:
+            return handler(request, *args, **kwargs)
+
+        etag, last_modified = self.get_validators()
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+
+        if response.status_code in (200, 304):
+            response.headers["ETag"] = etag
+            if last_modified is not None:
+                response.headers["Last-Modified"] = http_date(last_modified)
+
+        return response
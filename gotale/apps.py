@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class GotaleConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "gotale"
+
+    def ready(self):
+        from gotale import checks, signals  # noqa: F401
@@ -0,0 +1,143 @@
+"""
+Async implementations of the hot gameplay endpoints, served by the ASGI
+application (see backend.asgi_urls) in place of their DRF counterparts.
+
+They answer exactly like the DRF views, but use the async ORM and cache APIs,
+so a request waiting on the database doesn't hold a worker thread. Game step
+payloads come pre-encoded from the compiled scenario graph, so no serializer
+is involved on the way out either.
+"""
+
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+
+from core.renderers import encode_json
+from gotale.events import game_events
+from gotale.graph import scenario_graphs
+from gotale.models import Game
+from gotale.serializers import MakeGameDecisionSerializer
+
+
+def _json_response(data, status: int = 200) -> HttpResponse:
+    return HttpResponse(
+        encode_json(data), content_type="application/json", status=status
+    )
+
+
+def _request_data(request):
+    if request.content_type == "application/json":
+        return json.loads(request.body or b"{}")
+    return request.POST
+
+
+async def _get_game(pk, *fields):
+    """Returns the game or the 404 response of the DRF views."""
+    try:
+        return await Game.objects.only("id", *fields).aget(pk=pk)
+    except Game.DoesNotExist:
+        return _json_response({"detail": "No Game matches the given query."}, 404)
+    except DjangoValidationError:
+        # Not a valid primary key
+        return _json_response({"detail": "Not found."}, 404)
+
+
+def _server_sent_event(event: str, data: bytes, id=None) -> bytes:
+    # Encoded JSON never contains a line break, so it fits a single data field
+    head = f"id: {id}\n" if id is not None else ""
+    return f"{head}event: {event}\ndata: ".encode() + data + b"\n\n"
+
+
+# Like DRF views, which exempt requests not authenticated by session
+@csrf_exempt
+async def game_current_step(request, pk) -> HttpResponse:
+    """Async GameViewsets.current_step: GET the current step, POST a choice."""
+    if request.method not in ("GET", "POST"):
+        return _json_response(
+            {"detail": f'Method "{request.method}" not allowed.'}, status=405
+        )
+
+    game = await _get_game(pk, "scenario_id", "current_step_id", "user_id")
+    if isinstance(game, HttpResponse):
+        return game
+
+    graph = await scenario_graphs.aget(game.scenario_id, game.current_step_id)
+    if request.method == "GET":
+        return HttpResponse(
+            graph.payloads[game.current_step_id], content_type="application/json"
+        )
+
+    if graph.steps[game.current_step_id].is_terminal:
+        return _json_response({"error": "This game has already ended"}, 400)
+
+    try:
+        data = _request_data(request)
+    except ValueError:
+        return _json_response({"detail": "JSON parse error."}, 400)
+    serializer = MakeGameDecisionSerializer(data=data)
+    if not serializer.is_valid():
+        return _json_response(serializer.errors, 400)
+
+    choice = graph.choices.get(serializer.validated_data["choice"])
+    if choice is None:
+        return _json_response({"detail": "No Choice matches the given query."}, 404)
+
+    try:
+        decided = await game.amake_decision(choice)
+    except DjangoValidationError as e:
+        return _json_response({"error": e.message}, 400)
+
+    if not decided:
+        return _json_response(
+            {"error": "The game has already moved to another step"}, 409
+        )
+
+    return HttpResponse(
+        graph.payloads[game.current_step_id], content_type="application/json"
+    )
+
+
+async def game_events_stream(request, pk) -> HttpResponse:
+    """
+    Server-sent events of a game, in place of polling its step.
+
+    A "step" event carries the current step as GET .../step/ returns it, once
+    on connection and again on every move, with the step id as event id. A
+    reconnecting client sending that id as Last-Event-ID gets no repeat of it.
+    An "end" event follows the terminal step, then the stream is closed.
+    """
+    if request.method != "GET":
+        return _json_response(
+            {"detail": f'Method "{request.method}" not allowed.'}, status=405
+        )
+
+    game = await _get_game(pk, "scenario_id")
+    if isinstance(game, HttpResponse):
+        return game
+
+    async def events():
+        last_step_id = request.headers.get("Last-Event-ID")
+        async for version in game_events.listen(game.pk):
+            if version is None:
+                yield b": keep-alive\n\n"
+                continue
+
+            state = await Game.objects.only("current_step_id", "end").aget(pk=game.pk)
+            step_id = state.current_step_id
+            if str(step_id) != last_step_id:
+                last_step_id = str(step_id)
+                graph = await scenario_graphs.aget(game.scenario_id, step_id)
+                yield _server_sent_event("step", graph.payloads[step_id], id=step_id)
+            if state.end is not None:
+                yield _server_sent_event(
+                    "end", encode_json({"id": str(game.pk), "end": state.end})
+                )
+                return
+
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Stops nginx from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
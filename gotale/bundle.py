@@ -0,0 +1,96 @@
+"""
+Offline scenario bundles, as served by /api/scenarios/{id}/bundle/.
+
+A bundle holds everything a client needs to play a scenario without a request
+per step: every step with its choices and the step each choice leads to, and
+the locations of the steps. It is versioned by the compiled graph version,
+which changes with any modification of the scenario, so clients can revalidate
+with If-None-Match and send the version along with decisions made offline.
+Versions are sent as strings, as they exceed the integers JavaScript numbers
+represent exactly.
+
+Bundles are encoded, and optionally compressed with gzip or brotli (when the
+brotli package is installed), once per version and kept in the scenario cache.
+"""
+
+import gzip
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core.renderers import encode_json
+from gotale.graph import ScenarioGraph
+from gotale.models import Location, Scenario
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Content codings in order of preference
+COMPRESSORS = {
+    "br": brotli.compress if brotli is not None else None,
+    "gzip": lambda content: gzip.compress(content, mtime=0),
+}
+
+
+def negotiate_coding(accept_encoding: str) -> str | None:
+    """The preferred supported coding accepted by the client, if any."""
+    accepted = set()
+    for item in accept_encoding.split(","):
+        coding, *params = item.split(";")
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(coding.strip().lower())
+
+    for coding, compress in COMPRESSORS.items():
+        if compress is not None and coding in accepted:
+            return coding
+    return None
+
+
+def build_bundle(graph: ScenarioGraph) -> dict:
+    scenario = Scenario.objects.values("title", "description").get(pk=graph.scenario_id)
+    location_ids = {
+        step.location_id for step in graph.steps.values() if step.location_id
+    }
+    locations = Location.objects.filter(pk__in=location_ids).order_by("pk")
+
+    return {
+        "id": str(graph.scenario_id),
+        "version": str(graph.version),
+        "title": scenario["title"],
+        "description": scenario["description"],
+        "root_step": str(graph.root_step_id) if graph.root_step_id else None,
+        "steps": [
+            step.as_data()
+            | {
+                "choices": [
+                    choice.as_data() | {"next": str(choice.next_id)}
+                    for choice in step.choices
+                ]
+            }
+            for step in graph.steps.values()
+        ],
+        "locations": list(locations.as_data()),
+    }
+
+
+def get_bundle(graph: ScenarioGraph, coding: str | None = None) -> bytes:
+    """The encoded bundle of `graph`, compressed with `coding` if given."""
+    cache = caches[settings.SCENARIO_CACHE_ALIAS]
+    key = f"scenario-bundle:{graph.scenario_id}:{graph.version}:{coding or 'identity'}"
+    content = cache.get(key)
+    if content is None:
+        content = bytes(encode_json(build_bundle(graph)))
+        if coding is not None:
+            content = COMPRESSORS[coding](content)
+        cache.set(key, content, timeout=settings.SCENARIO_GRAPH_CACHE_TIMEOUT)
+    return content
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+
+@register()
+def check_scenario_cache_shared(app_configs, **kwargs):
+    """Worker processes only see each other's changes through a shared cache."""
+    backend = settings.CACHES[settings.SCENARIO_CACHE_ALIAS]["BACKEND"]
+    if backend.endswith(".LocMemCache") and settings.WEB_CONCURRENCY > 1:
+        return [
+            Error(
+                f"The {settings.SCENARIO_CACHE_ALIAS!r} cache is local to each "
+                f"process, but WEB_CONCURRENCY is {settings.WEB_CONCURRENCY}.",
+                hint="Set SCENARIO_CACHE_BACKEND to a file-based, database or "
+                "Redis cache.",
+                id="gotale.E001",
+            )
+        ]
+    return []
@@ -0,0 +1,122 @@
+"""
+Notifications of game state changes, pushed to clients listening on a game.
+
+Every committed move of a game bumps its version in Django's cache framework
+(`settings.SCENARIO_CACHE_ALIAS`), shared between worker processes. Listeners
+in the process that made the move are woken up right away, listeners in other
+processes notice the new version within `settings.GAME_EVENTS_POLL_INTERVAL`.
+The game itself is always reloaded from the database, versions only say when.
+"""
+
+import asyncio
+import threading
+import time
+from uuid import UUID
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class GameEvents:
+    def __init__(self, alias: str = "default"):
+        self.alias = alias
+        self._waiters: dict[str, set[tuple[asyncio.AbstractEventLoop, asyncio.Event]]]
+        self._waiters = {}
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    @staticmethod
+    def version_key(game_id: UUID) -> str:
+        return f"game-version:{game_id}"
+
+    def publish(self, game_id: UUID) -> None:
+        """Tells listeners of the game that it has changed."""
+        self.shared.set(
+            self.version_key(game_id),
+            time.time_ns(),
+            timeout=settings.GAME_EVENTS_VERSION_TIMEOUT,
+        )
+        self._wake(str(game_id))
+
+    async def apublish(self, game_id: UUID) -> None:
+        """Async publish()."""
+        await self.shared.aset(
+            self.version_key(game_id),
+            time.time_ns(),
+            timeout=settings.GAME_EVENTS_VERSION_TIMEOUT,
+        )
+        self._wake(str(game_id))
+
+    async def aget_version(self, game_id: UUID) -> int:
+        key = self.version_key(game_id)
+        version = await self.shared.aget(key)
+        if version is None:
+            # Never None, which listen() yields as a keep-alive
+            await self.shared.aadd(
+                key, time.time_ns(), timeout=settings.GAME_EVENTS_VERSION_TIMEOUT
+            )
+            version = await self.shared.aget(key)
+        return version
+
+    def _wake(self, game_id: str) -> None:
+        with self._lock:
+            waiters = list(self._waiters.get(game_id, ()))
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # The listener's loop is closed, it is about to unsubscribe
+                pass
+
+    async def listen(self, game_id: UUID):
+        """
+        Yields the version of the game once at first, then whenever it
+        changes. Yields None after `settings.GAME_EVENTS_KEEPALIVE` seconds
+        without a change, so the caller can keep its connection alive.
+        """
+        game_id = str(game_id)
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters.setdefault(game_id, set()).add(waiter)
+
+        try:
+            last_version = object()
+            last_yield = time.monotonic()
+            while True:
+                # Cleared before the version is read, so a change published
+                # in between still ends the wait below
+                waiter[1].clear()
+                version = await self.aget_version(game_id)
+                if version != last_version:
+                    last_version = version
+                    last_yield = time.monotonic()
+                    yield version
+                    continue
+
+                if time.monotonic() - last_yield >= settings.GAME_EVENTS_KEEPALIVE:
+                    last_yield = time.monotonic()
+                    yield None
+
+                try:
+                    await asyncio.wait_for(
+                        waiter[1].wait(), timeout=settings.GAME_EVENTS_POLL_INTERVAL
+                    )
+                except TimeoutError:
+                    pass
+        finally:
+            with self._lock:
+                waiters = self._waiters[game_id]
+                waiters.discard(waiter)
+                if not waiters:
+                    del self._waiters[game_id]
+
+    def listeners(self, game_id: UUID) -> int:
+        """Number of listeners of the game in this process."""
+        with self._lock:
+            return len(self._waiters.get(str(game_id), ()))
+
+
+game_events = GameEvents(alias=settings.SCENARIO_CACHE_ALIAS)
@@ -0,0 +1,72 @@
+"""
+Export of a scenario's whole graph, as served by /api/scenarios/{id}/export/.
+
+The document is a payload accepted by ScenarioCreateSerializer, with steps
+keyed by their UUIDs so it can also be sent back as an update, plus the
+locations its steps are at. It is encoded while it is sent: steps and choices
+are read with .iterator() in step order and merged, so memory use doesn't
+grow with the size of the scenario.
+"""
+
+from collections.abc import Iterable, Iterator
+from itertools import groupby
+from operator import itemgetter
+
+from core.renderers import encode_json
+from gotale.models import Choice, Location, Scenario, Step
+
+
+def iter_scenario_export(scenario: Scenario, chunk_size: int) -> Iterator[bytes]:
+    """Yields the JSON document of `scenario` in pieces."""
+    header = encode_json({"title": scenario.title, "description": scenario.description})
+    yield header[:-1] + b',"locations":['
+    yield from _join(encode_json(data) for data in _locations(scenario, chunk_size))
+    yield b'],"steps":['
+    yield from _join(encode_json(data) for data in _steps(scenario, chunk_size))
+    yield b"]}"
+
+
+def _join(items: Iterable[bytes]) -> Iterator[bytes]:
+    for index, item in enumerate(items):
+        yield b"," + item if index else item
+
+
+def _locations(scenario: Scenario, chunk_size: int) -> Iterator[dict]:
+    locations = Location.objects.filter(
+        pk__in=Step.objects.filter(scenario=scenario).values("location")
+    ).order_by("pk")
+    return locations.as_data(chunk_size=chunk_size)
+
+
+def _steps(scenario: Scenario, chunk_size: int) -> Iterator[dict]:
+    steps = (
+        Step.objects.filter(scenario=scenario)
+        .order_by("pk")
+        .values("id", "title", "description", "location_id")
+        .iterator(chunk_size=chunk_size)
+    )
+    choices = (
+        Choice.objects.filter(step__scenario=scenario)
+        .order_by("step_id")
+        .values("step_id", "text", "next_id")
+        .iterator(chunk_size=chunk_size)
+    )
+
+    # Both are ordered by step, so the choices of each step come next, if any
+    groups = groupby(choices, key=itemgetter("step_id"))
+    group_step_id, group = next(groups, (None, ()))
+    for step in steps:
+        step_choices = []
+        if group_step_id == step["id"]:
+            step_choices = [
+                {"text": choice["text"], "next": choice["next_id"]} for choice in group
+            ]
+            group_step_id, group = next(groups, (None, ()))
+
+        yield {
+            "id": step["id"],
+            "title": step["title"],
+            "description": step["description"],
+            "location": step["location_id"],
+            "choices": step_choices,
+        }
@@ -0,0 +1,56 @@
+from rest_framework import filters, serializers
+
+from gotale.geo import longitude_ranges_q
+
+
+class BoundingBoxFilter(filters.BaseFilterBackend):
+    """
+    Filters locations by `?bbox=min_lon,min_lat,max_lon,max_lat`.
+
+    A min_lon greater than max_lon selects a box crossing the antimeridian.
+    """
+
+    query_param = "bbox"
+
+    def filter_queryset(self, request, queryset, view):
+        bbox = request.query_params.get(self.query_param)
+        if not bbox:
+            return queryset
+
+        min_longitude, min_latitude, max_longitude, max_latitude = self.parse(bbox)
+        if min_longitude <= max_longitude:
+            ranges = [(min_longitude, max_longitude)]
+        else:
+            ranges = [(min_longitude, 180.0), (-180.0, max_longitude)]
+
+        return queryset.filter(
+            longitude_ranges_q(ranges),
+            latitude__range=(min_latitude, max_latitude),
+        )
+
+    def parse(self, bbox: str) -> list[float]:
+        try:
+            values = [float(value) for value in bbox.split(",")]
+        except ValueError:
+            values = []
+
+        if len(values) != 4:
+            raise serializers.ValidationError(
+                {self.query_param: ["Expected min_lon,min_lat,max_lon,max_lat."]}
+            )
+
+        min_longitude, min_latitude, max_longitude, max_latitude = values
+        if not all(-180 <= value <= 180 for value in (min_longitude, max_longitude)):
+            raise serializers.ValidationError(
+                {self.query_param: ["Longitude must be between -180 and 180."]}
+            )
+        if not -90 <= min_latitude <= max_latitude <= 90:
+            raise serializers.ValidationError(
+                {
+                    self.query_param: [
+                        "Latitude must be between -90 and 90, min_lat <= max_lat."
+                    ]
+                }
+            )
+
+        return values
@@ -0,0 +1,187 @@
+"""Spherical geometry helpers for proximity searches on Location."""
+
+import math
+
+from django.db.models import Q
+
+EARTH_RADIUS = 6_371_008.8  # Mean Earth radius in meters
+MAX_DISTANCE = math.pi * EARTH_RADIUS  # Half of the great circle
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS / 180
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 12
+
+
+def bounding_box(
+    latitude: float, longitude: float, radius: float
+) -> tuple[float, float, list[tuple[float, float]]]:
+    """
+    Returns (min_latitude, max_latitude, longitude_ranges) enclosing the circle
+    of `radius` meters around the point.
+
+    The longitude range is split in two when the box crosses the antimeridian
+    and spans all longitudes when it contains a pole.
+    """
+    angular_radius = radius / EARTH_RADIUS
+    delta_latitude = math.degrees(angular_radius)
+    min_latitude = latitude - delta_latitude
+    max_latitude = latitude + delta_latitude
+
+    if min_latitude <= -90 or max_latitude >= 90 or angular_radius >= math.pi / 2:
+        return max(min_latitude, -90.0), min(max_latitude, 90.0), [(-180.0, 180.0)]
+
+    delta_longitude = math.degrees(
+        math.asin(math.sin(angular_radius) / math.cos(math.radians(latitude)))
+    )
+    min_longitude = longitude - delta_longitude
+    max_longitude = longitude + delta_longitude
+
+    if min_longitude < -180:
+        ranges = [(min_longitude + 360, 180.0), (-180.0, max_longitude)]
+    elif max_longitude > 180:
+        ranges = [(min_longitude, 180.0), (-180.0, max_longitude - 360)]
+    else:
+        ranges = [(min_longitude, max_longitude)]
+
+    return min_latitude, max_latitude, ranges
+
+
+def longitude_ranges_q(ranges: list[tuple[float, float]]) -> Q:
+    q = Q()
+    for min_longitude, max_longitude in ranges:
+        q |= Q(longitude__range=(min_longitude, max_longitude))
+    return q
+
+
+def haversine_distances(
+    latitude: float, longitude: float, points: list[tuple[float, float]]
+) -> list[float]:
+    """Great circle distances in meters from the point to each (lat, lon)."""
+    latitude = math.radians(latitude)
+    longitude = math.radians(longitude)
+    cos_latitude = math.cos(latitude)
+
+    distances = []
+    for point_latitude, point_longitude in points:
+        point_latitude = math.radians(point_latitude)
+        half_dlat = math.sin((point_latitude - latitude) / 2)
+        half_dlon = math.sin((math.radians(point_longitude) - longitude) / 2)
+        a = half_dlat**2 + cos_latitude * math.cos(point_latitude) * half_dlon**2
+        distances.append(2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a))))
+
+    return distances
+
+
+def closest_within(
+    latitude: float, longitude: float, radius: float, rows
+) -> list[tuple[float, object]]:
+    """
+    Returns (distance, key) of the (key, lat, lon) `rows` within `radius`
+    meters of the point, closest first.
+    """
+    rows = list(rows)
+    distances = haversine_distances(
+        latitude, longitude, [(float(lat), float(lon)) for _, lat, lon in rows]
+    )
+    return sorted(
+        (distance, key)
+        for (key, _, _), distance in zip(rows, distances)
+        if distance <= radius
+    )
+
+
+def geohash_encode(
+    latitude: float, longitude: float, precision: int = GEOHASH_PRECISION
+) -> str:
+    latitude_range = [-90.0, 90.0]
+    longitude_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even = True  # Bits alternate starting with longitude
+
+    while len(geohash) < precision:
+        value, value_range = (
+            (longitude, longitude_range) if even else (latitude, latitude_range)
+        )
+        middle = (value_range[0] + value_range[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            value_range[0] = middle
+        else:
+            value_range[1] = middle
+
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(geohash)
+
+
+def geohash_cell_size(precision: int) -> tuple[float, float]:
+    """Returns the (height, width) of a geohash cell in degrees."""
+    total_bits = 5 * precision
+    latitude_bits = total_bits // 2
+    longitude_bits = total_bits - latitude_bits
+    return 180 / 2**latitude_bits, 360 / 2**longitude_bits
+
+
+def geohash_cells(latitude: float, longitude: float, radius: float) -> list[str] | None:
+    """
+    Returns geohash cells whose union covers the circle of `radius` meters
+    around the point, or None when no precision is coarse enough (huge radius
+    or close to a pole).
+
+    Picks the finest precision whose cells are at least `radius` tall and wide,
+    so the cell of the point and its 8 neighbours cover the whole circle.
+    """
+    min_latitude, max_latitude, _ = bounding_box(latitude, longitude, radius)
+    widest_latitude = max(abs(min_latitude), abs(max_latitude))
+    meters_per_longitude = METERS_PER_DEGREE * math.cos(math.radians(widest_latitude))
+
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = geohash_cell_size(precision)
+        if (
+            height * METERS_PER_DEGREE >= radius
+            and width * meters_per_longitude >= radius
+        ):
+            break
+    else:
+        return None
+
+    cells = set()
+    for latitude_offset in (-height, 0, height):
+        neighbour_latitude = latitude + latitude_offset
+        if not -90 <= neighbour_latitude <= 90:
+            continue
+        for longitude_offset in (-width, 0, width):
+            neighbour_longitude = (longitude + longitude_offset + 180) % 360 - 180
+            cells.add(
+                geohash_encode(neighbour_latitude, neighbour_longitude, precision)
+            )
+
+    return sorted(cells)
+
+
+def geohash_successor(prefix: str) -> str | None:
+    """First geohash prefix sorting after every geohash starting with `prefix`."""
+    prefix = prefix.rstrip(GEOHASH_ALPHABET[-1])
+    if not prefix:
+        return None
+    return prefix[:-1] + GEOHASH_ALPHABET[GEOHASH_ALPHABET.index(prefix[-1]) + 1]
+
+
+def geohash_prefixes_q(cells: list[str]) -> Q:
+    """Prefix match written as a range, so any B-tree index can serve it."""
+    q = Q()
+    for cell in cells:
+        successor = geohash_successor(cell)
+        if successor is None:
+            q |= Q(geohash__gte=cell)
+        else:
+            q |= Q(geohash__gte=cell, geohash__lt=successor)
+    return q
@@ -0,0 +1,242 @@
+"""
+Compiled, read-only representation of scenario graphs used during gameplay.
+
+Scenarios are essentially immutable once published, so every step, its
+choices and the step they lead to are loaded once per scenario and cached.
+Any change to a Scenario, Step or Choice invalidates the compiled graph of its
+scenario (see gotale.signals).
+
+Step payloads are the same for every player, so each step is also kept
+encoded as JSON and served as is.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from uuid import UUID
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+from core.renderers import encode_json
+from core.routers import use_primary
+from gotale.models import Choice, Scenario, Step
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledChoice:
+    id: UUID
+    step_id: UUID
+    next_id: UUID
+    text: str
+
+    def as_data(self) -> dict:
+        """Same representation as ChoiceSerializer."""
+        return {"id": str(self.id), "text": self.text}
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledStep:
+    id: UUID
+    title: str
+    description: str | None
+    location_id: UUID | None
+    choices: tuple[CompiledChoice, ...]
+
+    @property
+    def is_terminal(self) -> bool:
+        return not self.choices
+
+    def as_data(self) -> dict:
+        """Same representation as StepSerializer."""
+        return {
+            "id": str(self.id),
+            "title": self.title,
+            "description": self.description,
+            "location": str(self.location_id) if self.location_id else None,
+            "choices": [choice.as_data() for choice in self.choices],
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class ScenarioGraph:
+    scenario_id: UUID
+    version: int
+    root_step_id: UUID | None
+    steps: dict[UUID, CompiledStep]
+    choices: dict[UUID, CompiledChoice]
+    # Encoded CompiledStep.as_data(), keyed by step id
+    payloads: dict[UUID, bytes]
+
+
+def compile_scenario_graph(scenario_id: UUID, version: int = 0) -> ScenarioGraph:
+    """Load the whole graph of a scenario, raises Scenario.DoesNotExist."""
+    root_step_id = Scenario.objects.values_list("root_step_id", flat=True).get(
+        pk=scenario_id
+    )
+
+    step_choices: dict[UUID, list[CompiledChoice]] = {}
+    choices = {}
+    for row in Choice.objects.filter(step__scenario_id=scenario_id).values(
+        "id", "step_id", "next_id", "text"
+    ):
+        choice = CompiledChoice(**row)
+        choices[choice.id] = choice
+        step_choices.setdefault(choice.step_id, []).append(choice)
+
+    steps = {}
+    for row in Step.objects.filter(scenario_id=scenario_id).values(
+        "id", "title", "description", "location_id"
+    ):
+        steps[row["id"]] = CompiledStep(
+            **row, choices=tuple(step_choices.get(row["id"], ()))
+        )
+
+    return ScenarioGraph(
+        scenario_id=scenario_id,
+        version=version,
+        root_step_id=root_step_id,
+        steps=steps,
+        choices=choices,
+        payloads={
+            step_id: encode_json(step.as_data()) for step_id, step in steps.items()
+        },
+    )
+
+
+def _as_uuid(value) -> UUID:
+    # Instances created with a string primary key keep it as a string
+    return value if isinstance(value, UUID) else UUID(str(value))
+
+
+class ScenarioGraphCache:
+    """
+    Two level cache of compiled scenario graphs.
+
+    Graphs are shared between worker processes through Django's cache
+    framework (`settings.SCENARIO_CACHE_ALIAS`), keyed by scenario id and a
+    version counter bumped on every modification. Each process additionally
+    keeps a thread-safe LRU of the graphs it uses, validated against the
+    shared version, so only the version lookup hits the shared backend.
+    """
+
+    def __init__(self, maxsize: int, alias: str = "default"):
+        self.maxsize = maxsize
+        self.alias = alias
+        self._graphs: OrderedDict[UUID, ScenarioGraph] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    @staticmethod
+    def version_key(scenario_id: UUID) -> str:
+        return f"scenario-graph-version:{scenario_id}"
+
+    @staticmethod
+    def graph_key(scenario_id: UUID, version: int) -> str:
+        return f"scenario-graph:{scenario_id}:{version}"
+
+    def get_version(self, scenario_id: UUID) -> int:
+        scenario_id = _as_uuid(scenario_id)
+        key = self.version_key(scenario_id)
+        version = self.shared.get(key)
+        if version is None:
+            # Start from the clock rather than 1, so a version lost to eviction
+            # never points back at a stale graph
+            self.shared.add(key, time.time_ns(), timeout=None)
+            version = self.shared.get(key)
+        return version
+
+    def get(self, scenario_id: UUID, step_id: UUID | None = None) -> ScenarioGraph:
+        """
+        The graph of the scenario. A graph lacking `step_id`, e.g. the step a
+        game was just moved to by another process, is taken for a stale one:
+        it is invalidated and compiled again, once.
+        """
+        graph = self._get(scenario_id)
+        if step_id is not None and step_id not in graph.steps:
+            self.invalidate(scenario_id)
+            graph = self._get(scenario_id)
+        return graph
+
+    def _get(self, scenario_id: UUID) -> ScenarioGraph:
+        scenario_id = _as_uuid(scenario_id)
+        version = self.get_version(scenario_id)
+        with self._lock:
+            graph = self._graphs.get(scenario_id)
+            if graph is not None and graph.version == version:
+                self._graphs.move_to_end(scenario_id)
+                return graph
+
+        graph_key = self.graph_key(scenario_id, version)
+        graph = self.shared.get(graph_key)
+        if graph is None:
+            # Concurrent misses are harmless, they store the same graph. Not
+            # read from a lagging replica, it would be cached as this version
+            with use_primary():
+                graph = compile_scenario_graph(scenario_id, version=version)
+            self.shared.set(
+                graph_key, graph, timeout=settings.SCENARIO_GRAPH_CACHE_TIMEOUT
+            )
+
+        with self._lock:
+            self._graphs[scenario_id] = graph
+            self._graphs.move_to_end(scenario_id)
+            while len(self._graphs) > self.maxsize:
+                self._graphs.popitem(last=False)
+
+        return graph
+
+    async def aget(
+        self, scenario_id: UUID, step_id: UUID | None = None
+    ) -> ScenarioGraph:
+        """
+        Async get(). Graphs this process holds are returned after an async
+        version lookup, compiling one is left to get() in a worker thread.
+        """
+        graph = await self._aget(scenario_id)
+        if step_id is not None and step_id not in graph.steps:
+            return await sync_to_async(self.get)(scenario_id, step_id)
+        return graph
+
+    async def _aget(self, scenario_id: UUID) -> ScenarioGraph:
+        scenario_id = _as_uuid(scenario_id)
+        version = await self.shared.aget(self.version_key(scenario_id))
+        with self._lock:
+            graph = self._graphs.get(scenario_id)
+            if graph is not None and graph.version == version:
+                self._graphs.move_to_end(scenario_id)
+                return graph
+
+        return await sync_to_async(self._get)(scenario_id)
+
+    def invalidate(self, scenario_id: UUID) -> None:
+        scenario_id = _as_uuid(scenario_id)
+        try:
+            self.shared.incr(self.version_key(scenario_id))
+        except ValueError:
+            # Nothing was ever compiled for this version
+            pass
+        with self._lock:
+            self._graphs.pop(scenario_id, None)
+
+    def clear(self) -> None:
+        """Drop graphs held by this process, the shared cache is left intact."""
+        with self._lock:
+            self._graphs.clear()
+
+    def __contains__(self, scenario_id: UUID) -> bool:
+        return _as_uuid(scenario_id) in self._graphs
+
+    def __len__(self) -> int:
+        return len(self._graphs)
+
+
+scenario_graphs = ScenarioGraphCache(
+    maxsize=settings.SCENARIO_GRAPH_CACHE_SIZE,
+    alias=settings.SCENARIO_CACHE_ALIAS,
+)
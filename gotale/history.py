@@ -0,0 +1,88 @@
+"""
+Write-behind buffer for History rows recorded on every game decision.
+
+Decisions are queued in memory and inserted with a single bulk_create once
+the buffer is full, its oldest entry is too old, or the current request has
+finished (see gotale.signals). Callers that need durability record with
+`durable=True`, which inserts their entries before returning, as part of the
+caller's transaction. Other pending entries stay in the buffer.
+"""
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+from gotale.models import History
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryBuffer:
+    def __init__(self, max_size: int, max_age: float):
+        self.max_size = max_size
+        self.max_age = max_age
+        self._pending: list[History] = []
+        self._oldest: float | None = None
+        self._lock = threading.Lock()
+
+    def record(self, entry: History, durable: bool = False) -> None:
+        self.record_many([entry], durable=durable)
+
+    def record_many(self, entries: list[History], durable: bool = False) -> None:
+        if durable:
+            # Only these entries, the caller's transaction may still roll back
+            History.objects.bulk_create(entries)
+            return
+
+        # Rolled back decisions must not leave history behind
+        transaction.on_commit(lambda: self._append(entries, flush_when_due=True))
+
+    def _append(self, entries: list[History], flush_when_due: bool = False) -> None:
+        with self._lock:
+            self._pending.extend(entries)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            due = (
+                len(self._pending) >= self.max_size
+                or time.monotonic() - self._oldest >= self.max_age
+            )
+
+        if flush_when_due and due:
+            self.flush()
+
+    def flush(self, raise_errors: bool = False) -> int:
+        """Inserts all pending entries, returns the number of rows written."""
+        with self._lock:
+            batch, self._pending = self._pending, []
+            self._oldest = None
+
+        if not batch:
+            return 0
+
+        try:
+            History.objects.bulk_create(batch)
+        except DatabaseError:
+            if raise_errors:
+                raise
+            logger.exception("Failed to write %d history entries.", len(batch))
+            return 0
+
+        return len(batch)
+
+    def clear(self) -> None:
+        """Drops pending entries without writing them."""
+        with self._lock:
+            self._pending = []
+            self._oldest = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+
+history_buffer = HistoryBuffer(
+    max_size=settings.HISTORY_BUFFER_SIZE,
+    max_age=settings.HISTORY_BUFFER_MAX_AGE,
+)
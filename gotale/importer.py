@@ -0,0 +1,79 @@
+"""
+Bulk import of scenarios, as uploaded to /api/scenarios/bulk-import/.
+
+Every scenario is validated with ScenarioCreateSerializer on its own, valid
+ones are written in chunks, each chunk in its own transaction with a single
+bulk_create per table (see bulk_create_scenarios).
+"""
+
+import logging
+from collections.abc import Iterable
+
+from django.db import DatabaseError, transaction
+
+from gotale.serializers import (
+    ScenarioCreateSerializer,
+    ScenarioRows,
+    bulk_create_scenarios,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ScenarioImporter:
+    def __init__(self, created_by, chunk_size: int, context: dict | None = None):
+        self.created_by = created_by
+        self.chunk_size = chunk_size
+        self.context = context or {}
+
+    def run(self, items: Iterable[tuple[object, str | None]]) -> list[dict]:
+        """
+        Imports `(value, parse_error)` pairs, returns a result per item in
+        order: `{"index", "id"}` when created, `{"index", "errors"}` otherwise.
+        """
+        results = []
+        pending: list[tuple[int, ScenarioRows]] = []
+        for index, (value, error) in enumerate(items):
+            if error is not None:
+                results.append(
+                    {"index": index, "errors": {"non_field_errors": [error]}}
+                )
+                continue
+
+            serializer = ScenarioCreateSerializer(data=value, context=self.context)
+            if not serializer.is_valid():
+                results.append({"index": index, "errors": serializer.errors})
+                continue
+
+            rows = serializer.build_rows(
+                serializer.validated_data, created_by=self.created_by
+            )
+            pending.append((index, rows))
+            if len(pending) >= self.chunk_size:
+                results.extend(self.write(pending))
+                pending = []
+
+        if pending:
+            results.extend(self.write(pending))
+
+        return sorted(results, key=lambda result: result["index"])
+
+    def write(self, pending: list[tuple[int, ScenarioRows]]) -> list[dict]:
+        try:
+            with transaction.atomic():
+                bulk_create_scenarios([rows for _, rows in pending])
+        except DatabaseError:
+            logger.exception("Failed to import %d scenarios.", len(pending))
+            return [
+                {
+                    "index": index,
+                    "errors": {
+                        "non_field_errors": ["The scenario could not be saved."]
+                    },
+                }
+                for index, _ in pending
+            ]
+
+        return [
+            {"index": index, "id": str(rows.scenario.id)} for index, rows in pending
+        ]
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+
+from gotale.models import Location
+
+
+class Command(BaseCommand):
+    help = "Computes the geohash of existing locations in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of locations updated per query (default: 1000)",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Recompute every location, not only the ones without a geohash",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        queryset = Location.objects.order_by("pk").only(
+            "pk", "latitude", "longitude", "geohash"
+        )
+        if not options["all"]:
+            queryset = queryset.filter(geohash="")
+
+        updated = 0
+        last_pk = None
+        while True:
+            # Keyset pagination, so every batch is an index range scan
+            batch_queryset = queryset
+            if last_pk is not None:
+                batch_queryset = batch_queryset.filter(pk__gt=last_pk)
+            batch = list(batch_queryset[:batch_size])
+            if not batch:
+                break
+
+            for location in batch:
+                location.update_geohash()
+            Location.objects.bulk_update(batch, ["geohash"])
+
+            updated += len(batch)
+            last_pk = batch[-1].pk
+            self.stdout.write(f"Updated {updated} locations")
+
+        self.stdout.write(self.style.SUCCESS(f"Backfilled {updated} locations"))
@@ -0,0 +1,117 @@
+import statistics
+import time
+
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from gotale.management.commands import loadtest_game_step
+
+# Changes to the database settings, applied on top of the configured ones
+SETUPS = {
+    "per-request": {"CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": False},
+    "persistent": {"CONN_MAX_AGE": 60, "CONN_HEALTH_CHECKS": False},
+    "persistent+checks": {"CONN_MAX_AGE": 60, "CONN_HEALTH_CHECKS": True},
+    "pooled": {"CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": False, "pool": True},
+}
+
+
+class Command(loadtest_game_step.Command):
+    help = (
+        "Benchmarks GET /api/games/{id}/step/ through the WSGI application "
+        "with connections opened per request, kept open (with and without "
+        "health checks) and pooled (PostgreSQL only), on the configured "
+        "database. Connects counts the connections Django set up, which are "
+        "checkouts when pooled. Creates its own games and deletes them afterwards."
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.set_defaults(concurrency=[8], threads=8, requests=2_000)
+        parser.add_argument(
+            "--setups",
+            nargs="+",
+            choices=SETUPS,
+            default=list(SETUPS),
+            help="Connection setups to compare (default: all)",
+        )
+
+    def handle(self, *args, **options):
+        application = get_wsgi_application()
+        database = connections.settings["default"]
+        original = {
+            "CONN_MAX_AGE": database["CONN_MAX_AGE"],
+            "CONN_HEALTH_CHECKS": database["CONN_HEALTH_CHECKS"],
+            "OPTIONS": database["OPTIONS"],
+        }
+        concurrency = max(options["concurrency"])
+
+        user, scenario, paths = self.create_games(concurrency)
+        try:
+            self.stdout.write(
+                f"{'setup':<18} {'req/s':>8} {'p50':>8} {'p99':>8} {'connects':>8}"
+            )
+            for name in options["setups"]:
+                setup = dict(SETUPS[name])
+                if setup.pop("pool", False):
+                    if database["ENGINE"] != "django.db.backends.postgresql":
+                        self.stdout.write(f"{name:<18} skipped, PostgreSQL only")
+                        continue
+                    setup["OPTIONS"] = {**original["OPTIONS"], "pool": True}
+                else:
+                    setup["OPTIONS"] = {
+                        key: value
+                        for key, value in original["OPTIONS"].items()
+                        if key != "pool"
+                    }
+
+                # Every thread's connection reads the same settings dict
+                database.update(setup)
+                try:
+                    self.benchmark(name, application, paths, options, concurrency)
+                finally:
+                    database.update(original)
+        finally:
+            scenario.delete()
+            user.delete()
+
+    def benchmark(self, name, application, paths, options, concurrency):
+        opened = []
+
+        def count(sender, connection, **kwargs):
+            opened.append(connection)
+
+        connection_created.connect(count)
+        try:
+            # Warm up caches, then count from fresh connections
+            self.run_wsgi(application, paths, 200, concurrency, options["threads"])
+            self.close_connections(opened)
+
+            start = time.perf_counter()
+            latencies = self.run_wsgi(
+                application, paths, options["requests"], concurrency, options["threads"]
+            )
+            elapsed = time.perf_counter() - start
+        finally:
+            connection_created.disconnect(count)
+
+        connects = len(opened)
+        self.close_connections(opened)
+        quantiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            f"{name:<18} {len(latencies) / elapsed:>8.0f} "
+            f"{quantiles[49] * 1e3:>6.1f}ms {quantiles[98] * 1e3:>6.1f}ms "
+            f"{connects:>8}"
+        )
+
+    def close_connections(self, opened) -> None:
+        """Closes connections left open by the finished worker threads."""
+        for connection in opened:
+            connection.inc_thread_sharing()
+            try:
+                connection.close()
+            finally:
+                connection.dec_thread_sharing()
+        opened.clear()
+        if connections["default"].vendor == "postgresql":
+            connections["default"].close_pool()
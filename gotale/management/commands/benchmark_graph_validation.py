@@ -0,0 +1,93 @@
+import random
+import time
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from gotale.serializers import ScenarioCreateSerializer
+from gotale.validation import validate_scenario_graph
+
+
+class Command(BaseCommand):
+    help = (
+        "Times scenario graph validation on generated scenarios of growing "
+        "size, to show it stays linear in the number of steps and choices"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[1_000, 10_000, 50_000, 100_000],
+            help="Numbers of steps to benchmark (default: 1000 10000 50000 100000)",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="Runs per size, the best one is reported (default: 3)",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        self.stdout.write(
+            f"{'steps':>8} {'choices':>8} {'graph':>10} {'ns/item':>8} "
+            f"{'serializer':>11} {'ns/item':>8}"
+        )
+        for size in options["sizes"]:
+            steps = self.generate_steps(rng, size)
+            successors = {
+                step["id"]: [choice["next"] for choice in step["choices"]]
+                for step in steps
+            }
+            items = size + sum(len(next_ids) for next_ids in successors.values())
+
+            graph_time = self.best_time(
+                options["repeat"], lambda: validate_scenario_graph(successors, 0)
+            )
+            serializer_time = self.best_time(
+                options["repeat"],
+                lambda: ScenarioCreateSerializer().validate_steps(steps),
+            )
+
+            self.stdout.write(
+                f"{size:>8} {items - size:>8} {graph_time * 1e3:>8.1f}ms "
+                f"{graph_time * 1e9 / items:>8.0f} {serializer_time * 1e3:>9.1f}ms "
+                f"{serializer_time * 1e9 / items:>8.0f}"
+            )
+
+    def generate_steps(self, rng: random.Random, size: int) -> list[dict]:
+        """
+        A valid scenario: step 0 is the root, every other step is the target
+        of its predecessor's first choice, extra choices jump forward, and the
+        last steps are endings. Some backward jumps add cycles with exits.
+        """
+        steps = []
+        for step_id in range(size):
+            next_ids = []
+            if step_id + 1 < size:
+                next_ids.append(step_id + 1)
+                for _ in range(rng.randint(0, 3)):
+                    if step_id and rng.random() < 0.1:
+                        next_ids.append(rng.randint(1, step_id))
+                    else:
+                        next_ids.append(rng.randrange(step_id + 1, size))
+            steps.append(
+                {
+                    "id": step_id,
+                    "title": f"step {step_id}",
+                    "choices": [
+                        {"text": f"Go to {next_id}", "next": next_id}
+                        for next_id in next_ids
+                    ],
+                }
+            )
+        return steps
+
+    def best_time(self, repeat: int, function) -> float:
+        # Like timeit, keep the garbage collector out of the measurements
+        return min(
+            timeit.Timer(function, timer=time.perf_counter).repeat(repeat, number=1)
+        )
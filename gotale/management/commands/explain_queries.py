@@ -0,0 +1,150 @@
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Model
+
+from core.models import User
+from gotale.models import Choice, Game, History, Location, Scenario, Step
+from gotale.views import GameViewsets, LocationViewset, ScenarioViewset, UserViewset
+
+
+class RollbackPlans(Exception):
+    """Raised to roll back the temporarily dropped indexes."""
+
+
+class Command(BaseCommand):
+    help = (
+        "Reports query plans (EXPLAIN) of the queries issued by the viewset "
+        "actions, optionally compared with plans without the tuned indexes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--compare",
+            action="store_true",
+            help="Also show plans with the models' Meta.indexes dropped "
+            "(inside a transaction that is rolled back)",
+        )
+
+    def handle(self, *args, **options):
+        queries = self.get_queries()
+
+        if options["compare"]:
+            self.stdout.write(self.style.MIGRATE_HEADING("Without tuned indexes"))
+            try:
+                with transaction.atomic():
+                    self.drop_tuned_indexes()
+                    self.write_plans(queries)
+                    raise RollbackPlans
+            except RollbackPlans:
+                pass
+
+            self.stdout.write(self.style.MIGRATE_HEADING("With tuned indexes"))
+
+        self.write_plans(queries)
+
+    def write_plans(self, queries):
+        for name, queryset in queries.items():
+            self.stdout.write(self.style.SUCCESS(name))
+            self.stdout.write(queryset.explain())
+            self.stdout.write("")
+
+    def drop_tuned_indexes(self):
+        quote_name = connection.ops.quote_name
+        sql_delete_index = connection.SchemaEditorClass.sql_delete_index
+        with connection.cursor() as cursor:
+            for model in (Choice, Game, History, Location, Scenario, Step, User):
+                for index in model._meta.indexes:
+                    cursor.execute(
+                        sql_delete_index
+                        % {
+                            "name": quote_name(index.name),
+                            "table": quote_name(model._meta.db_table),
+                        }
+                    )
+
+    def get_queries(self):
+        """Querysets as issued by each viewset action, keyed by action."""
+        game_id = self.sample_pk(Game)
+        scenario_id = self.sample_pk(Scenario)
+        location_id = self.sample_pk(Location)
+        user_id = Game.objects.values_list("user", flat=True).first() or uuid.uuid4()
+        step_id = self.sample_pk(Step)
+
+        return {
+            **self.compiled_queries("games.list", GameViewsets, "list"),
+            **self.compiled_queries(
+                "games.retrieve", GameViewsets, "retrieve", pk=game_id
+            ),
+            "games.current_step": self.viewset_queryset(
+                GameViewsets, "current_step"
+            ).filter(pk=game_id),
+            "games.active_for_user": Game.objects.filter(
+                user=user_id, end__isnull=True
+            ),
+            "games.for_user_scenario": Game.objects.filter(
+                user=user_id, scenario=scenario_id
+            ),
+            "history.for_game": History.objects.filter(game=game_id)[:20],
+            **self.compiled_queries("scenarios.list", ScenarioViewset, "list"),
+            **self.compiled_queries(
+                "scenarios.retrieve", ScenarioViewset, "retrieve", pk=scenario_id
+            ),
+            "scenarios.graph_steps": Step.objects.filter(scenario=scenario_id),
+            "scenarios.graph_choices": Choice.objects.filter(
+                step__scenario=scenario_id
+            ),
+            "steps.choices": Choice.objects.filter(step=step_id),
+            **self.compiled_queries("locations.list", LocationViewset, "list"),
+            **self.compiled_queries(
+                "locations.retrieve", LocationViewset, "retrieve", pk=location_id
+            ),
+            **self.compiled_queries("users.list", UserViewset, "list"),
+        }
+
+    def viewset_queryset(self, viewset_class, action):
+        return viewset_class(action=action, kwargs={}).get_queryset()
+
+    def compiled_queries(self, name, viewset_class, action, **filters):
+        """
+        Queries of list and retrieve as served by CompiledReadMixin: the rows
+        of a first page (or of the object), then one per many-relation.
+        """
+        viewset = viewset_class(action=action, kwargs={}, request=None)
+        compiled = viewset.get_compiled_serializer()
+        queryset = self.viewset_queryset(viewset_class, action).filter(**filters)
+        if action == "list":
+            # As CursorPagination orders and slices the first page
+            paginator = viewset.paginator
+            ordering = paginator.get_ordering(None, queryset, viewset)
+            queryset = compiled.values(
+                queryset, *(field.lstrip("-") for field in ordering)
+            ).order_by(*ordering)[: paginator.page_size + 1]
+        else:
+            queryset = compiled.values(queryset)
+
+        return {name: queryset} | self.many_relation_queries(
+            name, compiled, list(queryset)
+        )
+
+    def many_relation_queries(self, name, compiled, rows):
+        queries = {}
+        for field_name, kind, lookup, extra in compiled.fields:
+            if kind == compiled.NESTED:
+                queries |= self.many_relation_queries(
+                    f"{name}.{field_name}", extra, rows
+                )
+            elif kind == compiled.MANY:
+                pks = {row[lookup] for row in rows if row[lookup] is not None}
+                queryset = extra.queryset(pks or [uuid.uuid4()])
+                queries[f"{name}.{field_name}"] = queryset
+                if extra.child is not None:
+                    queries |= self.many_relation_queries(
+                        f"{name}.{field_name}", extra.child, list(queryset)
+                    )
+        return queries
+
+    def sample_pk(self, model: type[Model]):
+        # Plans don't depend on the value, but real ids make them realistic
+        return model.objects.values_list("pk", flat=True).first() or uuid.uuid4()
@@ -0,0 +1,226 @@
+import asyncio
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from wsgiref.util import setup_testing_defaults
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+
+from gotale.models import Game
+from gotale.serializers import ScenarioCreateSerializer
+
+User = get_user_model()
+
+HOST = "localhost"
+
+
+class Command(BaseCommand):
+    help = (
+        "Load tests GET /api/games/{id}/step/ in process, through the WSGI "
+        "application with a pool of worker threads and through the ASGI "
+        "application on a single event loop, with the same number of "
+        "concurrent players. Creates its own games and deletes them afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=5_000,
+            help="Requests per application (default: 5000)",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            nargs="+",
+            default=[10, 100, 1_000],
+            help="Concurrent players to simulate (default: 10 100 1000)",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=8,
+            help="Worker threads of the WSGI server (default: 8)",
+        )
+
+    def handle(self, *args, **options):
+        # Imported here, it sets the default settings module on import
+        from backend.asgi import application as asgi_application
+
+        wsgi_application = get_wsgi_application()
+        user, scenario, paths = self.create_games(max(options["concurrency"]))
+        try:
+            self.stdout.write(
+                f"{'app':<5} {'players':>7} {'req/s':>8} {'p50':>8} {'p99':>8} "
+                f"{'threads':>7}"
+            )
+            for concurrency in options["concurrency"]:
+                runs = (
+                    (
+                        "wsgi",
+                        lambda count: self.run_wsgi(
+                            wsgi_application,
+                            paths,
+                            count,
+                            concurrency,
+                            options["threads"],
+                        ),
+                    ),
+                    (
+                        "asgi",
+                        lambda count: asyncio.run(
+                            self.run_asgi(asgi_application, paths, count, concurrency)
+                        ),
+                    ),
+                )
+                for name, run in runs:
+                    run(min(options["requests"], 200))  # Warm up caches
+                    with ThreadCounter() as threads:
+                        start = time.perf_counter()
+                        latencies = run(options["requests"])
+                        elapsed = time.perf_counter() - start
+                    self.report(name, concurrency, latencies, elapsed, threads.peak)
+        finally:
+            scenario.delete()
+            user.delete()
+
+    def create_games(self, count: int):
+        user = User.objects.create_user(username=f"loadtest-{uuid.uuid4().hex[:12]}")
+        serializer = ScenarioCreateSerializer(
+            data={
+                "title": "Load test",
+                "description": "",
+                "steps": [
+                    {
+                        "id": 1,
+                        "title": "Start",
+                        "choices": [{"text": "End", "next": 2}],
+                    },
+                    {"id": 2, "title": "End", "choices": []},
+                ],
+            }
+        )
+        serializer.is_valid(raise_exception=True)
+        scenario = serializer.save(created_by=user)
+        games = Game.objects.bulk_create(
+            Game(
+                id=uuid.uuid4(),
+                user=user,
+                scenario=scenario,
+                current_step_id=scenario.root_step_id,
+            )
+            for _ in range(count)
+        )
+        return user, scenario, [f"/api/games/{game.pk}/step/" for game in games]
+
+    def run_wsgi(self, application, paths, count, concurrency, threads):
+        """Players send requests back to back, queued for the worker threads."""
+
+        def request(path, sent):
+            environ = {"PATH_INFO": path, "REQUEST_METHOD": "GET", "HTTP_HOST": HOST}
+            setup_testing_defaults(environ)
+            statuses = []
+            body = b"".join(
+                application(environ, lambda status, headers: statuses.append(status))
+            )
+            assert statuses[0].startswith("200"), (statuses, body)
+            return time.perf_counter() - sent
+
+        latencies = []
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            pending = set()
+            for index in range(count):
+                if len(pending) >= concurrency:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    latencies.extend(future.result() for future in done)
+                pending.add(
+                    pool.submit(request, paths[index % len(paths)], time.perf_counter())
+                )
+            latencies.extend(future.result() for future in pending)
+        return latencies
+
+    async def run_asgi(self, application, paths, count, concurrency):
+        """Players send requests back to back, all served by one event loop."""
+        latencies = []
+
+        async def player(index):
+            for request_index in range(index, count, concurrency):
+                sent = time.perf_counter()
+                status = await self.asgi_get(
+                    application, paths[request_index % len(paths)]
+                )
+                assert status == 200, status
+                latencies.append(time.perf_counter() - sent)
+
+        await asyncio.gather(*(player(index) for index in range(concurrency)))
+        return latencies
+
+    async def asgi_get(self, application, path: str) -> int:
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"host", HOST.encode())],
+            "client": ("127.0.0.1", 0),
+            "server": (HOST, 80),
+        }
+        received = asyncio.Event()
+        disconnected = asyncio.Event()
+        status = None
+
+        async def receive():
+            if not received.is_set():
+                received.set()
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        await application(scope, receive, send)
+        disconnected.set()
+        return status
+
+    def report(self, name, concurrency, latencies, elapsed, threads):
+        quantiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            f"{name:<5} {concurrency:>7} {len(latencies) / elapsed:>8.0f} "
+            f"{quantiles[49] * 1e3:>6.1f}ms {quantiles[98] * 1e3:>6.1f}ms "
+            f"{threads:>7}"
+        )
+
+
+class ThreadCounter:
+    """Samples the number of live threads while in use, keeping the peak."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            # Not counting the sampling thread itself
+            self.peak = max(self.peak, threading.active_count() - 1)
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.6 on 2026-10-18 01:10
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+
+
+def backfill_choices_count(apps, schema_editor):
+    Step = apps.get_model("gotale", "Step")
+    Choice = apps.get_model("gotale", "Choice")
+
+    counts = (
+        Choice.objects.filter(step=OuterRef("pk"))
+        .order_by()
+        .values("step")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    Step.objects.filter(choices__isnull=False).update(choices_count=Subquery(counts))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("gotale", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="step",
+            name="choices_count",
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_choices_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.6 on 2026-10-18 01:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("gotale", "0002_step_choices_count"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="game",
+            index=models.Index(fields=["user", "end"], name="game_user_end_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="game",
+            index=models.Index(
+                fields=["user", "scenario"], name="game_user_scenario_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="history",
+            index=models.Index(
+                fields=["game", "-created_at"], name="history_game_created_idx"
+            ),
+        ),
+    ]
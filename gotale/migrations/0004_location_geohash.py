@@ -0,0 +1,39 @@
+# Generated by Django 5.1.6 on 2026-10-18 01:18
+
+from django.db import migrations, models
+
+from gotale.geo import geohash_encode
+
+
+def backfill_geohash(apps, schema_editor, batch_size=1000):
+    Location = apps.get_model("gotale", "Location")
+
+    batch = []
+    for location in Location.objects.only("pk", "latitude", "longitude").iterator(
+        chunk_size=batch_size
+    ):
+        location.geohash = geohash_encode(
+            float(location.latitude), float(location.longitude)
+        )
+        batch.append(location)
+        if len(batch) == batch_size:
+            Location.objects.bulk_update(batch, ["geohash"])
+            batch = []
+    Location.objects.bulk_update(batch, ["geohash"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("gotale", "0003_game_history_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="location",
+            name="geohash",
+            field=models.CharField(
+                db_index=True, default="", editable=False, max_length=12
+            ),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
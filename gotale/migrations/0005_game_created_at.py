@@ -0,0 +1,24 @@
+# Generated by Django 5.1.6 on 2026-10-18 01:20
+
+import django.utils.timezone
+import django_extensions.db.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("gotale", "0004_location_geohash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="game",
+            name="created_at",
+            field=django_extensions.db.fields.CreationDateTimeField(
+                auto_now_add=True,
+                default=django.utils.timezone.now,
+                verbose_name="created",
+            ),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.6 on 2026-10-18 02:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("gotale", "0005_game_created_at"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="game",
+            index=models.Index(fields=["created_at", "id"], name="game_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="location",
+            index=models.Index(
+                fields=["created_at", "id"], name="location_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="scenario",
+            index=models.Index(
+                fields=["created_at", "id"], name="scenario_created_idx"
+            ),
+        ),
+    ]
@@ -1,15 +1,107 @@
-from datetime import datetime
+from collections.abc import Iterator
 from decimal import Decimal
+from functools import partial
+from uuid import UUID
 
+from asgiref.sync import sync_to_async
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from django_extensions.db.fields import CreationDateTimeField
 from django_extensions.db.models import (
     TitleDescriptionModel,
 )
 
 from core.models import BaseModel, BaseTrackedModel, User
 from gotale.choices import GameStatus
+from gotale.events import game_events
+from gotale.geo import (
+    GEOHASH_PRECISION,
+    bounding_box,
+    closest_within,
+    geohash_cells,
+    geohash_encode,
+    geohash_prefixes_q,
+    longitude_ranges_q,
+)
+
+
+class LocationQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for location in objs:
+            location.update_geohash()
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def around(
+        self, latitude: float, longitude: float, radius: float
+    ) -> "LocationQuerySet":
+        """
+        Candidates for the locations within `radius` meters: those in the
+        geohash cells covering the circle (or its bounding box when the circle
+        is too large for them). May be used as a subquery of other models.
+        """
+        min_latitude, max_latitude, longitude_ranges = bounding_box(
+            latitude, longitude, radius
+        )
+        queryset = self.filter(
+            longitude_ranges_q(longitude_ranges),
+            latitude__range=(min_latitude, max_latitude),
+        )
+        cells = geohash_cells(latitude, longitude, radius)
+        if cells is not None:
+            queryset = queryset.filter(geohash_prefixes_q(cells))
+        return queryset
+
+    def closest(
+        self, latitude: float, longitude: float, radius: float
+    ) -> list[tuple[float, UUID]]:
+        """
+        Returns (distance, pk) of every location within `radius` meters,
+        closest first. Exact distances are computed for the candidates found
+        by around() only.
+        """
+        return closest_within(
+            latitude,
+            longitude,
+            radius,
+            self.around(latitude, longitude, radius).values_list(
+                "pk", "latitude", "longitude"
+            ),
+        )
+
+    def nearby(
+        self, latitude: float, longitude: float, radius: float, limit: int
+    ) -> list["Location"]:
+        """
+        Returns up to `limit` locations within `radius` meters, closest first,
+        each annotated with its `distance` in meters.
+        """
+        closest = self.closest(latitude, longitude, radius)[:limit]
+
+        locations = self.in_bulk([pk for _, pk in closest])
+        result = []
+        for distance, pk in closest:
+            location = locations[pk]
+            location.distance = distance
+            result.append(location)
+
+        return result
+
+    def as_data(self, chunk_size: int | None = None) -> Iterator[dict]:
+        """
+        Yields the id, title, description and coordinates of the locations,
+        as exported and bundled, without instantiating models.
+        """
+        rows = self.values("id", "title", "description", "latitude", "longitude")
+        for row in rows.iterator(chunk_size=chunk_size):
+            # Decimals as strings, the way LocationSerializer renders them
+            yield row | {
+                "latitude": str(row["latitude"]),
+                "longitude": str(row["longitude"]),
+            }
 
 
 class Location(TitleDescriptionModel, BaseTrackedModel):
@@ -30,11 +122,34 @@ class Location(TitleDescriptionModel, BaseTrackedModel):
         ],
     )
 
+    # Kept in sync on save and bulk_create, existing rows were backfilled by
+    # the migration adding it (the backfill_geohash command recomputes them)
+    geohash = models.CharField(
+        max_length=GEOHASH_PRECISION, default="", editable=False, db_index=True
+    )
+
+    objects = LocationQuerySet.as_manager()
+
+    def update_geohash(self):
+        self.geohash = geohash_encode(float(self.latitude), float(self.longitude))
+
+    def save(self, *args, **kwargs):
+        self.update_geohash()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"latitude", "longitude"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "geohash"}
+        return super().save(*args, **kwargs)
+
     def __str__(self):
         return self.title
 
     class Meta:
+        # Also serves as the index for bounding box lookups
         unique_together = [("latitude", "longitude")]
+        indexes = [
+            # Cursor pagination order (see core.pagination)
+            models.Index(fields=["created_at", "id"], name="location_created_idx"),
+        ]
 
 
 class Scenario(TitleDescriptionModel, BaseTrackedModel):
@@ -60,6 +175,12 @@ class Scenario(TitleDescriptionModel, BaseTrackedModel):
     def __str__(self):
         return self.title
 
+    class Meta:
+        indexes = [
+            # Cursor pagination order (see core.pagination)
+            models.Index(fields=["created_at", "id"], name="scenario_created_idx"),
+        ]
+
 
 class Step(TitleDescriptionModel, BaseModel):
     scenario = models.ForeignKey(
@@ -73,14 +194,20 @@ class Step(TitleDescriptionModel, BaseModel):
         blank=True,
         help_text="Location where this decision is made",
     )
+    # Denormalized number of choices, kept in sync by gotale.signals and bulk creation
+    choices_count = models.PositiveSmallIntegerField(default=0, editable=False)
 
     def clean(self):
         """Enforces maximum 4 choices per step"""
         if self.choices.count() > 4:
             raise ValidationError("A step cannot have more than 4 choices.")
 
+    @property
+    def is_terminal(self) -> bool:
+        return self.choices_count == 0
+
     def is_last_step(self) -> bool:
-        return self.choices.count() == 0
+        return self.is_terminal
 
     def __str__(self):
         return f"{self.scenario.title} - {self.title}"
@@ -121,30 +248,118 @@ class Game(BaseModel):
     current_step = models.ForeignKey(
         Step, on_delete=models.SET_NULL, null=True, related_name="active_games"
     )
+    created_at = CreationDateTimeField(_("created"))
     end = models.DateTimeField(null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "end"], name="game_user_end_idx"),
+            models.Index(fields=["user", "scenario"], name="game_user_scenario_idx"),
+            # Cursor pagination order (see core.pagination)
+            models.Index(fields=["created_at", "id"], name="game_created_idx"),
+        ]
+
     @property
     def status(self) -> GameStatus:
-        if self.current_step.choices.count() == 0:
+        if self.current_step.is_terminal:
             return GameStatus.ENDED
         return GameStatus.RUNNING
 
     def __str__(self):
         return f"{self.scenario.title} played by {self.user.username}"
 
-    def make_decision(self, choice):
-        if self.status == GameStatus.ENDED:
-            raise ValidationError("Game is not active.")
-
-        if choice.step != self.current_step:
-            raise ValidationError("Invalid choice for current step.")
-
-        # TODO: record decision using History custom manager
-
-        self.current_step = choice.next
-        if self.current_step.is_last_step():
-            self.end = datetime.now()
-        self.save()
+    def make_decision(self, choice, durable: bool = False) -> bool:
+        """
+        Moves the game along `choice`, which may be a Choice or a CompiledChoice.
+
+        Steps are looked up in the compiled scenario graph and the game row is
+        moved with a single conditional UPDATE, guarded by the step the choice
+        belongs to. Returns False when a concurrent decision already moved the
+        game away from that step.
+
+        The decision is recorded in History through the write-behind buffer,
+        `durable=True` writes it before returning.
+        """
+        return self.make_decisions([choice], durable=durable)
+
+    def make_decisions(self, choices, durable: bool = False) -> bool:
+        """
+        Moves the game along consecutive `choices`, as make_decision would one
+        by one, but checks them all before moving the game with a single
+        UPDATE, so either all of them or none are applied. ValidationErrors
+        carry the position of the offending choice as the "index" param.
+        """
+        from gotale.graph import scenario_graphs
+        from gotale.history import history_buffer
+
+        graph = scenario_graphs.get(self.scenario_id, self.current_step_id)
+        changes = self._decision_changes(graph, choices)
+        updated = Game.objects.filter(
+            pk=self.pk, current_step_id=self.current_step_id
+        ).update(**changes)
+        if not updated:
+            return False
+
+        history_buffer.record_many(self._apply_decisions(choices, changes), durable)
+        transaction.on_commit(partial(game_events.publish, self.pk))
+        return True
+
+    async def amake_decision(self, choice, durable: bool = False) -> bool:
+        """Async make_decision(), for ASGI views."""
+        return await self.amake_decisions([choice], durable=durable)
+
+    async def amake_decisions(self, choices, durable: bool = False) -> bool:
+        """Async make_decisions(), for ASGI views."""
+        from gotale.graph import scenario_graphs
+        from gotale.history import history_buffer
+
+        graph = await scenario_graphs.aget(self.scenario_id, self.current_step_id)
+        changes = self._decision_changes(graph, choices)
+        updated = await Game.objects.filter(
+            pk=self.pk, current_step_id=self.current_step_id
+        ).aupdate(**changes)
+        if not updated:
+            return False
+
+        # Recording may flush the buffer, which is a blocking write
+        await sync_to_async(history_buffer.record_many)(
+            self._apply_decisions(choices, changes), durable
+        )
+        # Async views run in autocommit mode, the update is already committed
+        await game_events.apublish(self.pk)
+        return True
+
+    def _decision_changes(self, graph, choices) -> dict:
+        """Field changes moving the game along `choices`, once checked."""
+        step_id = self.current_step_id
+        for index, choice in enumerate(choices):
+            if graph.steps[step_id].is_terminal:
+                raise ValidationError("Game is not active.", params={"index": index})
+            if choice.step_id != step_id:
+                raise ValidationError(
+                    "Invalid choice for current step.", params={"index": index}
+                )
+            step_id = choice.next_id
+
+        changes = {"current_step_id": step_id}
+        if graph.steps[step_id].is_terminal:
+            changes["end"] = timezone.now()
+        return changes
+
+    def _apply_decisions(self, choices, changes: dict) -> list["History"]:
+        """Sets the saved `changes`, returns the History of `choices`."""
+        for attname, value in changes.items():
+            setattr(self, attname, value)
+
+        return [
+            History(
+                game_id=self.pk,
+                choice_id=choice.id,
+                step_id=choice.step_id,
+                created_by_id=self.user_id,
+            )
+            for choice in choices
+        ]
 
 
 class History(BaseTrackedModel):
@@ -163,3 +378,8 @@ class History(BaseTrackedModel):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["game", "-created_at"], name="history_game_created_idx"
+            ),
+        ]
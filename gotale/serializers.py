@@ -1,19 +1,60 @@
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
 from datetime import datetime
+from functools import partial
 
 from django.contrib.auth import get_user_model
 from django.db import transaction
 from rest_framework import serializers
+from rest_framework.exceptions import ErrorDetail
 
 from core.serializers import (
     BaseModelSerializer,
     BaseTrackedModelReadSerializer,
     UserSerializer,
 )
+from gotale.geo import MAX_DISTANCE
+from gotale.graph import scenario_graphs
 from gotale.models import Choice, Game, Location, Scenario, Step
+from gotale.signals import scenario_signals_suppressed
+from gotale.validation import validate_scenario_graph
 
 User = get_user_model()
 
 
+@dataclass
+class ScenarioRows:
+    scenario: Scenario
+    steps: list[Step] = field(default_factory=list)
+    choices: list[Choice] = field(default_factory=list)
+
+
+def bulk_create_scenarios(rows: list[ScenarioRows]) -> None:
+    """
+    Inserts the scenarios with a single statement per table, which relies on
+    foreign keys being checked at commit (deferred), as they are on SQLite
+    and PostgreSQL. Bulk inserts send no signals.
+    """
+    Scenario.objects.bulk_create(scenario_rows.scenario for scenario_rows in rows)
+    Step.objects.bulk_create(
+        step for scenario_rows in rows for step in scenario_rows.steps
+    )
+    Choice.objects.bulk_create(
+        choice for scenario_rows in rows for choice in scenario_rows.choices
+    )
+
+
+def _assign_changed(instance, values: dict) -> bool:
+    """Sets the differing `values` on `instance`, returns whether there were any."""
+    changed = False
+    for name, value in values.items():
+        if getattr(instance, name) != value:
+            setattr(instance, name, value)
+            changed = True
+    return changed
+
+
 class LocationSerializer(BaseTrackedModelReadSerializer):
     class Meta(BaseTrackedModelReadSerializer.Meta):
         model = Location
@@ -25,6 +66,23 @@ class LocationSerializer(BaseTrackedModelReadSerializer):
         )
 
 
+class NearbyLocationSerializer(LocationSerializer):
+    distance = serializers.FloatField(read_only=True)
+
+    class Meta(LocationSerializer.Meta):
+        fields = LocationSerializer.Meta.fields + ("distance",)
+
+
+class NearbyQuerySerializer(serializers.Serializer):
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    lon = serializers.FloatField(min_value=-180, max_value=180)
+    radius = serializers.FloatField(min_value=0, max_value=MAX_DISTANCE, default=1000)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+    class Meta:
+        fields = ("lat", "lon", "radius", "limit")
+
+
 class LocationWriteSerializer(serializers.ModelSerializer):
     class Meta(LocationSerializer.Meta):
         model = Location
@@ -51,18 +109,23 @@ class LocationUpdateSerializer(LocationWriteSerializer):
         fields = LocationWriteSerializer.Meta.fields + ("modified_by", "modified_at")
 
 
-class ChoiceSerializer(serializers.ModelSerializer):
-    class Meta:
+class ChoiceSerializer(BaseModelSerializer):
+    class Meta(BaseModelSerializer.Meta):
         model = Choice
-        fields = ["id", "text"]
+        fields = BaseModelSerializer.Meta.fields + ("text",)
 
 
-class StepSerializer(serializers.ModelSerializer):
+class StepSerializer(BaseModelSerializer):
     choices = ChoiceSerializer(many=True, read_only=True)
 
-    class Meta:
+    class Meta(BaseModelSerializer.Meta):
         model = Step
-        fields = ["id", "title", "description", "location", "choices"]
+        fields = BaseModelSerializer.Meta.fields + (
+            "title",
+            "description",
+            "location",
+            "choices",
+        )
 
 
 class ScenarioSerializer(BaseTrackedModelReadSerializer):
@@ -78,8 +141,38 @@ class ScenarioSerializer(BaseTrackedModelReadSerializer):
         )
 
 
+class NearbyScenarioSerializer(ScenarioSerializer):
+    distance = serializers.FloatField(read_only=True)
+
+    class Meta(ScenarioSerializer.Meta):
+        fields = ScenarioSerializer.Meta.fields + ("distance",)
+
+
+class StepKeyField(serializers.Field):
+    """
+    Identifies a step within an uploaded scenario: any integer, or the UUID of
+    a stored step, which updates keep instead of recreating.
+    """
+
+    default_error_messages = {"invalid": "A valid integer or UUID is required."}
+
+    def to_internal_value(self, data):
+        if isinstance(data, int) and not isinstance(data, bool):
+            return data
+        if isinstance(data, str):
+            for parse in (int, uuid.UUID):
+                try:
+                    return parse(data)
+                except ValueError:
+                    pass
+        self.fail("invalid")
+
+    def to_representation(self, value):
+        return str(value) if isinstance(value, uuid.UUID) else value
+
+
 class ChoiceCreateSerializer(serializers.ModelSerializer):
-    next = serializers.IntegerField(required=True)
+    next = StepKeyField(required=True)
 
     class Meta:
         model = Choice
@@ -88,7 +181,7 @@ class ChoiceCreateSerializer(serializers.ModelSerializer):
 
 class StepCreateSerializer(serializers.ModelSerializer):
     choices = ChoiceCreateSerializer(many=True)
-    id = serializers.IntegerField(required=True)
+    id = StepKeyField(required=True)
 
     class Meta:
         model = Step
@@ -118,6 +211,24 @@ class ScenarioCreateSerializer(BaseModelSerializer):
         if errors:
             raise serializers.ValidationError(errors)
 
+        if self.instance is not None:
+            stored_ids = set(self.instance.steps.values_list("id", flat=True))
+            errors.extend(
+                f"Step {step_id} does not belong to this scenario."
+                for step_id in step_choices
+                if isinstance(step_id, uuid.UUID) and step_id not in stored_ids
+            )
+            # Deleting them would leave the games without a current step
+            played_ids = (
+                Game.objects.filter(current_step__in=stored_ids - step_choices.keys())
+                .values_list("current_step_id", flat=True)
+                .distinct()
+            )
+            errors.extend(
+                f"Step {step_id} cannot be removed, games are on it."
+                for step_id in sorted(played_ids, key=str)
+            )
+
         referenced_ids = set()
         for step_id, choices in step_choices.items():
             if len(choices) > 4:
@@ -146,40 +257,155 @@ class ScenarioCreateSerializer(BaseModelSerializer):
         if errors:
             raise serializers.ValidationError(errors)
 
+        (root_id,) = root_ids
+        graph_errors = validate_scenario_graph(
+            {
+                step_id: [choice["next"] for choice in choices]
+                for step_id, choices in step_choices.items()
+            },
+            root_id,
+        )
+        if graph_errors:
+            raise serializers.ValidationError(
+                [ErrorDetail(error.message, code=error.code) for error in graph_errors]
+            )
+
+        # Front-end id of the root step, for create() not to look for it again
+        self.root_id = root_id
         return value
 
     @transaction.atomic
     def create(self, validated_data):
-        steps_data = validated_data.pop("steps")
-        scenario = Scenario.objects.create(**validated_data)
-
-        front_id_to_step = {}  # Map front-end IDs to back-end IDs
-        steps_to_create = []
-        choices_to_create = []
-        for i, step_data in enumerate(steps_data):
-            step_id = step_data.pop("id")  # Prevent frontend from sending id
-            choices_data = step_data.pop("choices")
-
-            step = Step(scenario=scenario, **step_data)
-
-            steps_to_create.append((step, choices_data))
-            front_id_to_step[step_id] = step
-
-        created_steps = Step.objects.bulk_create([s[0] for s in steps_to_create])
+        rows = self.build_rows(validated_data)
+        bulk_create_scenarios([rows])
+        return rows.scenario
+
+    def build_rows(self, validated_data, **kwargs) -> "ScenarioRows":
+        """
+        Unsaved rows of the validated scenario, with primary keys generated up
+        front so the scenario can be inserted with its root step already set.
+        Extra `kwargs` are set on the scenario (e.g. created_by).
+        """
+        steps_data = validated_data["steps"]
+        step_ids = {step_data["id"]: uuid.uuid4() for step_data in steps_data}
+        scenario_data = {
+            name: value for name, value in validated_data.items() if name != "steps"
+        }
+
+        rows = ScenarioRows(
+            Scenario(
+                id=uuid.uuid4(),
+                root_step_id=step_ids[self.root_id],
+                **scenario_data,
+                **kwargs,
+            )
+        )
+        for step_data in steps_data:
+            step_id = step_ids[step_data["id"]]
+            rows.steps.append(
+                Step(
+                    id=step_id,
+                    scenario_id=rows.scenario.id,
+                    title=step_data["title"],
+                    description=step_data.get("description"),
+                    location=step_data.get("location"),
+                    choices_count=len(step_data["choices"]),
+                )
+            )
+            rows.choices.extend(
+                Choice(
+                    id=uuid.uuid4(),
+                    step_id=step_id,
+                    next_id=step_ids[choice_data["next"]],
+                    text=choice_data["text"],
+                )
+                for choice_data in step_data["choices"]
+            )
 
-        if created_steps:
-            scenario.root_step = created_steps[0]
-            scenario.save(update_fields=["root_step"])  # Only save 'root_step'
+        return rows
 
-        for step, choices_data in zip(created_steps, [s[1] for s in steps_to_create]):
-            for choice_data in choices_data:
-                next_id = choice_data.pop("next")
-                choice_data["next"] = front_id_to_step.get(next_id)
-                choices_to_create.append(Choice(step=step, **choice_data))
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        """
+        Replaces the scenario's graph with `steps`, if given, writing only
+        what differs from the stored one. Steps sent with the UUID of a stored
+        step are kept, stored steps not sent are deleted. Choices keep their id
+        only for the same text and next step, others are replaced, so an id
+        held by a client (or History) never leads somewhere else.
+        """
+        steps_data = validated_data.pop("steps", None)
+        for name, value in validated_data.items():
+            setattr(instance, name, value)
+        if steps_data is None:
+            instance.save()
+            return instance
+
+        stored_steps = {step.id: step for step in instance.steps.all()}
+        stored_choices = defaultdict(list)
+        for choice in Choice.objects.filter(step__scenario=instance):
+            stored_choices[choice.step_id].append(choice)
+
+        step_ids = {
+            step_data["id"]: (
+                step_data["id"] if step_data["id"] in stored_steps else uuid.uuid4()
+            )
+            for step_data in steps_data
+        }
+        new_steps, changed_steps = [], []
+        new_choices, stale_choices = [], []
+        for step_data in steps_data:
+            step_id = step_ids[step_data["id"]]
+            location = step_data.get("location")
+            values = {
+                "title": step_data["title"],
+                "description": step_data.get("description"),
+                "location_id": location.pk if location else None,
+                "choices_count": len(step_data["choices"]),
+            }
+            wanted = [
+                (choice_data["text"], step_ids[choice_data["next"]])
+                for choice_data in step_data["choices"]
+            ]
+
+            step = stored_steps.pop(step_id, None)
+            if step is None:
+                new_steps.append(Step(id=step_id, scenario=instance, **values))
+            else:
+                for choice in stored_choices.pop(step_id, []):
+                    if (choice.text, choice.next_id) in wanted:
+                        wanted.remove((choice.text, choice.next_id))
+                    else:
+                        stale_choices.append(choice)
+                if _assign_changed(step, values):
+                    changed_steps.append(step)
+
+            new_choices.extend(
+                Choice(id=uuid.uuid4(), step_id=step_id, text=text, next_id=next_id)
+                for text, next_id in wanted
+            )
 
-        Choice.objects.bulk_create(choices_to_create)
+        Step.objects.bulk_create(new_steps)
+        instance.root_step_id = step_ids[self.root_id]
+        # Also bumps modified_at, which the bulk writes below don't
+        instance.save()
+
+        # choices_count is written below and the graph invalidated once, the
+        # per-row delete handlers would only repeat that
+        with scenario_signals_suppressed():
+            Choice.objects.filter(
+                pk__in=[choice.pk for choice in stale_choices]
+            ).delete()
+            Choice.objects.bulk_create(new_choices)
+            # Only once no kept choice leads to them, as that would cascade
+            Step.objects.filter(pk__in=stored_steps).delete()
+        Step.objects.bulk_update(
+            changed_steps, ["title", "description", "location", "choices_count"]
+        )
 
-        return scenario
+        # Bulk writes send no signals, and a graph compiled by another request
+        # before the commit would be stale
+        transaction.on_commit(partial(scenario_graphs.invalidate, instance.pk))
+        return instance
 
     def get_step_mapping(self, steps):
         # Oneliner unsafe (allows repeating id)
@@ -231,3 +457,14 @@ class MakeGameDecisionSerializer(serializers.Serializer):
 
     class Meta:
         fields = ("choice",)
+
+
+class MakeGameDecisionsSerializer(serializers.Serializer):
+    choices = serializers.ListField(
+        child=serializers.UUIDField(), min_length=1, max_length=1000
+    )
+    # Bundle version the decisions were made with, if played offline
+    version = serializers.CharField(required=False)
+
+    class Meta:
+        fields = ("choices", "version")
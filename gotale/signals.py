@@ -0,0 +1,181 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.signals import request_finished
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from gotale.graph import scenario_graphs
+from gotale.history import history_buffer
+from gotale.models import Choice, Location, Scenario, Step
+
+
+def _adjust_choices_count(choice: Choice, delta: int) -> None:
+    Step.objects.filter(pk=choice.step_id).update(
+        choices_count=F("choices_count") + delta
+    )
+    # Keep an already loaded step in sync, so callers don't have to refresh it
+    if Choice.step.is_cached(choice):
+        choice.step.choices_count += delta
+
+
+def _choice_scenario_id(choice: Choice):
+    if Choice.step.is_cached(choice):
+        return choice.step.scenario_id
+    return (
+        Step.objects.filter(pk=choice.step_id)
+        .values_list("scenario_id", flat=True)
+        .first()
+    )
+
+
+class _ScenarioChanges:
+    """
+    Scenarios changed in the current transaction, invalidated and touched
+    once each when it commits. Also tracks the scenarios and steps it deletes,
+    whose children's handlers have nothing left to do.
+    """
+
+    def __init__(self):
+        self.invalidated: set = set()
+        # Scenario responses embed the root step, their validators use modified_at
+        self.touched: set = set()
+        self.deleted_scenarios: set = set()
+        self.deleted_steps: set = set()
+
+    def __call__(self):
+        for scenario_id in self.invalidated | self.touched:
+            scenario_graphs.invalidate(scenario_id)
+        touched = self.touched - self.deleted_scenarios
+        if touched:
+            Scenario.objects.filter(pk__in=touched).update(modified_at=timezone.now())
+
+
+def _pending_changes() -> _ScenarioChanges | None:
+    for _, callback, _ in transaction.get_connection().run_on_commit:
+        if isinstance(callback, _ScenarioChanges):
+            return callback
+    return None
+
+
+def _record_changes(kind: str, ids) -> None:
+    """Adds `ids` to the `kind` set of the current transaction's changes."""
+    changes = _pending_changes()
+    if changes is None:
+        changes = _ScenarioChanges()
+        getattr(changes, kind).update(ids)
+        # Runs right away in autocommit mode
+        transaction.on_commit(changes)
+    else:
+        getattr(changes, kind).update(ids)
+
+
+def _deleted_steps() -> set:
+    changes = _pending_changes()
+    return changes.deleted_steps if changes is not None else set()
+
+
+_suppressed: ContextVar[bool] = ContextVar("scenario_signals_suppressed", default=False)
+
+
+@contextmanager
+def scenario_signals_suppressed():
+    """
+    Skips the handlers below, for bulk writers which keep choices_count and
+    the compiled graph up to date themselves.
+    """
+    token = _suppressed.set(True)
+    try:
+        yield
+    finally:
+        _suppressed.reset(token)
+
+
+@receiver(post_save, sender=Choice, dispatch_uid="choice_created_count")
+def choice_created(sender, instance, created, **kwargs):
+    if created and not _suppressed.get():
+        _adjust_choices_count(instance, 1)
+
+
+@receiver(post_delete, sender=Choice, dispatch_uid="choice_deleted_count")
+def choice_deleted(sender, instance, **kwargs):
+    if _suppressed.get():
+        return
+    # Nothing to count on a step being deleted along with it
+    if instance.step_id not in _deleted_steps():
+        _adjust_choices_count(instance, -1)
+
+
+@receiver(pre_delete, sender=Scenario, dispatch_uid="scenario_deleting")
+def scenario_deleting(sender, instance, **kwargs):
+    # Sent before any of the cascade is deleted
+    _record_changes("deleted_scenarios", [instance.pk])
+
+
+@receiver(post_save, sender=Scenario, dispatch_uid="scenario_changed_graph")
+@receiver(post_delete, sender=Scenario, dispatch_uid="scenario_deleted_graph")
+def scenario_changed(sender, instance, **kwargs):
+    _record_changes("invalidated", [instance.pk])
+
+
+@receiver(pre_delete, sender=Step, dispatch_uid="step_deleting")
+def step_deleting(sender, instance, **kwargs):
+    if not _suppressed.get():
+        _record_changes("deleted_steps", [instance.pk])
+
+
+@receiver(post_save, sender=Step, dispatch_uid="step_changed_graph")
+@receiver(post_delete, sender=Step, dispatch_uid="step_deleted_graph")
+def step_changed(sender, instance, **kwargs):
+    if _suppressed.get():
+        return
+    changes = _pending_changes()
+    if changes is None or instance.scenario_id not in changes.deleted_scenarios:
+        _record_changes("touched", [instance.scenario_id])
+
+
+@receiver(post_save, sender=Choice, dispatch_uid="choice_changed_graph")
+@receiver(post_delete, sender=Choice, dispatch_uid="choice_deleted_graph")
+def choice_changed(sender, instance, **kwargs):
+    if _suppressed.get():
+        return
+    # Choices of, or leading to, a deleted step are deleted along with it,
+    # and the step's handler already marked their scenario
+    deleted_steps = _deleted_steps()
+    if instance.step_id in deleted_steps or instance.next_id in deleted_steps:
+        return
+    scenario_id = _choice_scenario_id(instance)
+    if scenario_id is not None:
+        _record_changes("touched", [scenario_id])
+
+
+@receiver(pre_delete, sender=Location, dispatch_uid="location_deleted_graph")
+def location_deleted(sender, instance, **kwargs):
+    # Steps lose their location through SET_NULL, which sends no Step signals
+    scenario_ids = (
+        Step.objects.filter(location=instance)
+        .values_list("scenario_id", flat=True)
+        .distinct()
+    )
+    _record_changes("touched", scenario_ids)
+
+
+@receiver(post_save, sender=Location, dispatch_uid="location_changed_graph")
+def location_changed(sender, instance, created, **kwargs):
+    # Offline bundles embed locations and are versioned with the graph
+    if created:
+        return
+    scenario_ids = (
+        Step.objects.filter(location=instance)
+        .values_list("scenario_id", flat=True)
+        .distinct()
+    )
+    _record_changes("invalidated", scenario_ids)
+
+
+@receiver(request_finished, dispatch_uid="request_finished_history")
+def request_finished_flush_history(sender, **kwargs):
+    history_buffer.flush()
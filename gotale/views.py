@@ -1,20 +1,34 @@
+import itertools
 from datetime import datetime
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.shortcuts import get_object_or_404
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import quote_etag
 from drf_rw_serializers import generics, mixins, viewsets
 from rest_framework import permissions, status
 from rest_framework.decorators import action
 from rest_framework.request import Request
 from rest_framework.response import Response
 
+from core.renderers import FastJSONRenderer, NDJSONRenderer, RawJSON
 from core.serializers import (
     UserRegisterSerializer,
     UserSerializer,
     UserUpdateSerializer,
 )
+from core.streaming import iter_json_array, iter_ndjson
+from core.views import CompiledReadMixin, ConditionalReadMixin, QueryPlanMixin
 from gotale import permissions as gotalePermissions
-from gotale.models import Choice, Game, GameStatus, Location, Scenario
+from gotale.bundle import get_bundle, negotiate_coding
+from gotale.exporter import iter_scenario_export
+from gotale.filters import BoundingBoxFilter
+from gotale.geo import closest_within
+from gotale.graph import scenario_graphs
+from gotale.importer import ScenarioImporter
+from gotale.models import Game, Location, Scenario
 from gotale.serializers import (
     GameCreateSerializer,
     GameSerializer,
@@ -22,16 +36,22 @@ from gotale.serializers import (
     LocationSerializer,
     LocationUpdateSerializer,
     MakeGameDecisionSerializer,
+    MakeGameDecisionsSerializer,
+    NearbyLocationSerializer,
+    NearbyQuerySerializer,
+    NearbyScenarioSerializer,
     ScenarioCreateSerializer,
     ScenarioSerializer,
-    StepSerializer,
 )
 
 User = get_user_model()
 
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/jsonl")
 
-class UserViewset(viewsets.ModelViewSet):
+
+class UserViewset(CompiledReadMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
+    cursor_ordering = ("date_joined", "id")
     # TODO:
     # permission_classes = [gotalePermissions.UserPermission]
     read_serializer_class = UserSerializer
@@ -66,24 +86,60 @@ class UserViewset(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class LocationViewset(viewsets.ModelViewSet):
+class LocationViewset(
+    ConditionalReadMixin, CompiledReadMixin, QueryPlanMixin, viewsets.ModelViewSet
+):
     queryset = Location.objects.all()
     read_serializer_class = LocationSerializer
+    filter_backends = [BoundingBoxFilter]
+    select_related_fields = ("created_by", "modified_by")
+    query_plan_actions = ("list", "retrieve", "nearby")
 
     def get_write_serializer_class(self):
         if self.action == "create":
             return LocationCreateSerializer
         return LocationUpdateSerializer
 
+    @action(
+        detail=False,
+        methods=["GET"],
+        url_name="nearby",
+        url_path="nearby",
+        name="Nearby locations",
+    )
+    def nearby(self, request: Request) -> Response:
+        """Locations within `radius` meters of (`lat`, `lon`), closest first."""
+        params = NearbyQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        locations = self.filter_queryset(self.get_queryset()).nearby(
+            latitude=params.validated_data["lat"],
+            longitude=params.validated_data["lon"],
+            radius=params.validated_data["radius"],
+            limit=params.validated_data["limit"],
+        )
+
+        return Response(
+            NearbyLocationSerializer(
+                locations, many=True, context=self.get_serializer_context()
+            ).data
+        )
+
 
-class ScenarioViewset(viewsets.ModelViewSet):
+class ScenarioViewset(
+    ConditionalReadMixin, CompiledReadMixin, QueryPlanMixin, viewsets.ModelViewSet
+):
     queryset = Scenario.objects.all()
+    select_related_fields = ("created_by", "modified_by", "root_step")
+    prefetch_related_fields = ("root_step__choices",)
 
     read_serializer_class = ScenarioSerializer
     write_serializer_class = ScenarioCreateSerializer
 
+    query_plan_actions = ("list", "retrieve", "nearby")
+
     def get_permissions(self):
-        if self.action == "create":
+        if self.action in ("create", "bulk_import"):
             return [permissions.IsAuthenticated()]
 
         return [gotalePermissions.IsOwnerOrAdminOrReadOnly()]
@@ -102,8 +158,141 @@ class ScenarioViewset(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         return serializer.save(created_by=self.request.user)
 
+    def perform_update(self, serializer):
+        return serializer.save(modified_by=self.request.user)
+
+    @action(
+        detail=False,
+        methods=["POST"],
+        url_name="bulk-import",
+        url_path="bulk-import",
+        name="Bulk import scenarios",
+    )
+    def bulk_import(self, request: Request) -> Response:
+        """
+        Imports a JSON array of scenarios, or one scenario per line with an
+        NDJSON content type, in the format accepted by create. The body is
+        parsed while it is read, so it is never held in memory as a whole.
+        """
+        if request.content_type.split(";")[0].strip() in NDJSON_CONTENT_TYPES:
+            items = iter_ndjson(request, settings.SCENARIO_IMPORT_MAX_ITEM_SIZE)
+        else:
+            items = iter_json_array(request, settings.SCENARIO_IMPORT_MAX_ITEM_SIZE)
+
+        importer = ScenarioImporter(
+            created_by=request.user,
+            chunk_size=settings.SCENARIO_IMPORT_CHUNK_SIZE,
+            context=self.get_serializer_context(),
+        )
+        results = importer.run(items)
+        created = sum("id" in result for result in results)
+
+        return Response(
+            {
+                "created": created,
+                "failed": len(results) - created,
+                "results": results,
+            }
+        )
+
+    @action(
+        detail=True,
+        methods=["GET"],
+        url_name="export",
+        url_path="export",
+        name="Export scenario",
+        renderer_classes=[FastJSONRenderer, NDJSONRenderer],
+    )
+    def export(self, request: Request, pk=None) -> StreamingHttpResponse:
+        """
+        The whole scenario in the format accepted by create, streamed while it
+        is read. As NDJSON (`?format=ndjson`) it is a single line, ready to be
+        appended to a bulk import.
+        """
+        scenario = self.get_object()
+        renderer = request.accepted_renderer
+        content = iter_scenario_export(scenario, settings.SCENARIO_EXPORT_CHUNK_SIZE)
+        if isinstance(renderer, NDJSONRenderer):
+            content = itertools.chain(content, [b"\n"])
+
+        response = StreamingHttpResponse(content, content_type=renderer.media_type)
+        response["Content-Disposition"] = (
+            f'attachment; filename="scenario-{scenario.pk}.{renderer.format}"'
+        )
+        return response
+
+    @action(
+        detail=True,
+        methods=["GET"],
+        url_name="bundle",
+        url_path="bundle",
+        name="Offline scenario bundle",
+    )
+    def bundle(self, request: Request, pk=None) -> HttpResponse:
+        """
+        Every step, choice and location of the scenario in one payload, for
+        playing offline. Compressed as negotiated with Accept-Encoding, and
+        not sent again while the ETag, i.e. the bundle version, still matches.
+        """
+        scenario = self.get_object()
+        graph = scenario_graphs.get(scenario.pk)
+        coding = negotiate_coding(request.headers.get("Accept-Encoding", ""))
+        etag = quote_etag(f"{graph.version}-{coding or 'identity'}")
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(
+                get_bundle(graph, coding), content_type="application/json"
+            )
+            if coding is not None:
+                response.headers["Content-Encoding"] = coding
+        response.headers["ETag"] = etag
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return response
+
+    @action(
+        detail=False,
+        methods=["GET"],
+        url_name="nearby",
+        url_path="nearby",
+        name="Scenarios starting nearby",
+    )
+    def nearby(self, request: Request) -> Response:
+        """Scenarios whose root step is within `radius` meters, closest first."""
+        params = NearbyQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        latitude = params.validated_data["lat"]
+        longitude = params.validated_data["lon"]
+        radius = params.validated_data["radius"]
+
+        # Candidate locations are joined as a subquery, only the coordinates
+        # of matching scenarios are read before the page is cut
+        candidates = Scenario.objects.filter(
+            root_step__location__in=Location.objects.around(latitude, longitude, radius)
+        ).values_list(
+            "pk", "root_step__location__latitude", "root_step__location__longitude"
+        )
+        closest = closest_within(latitude, longitude, radius, candidates)
+        closest = closest[: params.validated_data["limit"]]
+
+        scenarios = self.get_queryset().in_bulk([pk for _, pk in closest])
+        result = []
+        for distance, pk in closest:
+            scenario = scenarios[pk]
+            scenario.distance = distance
+            result.append(scenario)
+
+        return Response(
+            NearbyScenarioSerializer(
+                result, many=True, context=self.get_serializer_context()
+            ).data
+        )
+
 
 class GameViewsets(
+    CompiledReadMixin,
+    QueryPlanMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
@@ -111,6 +300,17 @@ class GameViewsets(
 ):
     queryset = Game.objects.all()
     read_serializer_class = GameSerializer
+    select_related_fields = (
+        "user",
+        "current_step",
+        "scenario__created_by",
+        "scenario__modified_by",
+        "scenario__root_step",
+    )
+    prefetch_related_fields = (
+        "current_step__choices",
+        "scenario__root_step__choices",
+    )
     write_serializers_class = GameCreateSerializer
     # TODO permission_classes = [gotalePermissions.isAuthenticatedOrAdmin]
 
@@ -137,12 +337,12 @@ class GameViewsets(
     def current_step(self, request: Request, pk=None) -> Response:
         # TODO: permissions
         game = self.get_object()
+        graph = scenario_graphs.get(game.scenario_id, game.current_step_id)
         if request.method == "GET":
-            serializer = StepSerializer(game.current_step)
-            return Response(serializer.data)
+            return Response(RawJSON(graph.payloads[game.current_step_id]))
 
         # POST METHDO
-        if game.status == GameStatus.ENDED:
+        if graph.steps[game.current_step_id].is_terminal:
             return Response(
                 {"error": "This game has already ended"},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -150,15 +350,80 @@ class GameViewsets(
 
         serializer = MakeGameDecisionSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        choice = get_object_or_404(Choice, pk=serializer.validated_data["choice"])
+        choice = graph.choices.get(serializer.validated_data["choice"])
+        if choice is None:
+            raise Http404("No Choice matches the given query.")
+
+        try:
+            decided = game.make_decision(choice)
+        except DjangoValidationError as e:
+            return Response(
+                {"error": e.message},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        game.make_decision(choice)
+        if not decided:
+            return Response(
+                {"error": "The game has already moved to another step"},
+                status=status.HTTP_409_CONFLICT,
+            )
 
         return Response(
-            StepSerializer(game.current_step).data,
+            RawJSON(graph.payloads[game.current_step_id]),
             status=status.HTTP_200_OK,
         )
 
+    @action(
+        detail=True,
+        methods=["POST"],
+        url_name="decisions",
+        url_path="decisions",
+        name="Apply game decisions",
+    )
+    def decisions(self, request: Request, pk=None) -> Response:
+        """
+        Applies a sequence of choices, e.g. made offline from a scenario
+        bundle, all or none of them. The bundle `version` they were made with,
+        if sent, must still be current.
+        """
+        game = self.get_object()
+        serializer = MakeGameDecisionsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        graph = scenario_graphs.get(game.scenario_id, game.current_step_id)
+        version = serializer.validated_data.get("version")
+        if version is not None and version != str(graph.version):
+            return Response(
+                {"error": "The scenario has changed since it was downloaded"},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        choices = []
+        for index, choice_id in enumerate(serializer.validated_data["choices"]):
+            choice = graph.choices.get(choice_id)
+            if choice is None:
+                return Response(
+                    {"error": "No Choice matches the given query.", "index": index},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            choices.append(choice)
+
+        try:
+            decided = game.make_decisions(choices)
+        except DjangoValidationError as e:
+            return Response(
+                {"error": e.message, "index": e.params["index"]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if not decided:
+            return Response(
+                {"error": "The game has already moved to another step"},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        return Response(RawJSON(graph.payloads[game.current_step_id]))
+
     @action(
         detail=True,
         methods=["POST"],
@@ -3,11 +3,23 @@ from django.contrib.auth import get_user_model
 from model_bakery import baker
 from rest_framework.test import APIClient
 
+from gotale.graph import scenario_graphs
+from gotale.history import history_buffer
 from gotale.models import Choice, Game, Location, Scenario, Step
 
 User = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def clear_scenario_graphs():
+    # Scenario ids are reused between tests while the database is rolled back
+    scenario_graphs.clear()
+    scenario_graphs.shared.clear()
+    yield
+    scenario_graphs.clear()
+    scenario_graphs.shared.clear()
+
+
 @pytest.fixture
 @pytest.mark.django_db
 def user1_fixture():
@@ -36,6 +48,13 @@ def admin_user():
     )
 
 
+@pytest.fixture(autouse=True)
+def clear_history_buffer():
+    history_buffer.clear()
+    yield
+    history_buffer.clear()
+
+
 @pytest.fixture
 def anon_client():
     return APIClient()
@@ -164,6 +183,20 @@ def scenario_fixture(users_fixture):
     return scenario
 
 
+@pytest.fixture
+@pytest.mark.django_db
+def game_fixture(scenario_fixture, users_fixture):
+    game = baker.make(
+        Game,
+        id="1ede802f-d69b-41d5-b370-000000000000",
+        scenario=scenario_fixture,
+        current_step=scenario_fixture.root_step,
+        user=users_fixture[0],
+    )
+    # Reloaded, as fixture instances keep their string primary keys
+    return Game.objects.get(pk=game.pk)
+
+
 @pytest.fixture
 @pytest.mark.django_db
 def users_fixture():
@@ -0,0 +1,139 @@
+import random
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from core.compiled import CompiledSerializer, compile_serializer
+from core.serializers import UserSerializer
+from gotale.models import Choice, Game, Location, Scenario, Step
+from gotale.serializers import (
+    ChoiceSerializer,
+    GameSerializer,
+    LocationSerializer,
+    ScenarioSerializer,
+    StepSerializer,
+)
+
+User = get_user_model()
+
+TEXTS = ["", "plain", "zażółć gęślą jaźń", 'quotes " and \\ slashes', "emoji 🗺️", "\n"]
+
+
+def random_text(rng: random.Random, max_length: int = 50) -> str:
+    return rng.choice(TEXTS)[:max_length] + str(rng.randint(0, 10**6))
+
+
+def make_random_graph(rng: random.Random):
+    users = [
+        baker.make(
+            User,
+            username=f"user{i}",
+            email=f"user{i}@example.com",
+            first_name=random_text(rng),
+            last_name=rng.choice(["", random_text(rng)]),
+        )
+        for i in range(rng.randint(1, 4))
+    ]
+
+    locations = [
+        baker.make(
+            Location,
+            title=random_text(rng),
+            description=rng.choice([None, random_text(rng)]),
+            latitude=Decimal(f"{rng.uniform(-90, 90):.6f}"),
+            longitude=Decimal(f"{rng.uniform(-180, 180):.6f}"),
+            created_by=rng.choice(users),
+            modified_by=rng.choice([None, *users]),
+        )
+        for _ in range(rng.randint(0, 5))
+    ]
+
+    for _ in range(rng.randint(1, 3)):
+        scenario = baker.make(
+            Scenario,
+            title=random_text(rng),
+            description=rng.choice([None, random_text(rng)]),
+            created_by=rng.choice(users),
+            modified_by=rng.choice([None, *users]),
+        )
+        steps = [
+            baker.make(
+                Step,
+                scenario=scenario,
+                title=random_text(rng),
+                description=rng.choice([None, random_text(rng)]),
+                location=rng.choice([None, *locations]),
+            )
+            for _ in range(rng.randint(1, 6))
+        ]
+        for step in steps:
+            for _ in range(rng.randint(0, 4)):
+                baker.make(
+                    Choice, step=step, next=rng.choice(steps), text=random_text(rng)
+                )
+
+        scenario.root_step = rng.choice([None, *steps])
+        scenario.save()
+
+        for _ in range(rng.randint(0, 3)):
+            baker.make(
+                Game,
+                user=rng.choice(users),
+                scenario=scenario,
+                current_step=rng.choice([None, *steps]),
+            )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize(
+    "serializer_class, model",
+    [
+        pytest.param(UserSerializer, User, id="user"),
+        pytest.param(LocationSerializer, Location, id="location"),
+        pytest.param(ChoiceSerializer, Choice, id="choice"),
+        pytest.param(StepSerializer, Step, id="step"),
+        pytest.param(ScenarioSerializer, Scenario, id="scenario"),
+        pytest.param(GameSerializer, Game, id="game"),
+    ],
+)
+def test_compiled_serializer_renders_same_json(serializer_class, model, seed):
+    make_random_graph(random.Random(seed))
+    queryset = model.objects.order_by("pk")
+
+    expected = JSONRenderer().render(serializer_class(queryset, many=True).data)
+    compiled = compile_serializer(serializer_class).data(queryset)
+
+    assert JSONRenderer().render(compiled) == expected
+
+
+@pytest.mark.django_db
+def test_compiled_serializer_num_queries():
+    make_random_graph(random.Random(0))
+
+    with CaptureQueriesContext(connection) as queries:
+        compile_serializer(GameSerializer).data(Game.objects.all())
+
+    # Games with their joined relations, then the choices of both nested steps
+    assert len(queries) == 3
+
+
+def test_compiled_serializer_rejects_method_fields():
+    class StepTitleSerializer(StepSerializer):
+        upper_title = serializers.SerializerMethodField()
+
+        class Meta(StepSerializer.Meta):
+            fields = StepSerializer.Meta.fields + ("upper_title",)
+
+        def get_upper_title(self, step):
+            return step.title.upper()
+
+    with pytest.raises(ImproperlyConfigured):
+        CompiledSerializer(StepTitleSerializer())
@@ -0,0 +1,81 @@
+import datetime
+import uuid
+from decimal import Decimal
+
+import pytest
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict
+
+from core import renderers
+from core.renderers import FastJSONRenderer, NDJSONRenderer, RawJSON, encode_json
+
+DATA = [
+    None,
+    {"text": "zażółć gęślą jaźń 🗺️", "escape": 'quote " slash \\ tab \t'},
+    {"separators": "line\u2028paragraph\u2029"},
+    {"id": uuid.UUID("01234567-89ab-cdef-0123-000000000000"), "count": 3},
+    {"decimal": Decimal("52.229700"), "float": 0.1, "bool": True, "null": None},
+    {"datetime": datetime.datetime(2025, 1, 2, 3, 4, 5, 678901)},
+    {"date": datetime.date(2025, 1, 2), "lazy": gettext_lazy("created")},
+    {1: "non string keys"},
+    ReturnDict({"nested": [{"list": [1, 2, {}]}]}, serializer=None),
+    # Beyond 64 bits, which orjson can't encode
+    {"int": 2**70},
+    {"float": 1e15, "small": 0.0001, "negative_zero": -0.0},
+]
+
+# (data, orjson output), see core.renderers
+FLOAT_DATA = [
+    pytest.param({"float": 1e16}, b'{"float":1e16}', id="large"),
+    pytest.param({"float": 1e-7}, b'{"float":1e-7}', id="small"),
+    pytest.param({"float": 1e-5}, b'{"float":0.00001}', id="small_positional"),
+    pytest.param({"float": float("nan")}, b'{"float":null}', id="nan"),
+    pytest.param({"float": float("inf")}, b'{"float":null}', id="infinity"),
+]
+
+
+@pytest.mark.parametrize("data", DATA)
+@pytest.mark.parametrize(
+    "orjson",
+    [
+        pytest.param(renderers.orjson, id="orjson"),
+        pytest.param(None, id="stdlib"),
+    ],
+)
+def test_fast_json_renderer_matches_drf(monkeypatch, data, orjson):
+    monkeypatch.setattr(renderers, "orjson", orjson)
+
+    assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+@pytest.mark.skipif(renderers.orjson is None, reason="orjson is not installed")
+@pytest.mark.parametrize("data, expected", FLOAT_DATA)
+def test_fast_json_renderer_floats(data, expected):
+    assert FastJSONRenderer().render(data) == expected
+
+
+def test_fast_json_renderer_indent():
+    data = {"id": 1, "text": "zażółć"}
+
+    assert FastJSONRenderer().render(
+        data, "application/json; indent=4"
+    ) == JSONRenderer().render(data, "application/json; indent=4")
+
+
+def test_fast_json_renderer_raw_json():
+    data = {"id": 1, "text": "zażółć"}
+    encoded = encode_json(data)
+
+    assert isinstance(encoded, RawJSON)
+    assert FastJSONRenderer().render(encoded) == JSONRenderer().render(data)
+    assert FastJSONRenderer().render(
+        encoded, renderer_context={"indent": 4}
+    ) == JSONRenderer().render(data, renderer_context={"indent": 4})
+
+
+def test_ndjson_renderer():
+    assert NDJSONRenderer().render([{"id": 1}, {"text": "zażółć"}]) == (
+        b'{"id":1}\n{"text":"za\xc5\xbc\xc3\xb3\xc5\x82\xc4\x87"}\n'
+    )
+    assert NDJSONRenderer().render({"id": 1}) == b'{"id":1}\n'
@@ -0,0 +1,159 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.test import AsyncClient
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.middleware import PIN_COOKIE
+from core.routers import PrimaryReplicaRouter, RoutingState, routing_state, use_primary
+from gotale.models import Game, Scenario
+
+REPLICA = "test_replica"
+
+
+@pytest.fixture
+def replica(settings):
+    """A second connection to the test database, standing in for a replica."""
+    # Registered for this thread only, as test cases allow dynamic aliases
+    connections[REPLICA] = connections[DEFAULT_DB_ALIAS].copy(REPLICA)
+    settings.DATABASE_REPLICAS = [REPLICA]
+    yield connections[REPLICA]
+    connections[REPLICA].close()
+    del connections[REPLICA]
+
+
+@pytest.fixture
+def routing(request):
+    token = routing_state.set(request.param)
+    yield request.param
+    routing_state.reset(token)
+
+
+@pytest.mark.parametrize(
+    "routing, expected_alias",
+    (
+        pytest.param(None, DEFAULT_DB_ALIAS, id="outside_requests"),
+        pytest.param(RoutingState(replicas=False), DEFAULT_DB_ALIAS, id="unsafe"),
+        pytest.param(RoutingState(replicas=True), REPLICA, id="safe"),
+        pytest.param(
+            RoutingState(replicas=True, wrote=True), DEFAULT_DB_ALIAS, id="wrote"
+        ),
+    ),
+    indirect=["routing"],
+)
+def test_router_db_for_read(settings, routing, expected_alias):
+    settings.DATABASE_REPLICAS = [REPLICA]
+
+    assert PrimaryReplicaRouter().db_for_read(Scenario) == expected_alias
+
+
+@pytest.mark.parametrize("routing", (RoutingState(replicas=True),), indirect=True)
+def test_router_reads_own_writes(settings, routing):
+    settings.DATABASE_REPLICAS = [REPLICA]
+    router = PrimaryReplicaRouter()
+
+    with use_primary():
+        assert router.db_for_read(Scenario) == DEFAULT_DB_ALIAS
+    assert router.db_for_read(Scenario) == REPLICA
+    assert router.db_for_write(Scenario) == DEFAULT_DB_ALIAS
+    assert (routing.wrote, router.db_for_read(Scenario)) == (True, DEFAULT_DB_ALIAS)
+
+
+@pytest.mark.parametrize("routing", (RoutingState(replicas=True),), indirect=True)
+@pytest.mark.django_db
+def test_router_reads_in_transactions_from_primary(settings, routing):
+    settings.DATABASE_REPLICAS = [REPLICA]
+
+    with transaction.atomic():
+        assert PrimaryReplicaRouter().db_for_read(Scenario) == DEFAULT_DB_ALIAS
+
+
+def test_router_allow_migrate(settings):
+    settings.DATABASE_REPLICAS = [REPLICA]
+    router = PrimaryReplicaRouter()
+
+    assert (
+        router.allow_migrate(DEFAULT_DB_ALIAS, "gotale"),
+        router.allow_migrate(REPLICA, "gotale"),
+    ) == (True, False)
+
+
+# The replica's connection has to see the fixtures
+@pytest.mark.django_db(transaction=True)
+def test_safe_requests_read_from_replica(anon_client, scenario_fixture, replica):
+    with (
+        CaptureQueriesContext(replica) as replica_queries,
+        CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as primary_queries,
+    ):
+        response = anon_client.get(reverse("scenario-list"))
+
+    assert (response.status_code, len(response.json()["results"])) == (200, 1)
+    assert (len(replica_queries) > 0, len(primary_queries)) == (True, 0)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_writes_pin_client_to_primary(anon_client, replica, settings):
+    response = anon_client.post(
+        reverse("register"),
+        data={
+            "username": "reader",
+            "email": "reader@example.com",
+            "first_name": "Read",
+            "last_name": "Er",
+            "password": "password123",
+        },
+    )
+
+    assert response.status_code == 201
+    cookie = response.cookies[PIN_COOKIE]
+    assert cookie["max-age"] == settings.DATABASE_REPLICA_PIN_SECONDS
+
+    # The client sends the cookie back until it expires
+    with CaptureQueriesContext(replica) as replica_queries:
+        response = anon_client.get(reverse("user-list"))
+
+    assert (response.status_code, len(replica_queries)) == (200, 0)
+    assert "reader" in [user["username"] for user in response.json()["results"]]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_writes_pin_token_user_to_primary(game_fixture, replica):
+    url = reverse("game-current-step", kwargs={"pk": game_fixture.pk})
+    user = Game.objects.get(pk=game_fixture.pk).user
+    authorization = f"Bearer {AccessToken.for_user(user)}"
+
+    def get_step():
+        # A fresh client each time, keeping no cookies
+        with CaptureQueriesContext(replica) as replica_queries:
+            response = APIClient().get(url, HTTP_AUTHORIZATION=authorization)
+        return response.status_code, len(replica_queries) > 0
+
+    before = get_step()
+    response = APIClient().post(
+        url,
+        data={"choice": "01234567-89ab-cdef-0123-000000000011"},
+        format="json",
+        HTTP_AUTHORIZATION=authorization,
+    )
+
+    assert response.status_code == 200
+    assert (before, get_step()) == ((200, True), (200, False))
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_game_step_reads_from_replica(game_fixture, replica, settings):
+    settings.ROOT_URLCONF = "backend.asgi_urls"
+
+    async def get_step():
+        return await AsyncClient().get(
+            reverse("game-current-step", kwargs={"pk": game_fixture.pk})
+        )
+
+    with CaptureQueriesContext(replica) as replica_queries:
+        response = async_to_sync(get_step)()
+
+    assert response.status_code == 200
+    assert "gotale_game" in replica_queries[0]["sql"]
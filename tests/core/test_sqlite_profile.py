@@ -0,0 +1,103 @@
+import threading
+
+import pytest
+from django.db import connection, transaction
+from django.db.utils import ConnectionHandler
+
+from core.signals import apply_sqlite_pragmas
+
+PRAGMAS = ("journal_mode", "synchronous", "busy_timeout", "cache_size", "mmap_size")
+
+
+@pytest.fixture
+def production_profile(settings):
+    settings.SQLITE_PRAGMAS = settings.SQLITE_PRODUCTION_PRAGMAS
+
+
+@pytest.fixture
+def tuned_connections(tmp_path, production_profile):
+    handler = ConnectionHandler(
+        {
+            "default": {
+                "ENGINE": "django.db.backends.sqlite3",
+                "NAME": tmp_path / "db.sqlite3",
+                "OPTIONS": {"transaction_mode": "IMMEDIATE"},
+            }
+        }
+    )
+    yield handler
+    handler.close_all()
+
+
+def read_pragmas(db) -> dict:
+    with db.cursor() as cursor:
+        return {
+            name: cursor.execute(f"PRAGMA {name}").fetchone()[0] for name in PRAGMAS
+        }
+
+
+@pytest.mark.django_db
+def test_sqlite_production_profile_pragmas(tuned_connections):
+    assert read_pragmas(tuned_connections["default"]) == {
+        "journal_mode": "wal",
+        "synchronous": 1,  # NORMAL
+        "busy_timeout": 5000,
+        "cache_size": -64 * 1024,
+        "mmap_size": 256 * 1024 * 1024,
+    }
+
+
+@pytest.mark.django_db
+def test_sqlite_default_profile_pragmas(tuned_connections, settings):
+    settings.SQLITE_PRAGMAS = {}
+
+    assert read_pragmas(tuned_connections["default"])["journal_mode"] == "delete"
+
+
+@pytest.mark.django_db
+def test_sqlite_profile_ignores_other_databases(production_profile, mocker):
+    mocker.patch.object(connection, "vendor", "postgresql")
+    cursor = mocker.patch.object(connection, "cursor")
+
+    apply_sqlite_pragmas(sender=None, connection=connection)
+
+    cursor.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_sqlite_production_profile_concurrent_writes(tuned_connections, mocker):
+    """Writers in transactions queue for the lock instead of failing."""
+    mocker.patch("django.db.transaction.connections", tuned_connections)
+    db = tuned_connections["default"]
+    with db.cursor() as cursor:
+        cursor.execute("CREATE TABLE counter (value INTEGER)")
+        cursor.execute("INSERT INTO counter VALUES (0)")
+
+    errors = []
+
+    def increment(times):
+        # Connections are per thread
+        db = tuned_connections["default"]
+        try:
+            for _ in range(times):
+                with transaction.atomic(), db.cursor() as cursor:
+                    # Read first, a deferred transaction couldn't upgrade its
+                    # read lock while another one writes
+                    value = cursor.execute("SELECT value FROM counter").fetchone()[0]
+                    cursor.execute("UPDATE counter SET value = %s", [value + 1])
+        except Exception as e:
+            errors.append(e)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=increment, args=(50,)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with db.cursor() as cursor:
+        assert (errors, cursor.execute("SELECT value FROM counter").fetchone()[0]) == (
+            [],
+            200,
+        )
@@ -0,0 +1,67 @@
+import io
+
+import pytest
+
+from core.streaming import iter_json_array, iter_ndjson
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 1024])
+@pytest.mark.parametrize(
+    "body, expected",
+    [
+        pytest.param(b"[]", [], id="empty"),
+        pytest.param(
+            b' \n[ {"a": 1} ,\n{"b": [2, 3]} ] \n',
+            [{"a": 1}, {"b": [2, 3]}],
+            id="objects",
+        ),
+        pytest.param(
+            b"[12345, -0.5e10, true, null]", [12345, -0.5e10, True, None], id="scalars"
+        ),
+        pytest.param('["zażółć 🗺️"]'.encode(), ["zażółć 🗺️"], id="multibyte"),
+        pytest.param(
+            b'[{"a": 1}, {"b": }, {"c": 3}]',
+            [{"a": 1}, "Invalid JSON: Expecting value."],
+            id="invalid_element",
+        ),
+        pytest.param(
+            b'[{"a": 1} {"b": 2}]',
+            [{"a": 1}, "Expected one of ',]', found '{'."],
+            id="missing_comma",
+        ),
+        pytest.param(
+            b'[{"a": 1}',
+            [{"a": 1}, "Expected one of ',]', found end of input."],
+            id="truncated",
+        ),
+        pytest.param(b'{"a": 1}', ["Expected one of '[', found '{'."], id="not_array"),
+        pytest.param(
+            b"[1] 2", [1, "Unexpected data after the array."], id="trailing_data"
+        ),
+        pytest.param(b"", ["Expected one of '[', found end of input."], id="no_body"),
+    ],
+)
+def test_iter_json_array(body, expected, chunk_size):
+    items = iter_json_array(io.BytesIO(body), max_item_size=100, chunk_size=chunk_size)
+
+    assert [value if error is None else error for value, error in items] == expected
+
+
+def test_iter_json_array_item_too_large():
+    body = b'[{"a": "' + b"x" * 200 + b'"}, {"b": 1}]'
+    items = iter_json_array(io.BytesIO(body), max_item_size=100, chunk_size=16)
+
+    assert list(items) == [(None, "Element larger than 100 bytes.")]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 1024])
+def test_iter_ndjson(chunk_size):
+    body = b'{"a": 1}\n\n  \n{"b": }\n' + b'"' + b"x" * 200 + b'"\n{"c": 3}'
+    items = iter_ndjson(io.BytesIO(body), max_item_size=100, chunk_size=chunk_size)
+
+    assert list(items) == [
+        ({"a": 1}, None),
+        (None, "Invalid JSON: Expecting value."),
+        (None, "Line larger than 100 bytes."),
+        ({"c": 3}, None),
+    ]
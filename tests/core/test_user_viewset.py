@@ -115,7 +115,10 @@ def test_user_viewset_retrieve_errors(anon_client):
 def test_user_viewset_list_success(anon_client, users_fixture):
     response = anon_client.get(reverse("user-list"))
 
-    assert (response.status_code, response.json()) == (status.HTTP_200_OK, USER_LIST)
+    assert (response.status_code, response.json()) == (
+        status.HTTP_200_OK,
+        {"next": None, "previous": None, "results": USER_LIST},
+    )
 
 
 @pytest.mark.django_db
@@ -0,0 +1,161 @@
+import asyncio
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.urls import resolve, reverse
+from rest_framework import status
+
+from gotale.graph import scenario_graphs
+from gotale.models import Game, Step
+
+CHILD_1_CHOICE = "01234567-89ab-cdef-0123-000000000011"
+URLCONFS = ("backend.urls", "backend.asgi_urls")
+
+
+def step_request(client, method, pk, data=None):
+    url = reverse("game-current-step", kwargs={"pk": pk})
+    response = getattr(client, method)(url, data=data, format="json")
+    return response.status_code, response.json()
+
+
+@pytest.mark.django_db
+def test_async_game_step_view_is_async(settings):
+    settings.ROOT_URLCONF = "backend.asgi_urls"
+
+    match = resolve(
+        reverse("game-current-step", kwargs={"pk": "1ede802f-d69b-41d5-b370-0"})
+    )
+
+    assert asyncio.iscoroutinefunction(match.func)
+
+
+@pytest.mark.parametrize(
+    "method, pk, data",
+    (
+        pytest.param("get", "1ede802f-d69b-41d5-b370-000000000000", None, id="get"),
+        pytest.param(
+            "post",
+            "1ede802f-d69b-41d5-b370-000000000000",
+            {"choice": CHILD_1_CHOICE},
+            id="post",
+        ),
+        pytest.param(
+            "post", "1ede802f-d69b-41d5-b370-000000000000", {}, id="empty-body"
+        ),
+        pytest.param(
+            "post",
+            "1ede802f-d69b-41d5-b370-000000000000",
+            {"choice": "01234567-89ab-cdef-0123-999999999999"},
+            id="invalid-choice",
+        ),
+        pytest.param(
+            "get", "1ede802f-d69b-41d5-b370-999999999999", None, id="game-dont-exist"
+        ),
+        pytest.param("get", "not-a-uuid", None, id="invalid-game-id"),
+        pytest.param(
+            "put", "1ede802f-d69b-41d5-b370-000000000000", {}, id="not-allowed"
+        ),
+    ),
+)
+@pytest.mark.django_db
+def test_async_game_step_matches_drf(
+    auth_client, game_fixture, settings, method, pk, data
+):
+    responses = []
+    for urlconf in URLCONFS:
+        settings.ROOT_URLCONF = urlconf
+        responses.append(step_request(auth_client, method, pk, data))
+        # Replay the same request on the same state
+        Game.objects.filter(pk=game_fixture.pk).update(
+            current_step=game_fixture.current_step_id, end=None
+        )
+
+    assert responses[0] == responses[1]
+
+
+@pytest.mark.parametrize("urlconf", URLCONFS)
+@pytest.mark.django_db
+def test_game_step_recompiles_stale_graph(auth_client, game_fixture, settings, urlconf):
+    settings.ROOT_URLCONF = urlconf
+    scenario_graphs.get(game_fixture.scenario_id)
+    # Moved by a process whose version bump this one hasn't seen
+    [step] = Step.objects.bulk_create(
+        [Step(scenario_id=game_fixture.scenario_id, title="Added elsewhere")]
+    )
+    Game.objects.filter(pk=game_fixture.pk).update(current_step=step)
+
+    status_code, data = step_request(auth_client, "get", game_fixture.id)
+
+    assert (status_code, data["title"]) == (status.HTTP_200_OK, "Added elsewhere")
+
+
+@pytest.mark.django_db
+def test_async_game_step_post_moves_game(auth_client, game_fixture, settings):
+    settings.ROOT_URLCONF = "backend.asgi_urls"
+
+    response = step_request(
+        auth_client, "post", game_fixture.id, {"choice": CHILD_1_CHOICE}
+    )
+    ended = step_request(
+        auth_client, "post", game_fixture.id, {"choice": CHILD_1_CHOICE}
+    )
+
+    assert response[0] == status.HTTP_200_OK
+    assert response[1]["title"] == "Child 1 (ended)"
+    assert ended == (
+        status.HTTP_400_BAD_REQUEST,
+        {"error": "This game has already ended"},
+    )
+    assert Game.objects.get(pk=game_fixture.pk).end is not None
+
+
+@pytest.mark.django_db
+def test_async_game_step_post_conflict(auth_client, game_fixture, settings, mocker):
+    settings.ROOT_URLCONF = "backend.asgi_urls"
+    mocker.patch.object(Game, "amake_decision", return_value=False)
+
+    assert step_request(
+        auth_client, "post", game_fixture.id, {"choice": CHILD_1_CHOICE}
+    ) == (
+        status.HTTP_409_CONFLICT,
+        {"error": "The game has already moved to another step"},
+    )
+
+
+# The handler runs each request's blocking calls in a thread of its own, with
+# its own connection, which has to see the fixtures
+@pytest.mark.django_db(transaction=True)
+def test_asgi_application_serves_async_game_step(game_fixture):
+    from backend.asgi import application
+
+    path = f"/api/games/{game_fixture.id}/step/"
+
+    async def get_step():
+        communicator = ApplicationCommunicator(
+            application,
+            {
+                "type": "http",
+                "asgi": {"version": "3.0"},
+                "http_version": "1.1",
+                "method": "GET",
+                "scheme": "http",
+                "path": path,
+                "raw_path": path.encode(),
+                "query_string": b"",
+                "root_path": "",
+                "headers": [(b"host", b"testserver")],
+                "client": ("127.0.0.1", 0),
+                "server": ("testserver", 80),
+            },
+        )
+        await communicator.send_input({"type": "http.request", "body": b""})
+        start = await communicator.receive_output(timeout=5)
+        body = await communicator.receive_output(timeout=5)
+        await communicator.wait(timeout=5)
+        return start["status"], json.loads(body["body"])
+
+    status_code, data = async_to_sync(get_step)()
+
+    assert (status_code, data["title"]) == (status.HTTP_200_OK, "Root Step")
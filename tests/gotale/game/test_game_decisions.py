@@ -0,0 +1,148 @@
+import uuid
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from gotale.graph import scenario_graphs
+from gotale.history import history_buffer
+from gotale.models import Choice, Game, History
+from gotale.serializers import ScenarioCreateSerializer
+from tests.gotale.scenarios.test_scenario_viewset import SCENARIO_CREATE_PAYLOAD
+
+
+@pytest.fixture
+def story_game(users_fixture):
+    serializer = ScenarioCreateSerializer(data=SCENARIO_CREATE_PAYLOAD)
+    serializer.is_valid(raise_exception=True)
+    scenario = serializer.save(created_by=users_fixture[0])
+    return Game.objects.create(
+        scenario=scenario, current_step_id=scenario.root_step_id, user=users_fixture[0]
+    )
+
+
+def choice_ids(game, *texts):
+    choices = dict(
+        Choice.objects.filter(step__scenario=game.scenario_id).values_list("text", "id")
+    )
+    return [str(choices[text]) for text in texts]
+
+
+@pytest.mark.django_db
+def test_game_viewset_decisions_success(
+    auth_client, story_game, django_capture_on_commit_callbacks
+):
+    choices = choice_ids(story_game, "Go to 2", "Go to 4")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = auth_client.post(
+            reverse("game-decisions", kwargs={"pk": story_game.id}),
+            data={
+                "choices": choices,
+                "version": str(scenario_graphs.get(story_game.scenario_id).version),
+            },
+            format="json",
+        )
+
+    assert (response.status_code, response.json()) == (
+        status.HTTP_200_OK,
+        {
+            "id": response.json()["id"],
+            "title": "step 4",
+            "description": None,
+            "location": None,
+            "choices": [],
+        },
+    )
+    story_game.refresh_from_db()
+    assert (story_game.current_step.title, story_game.end is not None) == (
+        "step 4",
+        True,
+    )
+    assert history_buffer.flush() == 2
+    assert sorted(History.objects.values_list("choice__text", flat=True)) == [
+        "Go to 2",
+        "Go to 4",
+    ]
+
+
+@pytest.mark.parametrize(
+    "texts, expected_response",
+    (
+        pytest.param(
+            ("Go to 2", "Go to 6"),
+            {"error": "Invalid choice for current step.", "index": 1},
+            id="not_from_current_step",
+        ),
+        pytest.param(
+            ("Go to 2", "Go to 4", "Go to 5"),
+            {"error": "Game is not active.", "index": 2},
+            id="after_the_end",
+        ),
+    ),
+)
+@pytest.mark.django_db
+def test_game_viewset_decisions_errors(
+    auth_client, story_game, texts, expected_response
+):
+    response = auth_client.post(
+        reverse("game-decisions", kwargs={"pk": story_game.id}),
+        data={"choices": choice_ids(story_game, *texts)},
+        format="json",
+    )
+
+    assert (response.status_code, response.json()) == (
+        status.HTTP_400_BAD_REQUEST,
+        expected_response,
+    )
+    # None of the choices is applied
+    story_game.refresh_from_db()
+    assert story_game.current_step_id == story_game.scenario.root_step_id
+
+
+@pytest.mark.django_db
+def test_game_viewset_decisions_unknown_choice(auth_client, story_game):
+    response = auth_client.post(
+        reverse("game-decisions", kwargs={"pk": story_game.id}),
+        data={
+            "choices": choice_ids(story_game, "Go to 2")
+            + ["01234567-89ab-cdef-0123-000000000011"]
+        },
+        format="json",
+    )
+
+    assert (response.status_code, response.json()) == (
+        status.HTTP_400_BAD_REQUEST,
+        {"error": "No Choice matches the given query.", "index": 1},
+    )
+
+
+@pytest.mark.django_db
+def test_game_viewset_decisions_outdated_version(auth_client, story_game):
+    version = str(scenario_graphs.get(story_game.scenario_id).version)
+    scenario_graphs.invalidate(story_game.scenario_id)
+
+    response = auth_client.post(
+        reverse("game-decisions", kwargs={"pk": story_game.id}),
+        data={"choices": choice_ids(story_game, "Go to 2"), "version": version},
+        format="json",
+    )
+
+    assert (response.status_code, response.json()) == (
+        status.HTTP_409_CONFLICT,
+        {"error": "The scenario has changed since it was downloaded"},
+    )
+
+
+@pytest.mark.django_db
+def test_game_make_decisions_single_update(story_game, django_assert_num_queries):
+    graph = scenario_graphs.get(story_game.scenario_id)
+    choices = [
+        graph.choices[uuid.UUID(choice_id)]
+        for choice_id in choice_ids(story_game, "Go to 3", "Go to 6")
+    ]
+
+    with django_assert_num_queries(1):
+        assert story_game.make_decisions(choices) is True
+
+    assert story_game.current_step.title == "step 6"
@@ -0,0 +1,150 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import reverse
+
+from gotale.events import game_events
+from gotale.graph import scenario_graphs
+from gotale.models import Game
+
+ROOT_STEP_ID = "01234567-89ab-cdef-0123-111111111111"
+CHILD_1_ID = "01234567-89ab-aaaa-0123-123000000001"
+CHILD_1_CHOICE = uuid.UUID("01234567-89ab-cdef-0123-000000000011")
+
+
+@pytest.fixture(autouse=True)
+def asgi_urls(settings):
+    settings.ROOT_URLCONF = "backend.asgi_urls"
+
+
+def parse_event(chunk: bytes) -> dict:
+    fields = dict(line.split(": ", 1) for line in chunk.decode().strip().split("\n"))
+    fields["data"] = json.loads(fields["data"])
+    return fields
+
+
+async def open_stream(pk, **headers):
+    return await AsyncClient().get(
+        reverse("game-events", kwargs={"pk": pk}), headers=headers
+    )
+
+
+async def move(game, choice_id):
+    game = await Game.objects.aget(pk=game.pk)
+    graph = await scenario_graphs.aget(game.scenario_id)
+    assert await game.amake_decision(graph.choices[choice_id]) is True
+
+
+@pytest.mark.django_db
+def test_game_events_stream(game_fixture):
+    async def stream():
+        response = await open_stream(game_fixture.id)
+        events = aiter(response.streaming_content)
+        chunks = [await asyncio.wait_for(anext(events), timeout=5)]
+        assert game_events.listeners(game_fixture.id) == 1
+
+        await move(game_fixture, CHILD_1_CHOICE)
+        async for chunk in events:
+            chunks.append(chunk)
+        return response, chunks
+
+    response, chunks = async_to_sync(stream)()
+
+    assert (response.status_code, response["Content-Type"]) == (
+        200,
+        "text/event-stream",
+    )
+    events = [parse_event(chunk) for chunk in chunks]
+    assert [(event["event"], event.get("id")) for event in events] == [
+        ("step", ROOT_STEP_ID),
+        ("step", CHILD_1_ID),
+        ("end", None),
+    ]
+    assert events[1]["data"]["title"] == "Child 1 (ended)"
+    assert events[2]["data"]["id"] == "1ede802f-d69b-41d5-b370-000000000000"
+    assert game_events.listeners(game_fixture.id) == 0
+
+
+@pytest.mark.django_db
+def test_game_events_stream_resumes_after_last_event(game_fixture, settings):
+    settings.GAME_EVENTS_KEEPALIVE = 0
+
+    async def first_chunk():
+        response = await open_stream(game_fixture.id, Last_Event_ID=ROOT_STEP_ID)
+        events = aiter(response.streaming_content)
+        try:
+            return await asyncio.wait_for(anext(events), timeout=5)
+        finally:
+            await events.aclose()
+
+    assert async_to_sync(first_chunk)() == b": keep-alive\n\n"
+
+
+@pytest.mark.django_db
+def test_game_events_moves_in_other_processes(game_fixture, settings):
+    settings.GAME_EVENTS_POLL_INTERVAL = 0.01
+
+    async def versions():
+        listener = game_events.listen(game_fixture.id)
+        first = await anext(listener)
+        # What publish() does in another process, without waking up listeners
+        await game_events.shared.aset(game_events.version_key(game_fixture.id), 1)
+        try:
+            return first, await asyncio.wait_for(anext(listener), timeout=5)
+        finally:
+            await listener.aclose()
+
+    first, second = async_to_sync(versions)()
+
+    assert (isinstance(first, int), second) == (True, 1)
+
+
+@pytest.mark.django_db
+def test_game_make_decision_publishes_on_commit(
+    game_fixture, scenario_fixture, mocker, django_capture_on_commit_callbacks
+):
+    publish = mocker.patch.object(game_events, "publish")
+    graph = scenario_graphs.get(scenario_fixture.id)
+    game = Game.objects.get(pk=game_fixture.pk)
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        game.make_decision(graph.choices[CHILD_1_CHOICE])
+        publish.assert_not_called()
+
+    assert len(callbacks) == 2  # History and the event
+    publish.assert_called_once_with(game.pk)
+
+
+@pytest.mark.parametrize(
+    "method, pk, expected_response",
+    (
+        pytest.param(
+            "post",
+            "1ede802f-d69b-41d5-b370-000000000000",
+            (405, {"detail": 'Method "POST" not allowed.'}),
+            id="not-allowed",
+        ),
+        pytest.param(
+            "get",
+            "1ede802f-d69b-41d5-b370-999999999999",
+            (404, {"detail": "No Game matches the given query."}),
+            id="game-dont-exist",
+        ),
+        pytest.param(
+            "get", "not-a-uuid", (404, {"detail": "Not found."}), id="invalid-game-id"
+        ),
+    ),
+)
+@pytest.mark.django_db
+def test_game_events_stream_errors(game_fixture, method, pk, expected_response):
+    async def request():
+        url = reverse("game-events", kwargs={"pk": pk})
+        return await getattr(AsyncClient(), method)(url)
+
+    response = async_to_sync(request)()
+
+    assert (response.status_code, response.json()) == expected_response
@@ -0,0 +1,95 @@
+import pytest
+from django.core.signals import request_finished
+from django.db import transaction
+
+from gotale.history import HistoryBuffer, history_buffer
+from gotale.models import Choice, History
+
+
+@pytest.fixture
+def choice_fixture(scenario_fixture):
+    return Choice.objects.select_related("step").get(
+        pk="01234567-89ab-cdef-0123-000000000011"
+    )
+
+
+@pytest.mark.django_db
+def test_make_decision_records_history_behind(
+    game_fixture, choice_fixture, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        assert game_fixture.make_decision(choice_fixture)
+
+    assert (len(history_buffer), History.objects.count()) == (1, 0)
+
+    request_finished.send(sender=None)
+
+    assert (len(history_buffer), History.objects.count()) == (0, 1)
+    assert list(History.objects.values("game", "choice", "step", "created_by")) == [
+        {
+            "game": game_fixture.id,
+            "choice": choice_fixture.id,
+            "step": choice_fixture.step_id,
+            "created_by": game_fixture.user_id,
+        }
+    ]
+
+
+@pytest.mark.django_db
+def test_make_decision_records_history_durable(game_fixture, choice_fixture):
+    assert game_fixture.make_decision(choice_fixture, durable=True)
+
+    assert (len(history_buffer), History.objects.count()) == (0, 1)
+
+
+@pytest.mark.django_db
+def test_history_buffer_durable_keeps_pending_entries(game_fixture):
+    buffer = HistoryBuffer(max_size=100, max_age=60)
+    buffer._append([History(game=game_fixture, created_by=game_fixture.user)])
+
+    # A durable write rolled back with its transaction
+    with pytest.raises(RuntimeError), transaction.atomic():
+        buffer.record(
+            History(game=game_fixture, created_by=game_fixture.user), durable=True
+        )
+        assert (len(buffer), History.objects.count()) == (1, 1)
+        raise RuntimeError
+
+    assert (len(buffer), History.objects.count()) == (1, 0)
+    assert buffer.flush() == 1
+
+
+@pytest.mark.django_db
+def test_history_buffer_flushes_in_batches(
+    game_fixture, choice_fixture, django_assert_num_queries
+):
+    buffer = HistoryBuffer(max_size=3, max_age=60)
+
+    def entry():
+        return History(
+            game=game_fixture,
+            choice=choice_fixture,
+            step=choice_fixture.step,
+            created_by_id=game_fixture.user_id,
+        )
+
+    with django_assert_num_queries(0):
+        buffer._append([entry()], flush_when_due=True)
+        buffer._append([entry()], flush_when_due=True)
+
+    with django_assert_num_queries(1):
+        buffer._append([entry()], flush_when_due=True)
+
+    assert (len(buffer), History.objects.count()) == (0, 3)
+
+
+@pytest.mark.django_db
+def test_history_buffer_flushes_old_entries(game_fixture, choice_fixture):
+    buffer = HistoryBuffer(max_size=100, max_age=0)
+
+    buffer._append(
+        [History(game=game_fixture, created_by=game_fixture.user)],
+        flush_when_due=True,
+    )
+
+    assert (len(buffer), History.objects.count()) == (0, 1)
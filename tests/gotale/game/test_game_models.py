@@ -0,0 +1,46 @@
+import pytest
+from django.core.exceptions import ValidationError
+
+from gotale.models import Choice, Game, GameStatus
+
+
+@pytest.mark.django_db
+def test_game_make_decision_single_update(game_fixture, django_assert_num_queries):
+    choice = Choice.objects.get(pk="01234567-89ab-cdef-0123-000000000022")
+    game = Game.objects.get(pk=game_fixture.pk)
+    game.make_decision(choice)  # Warm up the compiled scenario graph
+    Game.objects.filter(pk=game.pk).update(current_step=choice.step_id, end=None)
+    game.refresh_from_db()
+
+    with django_assert_num_queries(1):
+        assert game.make_decision(choice) is True
+
+    game.refresh_from_db()
+    assert (str(game.current_step_id), game.end is not None, game.status) == (
+        "01234567-89ab-aaaa-0123-123000000002",
+        True,
+        GameStatus.ENDED,
+    )
+
+
+@pytest.mark.django_db
+def test_game_make_decision_concurrent(game_fixture):
+    first = Game.objects.get(pk=game_fixture.pk)
+    second = Game.objects.get(pk=game_fixture.pk)
+    choices = Choice.objects.filter(step=game_fixture.current_step).order_by("text")
+
+    assert first.make_decision(choices[0]) is True
+    assert second.make_decision(choices[1]) is False
+
+    game = Game.objects.get(pk=game_fixture.pk)
+    assert (game.current_step_id, game.end is not None) == (choices[0].next_id, True)
+
+
+@pytest.mark.django_db
+def test_game_make_decision_errors(game_fixture):
+    choice = Choice.objects.get(pk="01234567-89ab-cdef-0123-000000000011")
+    game = Game.objects.get(pk=game_fixture.pk)
+    game.make_decision(choice)
+
+    with pytest.raises(ValidationError, match="Game is not active."):
+        game.make_decision(choice)
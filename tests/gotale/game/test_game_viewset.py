@@ -2,6 +2,8 @@ from unittest.mock import ANY
 from uuid import UUID
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from model_bakery import baker
 from rest_framework import status
@@ -194,7 +196,65 @@ def game_ended_fixture(games_fixture, scenario_fixture):
 def test_game_viewset_list_success(auth_client, games_fixture):
     response = auth_client.get(reverse("game-list"))
 
-    assert (response.status_code, response.json()) == (status.HTTP_200_OK, GAME_LIST)
+    assert (response.status_code, response.json()) == (
+        status.HTTP_200_OK,
+        {"next": None, "previous": None, "results": GAME_LIST},
+    )
+
+
+@pytest.mark.django_db
+def test_game_viewset_list_num_queries_flat(
+    auth_client, scenario_fixture, users_fixture
+):
+    def list_queries():
+        with CaptureQueriesContext(connection) as queries:
+            response = auth_client.get(reverse("game-list"))
+
+        assert response.status_code == status.HTTP_200_OK
+        return len(queries)
+
+    baker.make(
+        Game,
+        scenario=scenario_fixture,
+        current_step=scenario_fixture.root_step,
+        user=users_fixture[0],
+    )
+    queries_for_one_game = list_queries()
+
+    baker.make(
+        Game,
+        scenario=scenario_fixture,
+        current_step=scenario_fixture.root_step,
+        user=users_fixture[1],
+        _quantity=20,
+    )
+
+    assert list_queries() == queries_for_one_game
+
+
+@pytest.mark.django_db
+def test_game_viewset_retrieve_expand(auth_client, games_fixture):
+    with CaptureQueriesContext(connection) as queries:
+        response = auth_client.get(
+            reverse("game-detail", kwargs={"pk": games_fixture[0].id}),
+            data={"expand": "scenario"},
+        )
+
+    scenario = GAME_LIST[0]["scenario"]
+    assert (response.status_code, response.json()) == (
+        status.HTTP_200_OK,
+        {
+            "id": GAME_LIST[0]["id"],
+            "current_step": GAME_LIST[0]["current_step"]["id"],
+            "user": USER_LIST[0]["id"],
+            "scenario": {
+                **scenario,
+                "created_by": USER_LIST[0]["id"],
+                "root_step": scenario["root_step"]["id"],
+            },
+        },
+    )
+    assert not any("choice" in query["sql"] for query in queries)
 
 
 @pytest.mark.django_db
@@ -476,3 +536,20 @@ def test_game_viewset_current_step_post_errors(
     )
     # TODO: check with db that changes were not made
     # assert Game.objects.get(id=pk) == games_fixture
+
+
+@pytest.mark.django_db
+def test_game_viewset_current_step_post_conflict(auth_client, games_fixture, mocker):
+    mocker.patch.object(Game, "make_decision", return_value=False)
+
+    response = auth_client.post(
+        reverse("game-current-step", kwargs={"pk": games_fixture[0].id}),
+        data={
+            "choice": "01234567-89ab-cdef-0123-000000000011",
+        },
+    )
+
+    assert (response.status_code, response.json()) == (
+        status.HTTP_409_CONFLICT,
+        {"error": "The game has already moved to another step"},
+    )
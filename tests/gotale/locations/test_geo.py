@@ -0,0 +1,101 @@
+import pytest
+
+from gotale.geo import (
+    bounding_box,
+    geohash_cells,
+    geohash_encode,
+    geohash_successor,
+    haversine_distances,
+)
+
+
+def test_haversine_distances():
+    assert haversine_distances(0, 0, [(0, 0), (0, 1), (1, 0), (0, 180)]) == [
+        0.0,
+        pytest.approx(111_195, abs=1),
+        pytest.approx(111_195, abs=1),
+        pytest.approx(20_015_115, abs=1),
+    ]
+
+
+@pytest.mark.parametrize(
+    "latitude, longitude, radius, expected",
+    (
+        pytest.param(
+            0,
+            0,
+            111_195,
+            (
+                pytest.approx(-1),
+                pytest.approx(1),
+                [(pytest.approx(-1), pytest.approx(1))],
+            ),
+            id="equator",
+        ),
+        pytest.param(
+            0,
+            179.5,
+            111_195,
+            (
+                pytest.approx(-1),
+                pytest.approx(1),
+                [(pytest.approx(178.5), 180.0), (-180.0, pytest.approx(-179.5))],
+            ),
+            id="antimeridian",
+        ),
+        pytest.param(
+            89.5,
+            0,
+            111_195,
+            (pytest.approx(88.5), 90.0, [(-180.0, 180.0)]),
+            id="pole",
+        ),
+    ),
+)
+def test_bounding_box(latitude, longitude, radius, expected):
+    assert bounding_box(latitude, longitude, radius) == expected
+
+
+def test_geohash_encode():
+    assert geohash_encode(57.64911, 10.40744, precision=11) == "u4pruydqqvj"
+
+
+def test_geohash_successor():
+    assert [geohash_successor(prefix) for prefix in ("u4p", "u4z", "zz")] == [
+        "u4q",
+        "u5",
+        None,
+    ]
+
+
+@pytest.mark.parametrize(
+    "latitude, longitude, radius",
+    (
+        pytest.param(52.2297, 21.0122, 500, id="city"),
+        pytest.param(0.0001, 179.9999, 20_000, id="antimeridian"),
+        pytest.param(-33.8688, 151.2093, 300_000, id="region"),
+    ),
+)
+def test_geohash_cells_cover_circle(latitude, longitude, radius):
+    cells = geohash_cells(latitude, longitude, radius)
+    min_latitude, max_latitude, longitude_ranges = bounding_box(
+        latitude, longitude, radius
+    )
+
+    edges = [(min_latitude, longitude), (max_latitude, longitude)] + [
+        (latitude, edge) for edge_range in longitude_ranges for edge in edge_range
+    ]
+    for edge_latitude, edge_longitude in edges:
+        edge_longitude = max(-180, min(edge_longitude, 179.999999))
+        geohash = geohash_encode(edge_latitude, edge_longitude)
+        if (
+            haversine_distances(latitude, longitude, [(edge_latitude, edge_longitude)])[
+                0
+            ]
+            <= radius
+        ):
+            assert any(geohash.startswith(cell) for cell in cells)
+
+
+def test_geohash_cells_too_large():
+    assert geohash_cells(0, 0, 6_000_000) is None
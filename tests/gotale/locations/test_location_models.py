@@ -1,6 +1,12 @@
+from importlib import import_module
+from io import StringIO
+
 import pytest
+from django.apps import apps
+from django.core.management import call_command
 from model_bakery import baker
 
+from gotale.geo import geohash_encode
 from gotale.models import Location
 
 
@@ -12,3 +18,51 @@ def location_fixture():
 @pytest.mark.django_db
 def test_location_str(location_fixture):
     assert str(location_fixture) == "Nazwa"
+
+
+@pytest.mark.django_db
+def test_location_geohash_on_save_and_bulk_create(users_fixture):
+    location = baker.make(
+        Location, latitude=57.64911, longitude=10.40744, created_by=users_fixture[0]
+    )
+    [bulk_location] = Location.objects.bulk_create(
+        [
+            baker.prepare(
+                Location,
+                latitude=-33.8688,
+                longitude=151.2093,
+                created_by=users_fixture[0],
+            )
+        ]
+    )
+
+    assert Location.objects.get(pk=location.pk).geohash == "u4pruydqqvj8"
+    assert Location.objects.get(pk=bulk_location.pk).geohash.startswith("r3gx2")
+
+
+@pytest.mark.django_db
+def test_backfill_geohash_command(users_fixture):
+    baker.make(Location, created_by=users_fixture[0], _quantity=5)
+    Location.objects.update(geohash="")
+
+    call_command("backfill_geohash", "--batch-size", "2", stdout=StringIO())
+
+    assert not Location.objects.filter(geohash="").exists()
+    for location in Location.objects.all():
+        assert location.geohash == geohash_encode(
+            float(location.latitude), float(location.longitude)
+        )
+
+
+@pytest.mark.django_db
+def test_location_geohash_migration_backfill(users_fixture):
+    baker.make(Location, created_by=users_fixture[0], _quantity=5)
+    Location.objects.update(geohash="")
+    migration = import_module("gotale.migrations.0004_location_geohash")
+
+    migration.backfill_geohash(apps, None, batch_size=2)
+
+    for location in Location.objects.all():
+        assert location.geohash == geohash_encode(
+            float(location.latitude), float(location.longitude)
+        )
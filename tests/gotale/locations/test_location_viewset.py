@@ -1,6 +1,8 @@
 from unittest.mock import ANY
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from model_bakery import baker
 from rest_framework import status
@@ -149,7 +151,7 @@ def test_locations_viewset_list(anon_client, locations_fixture):
 
     assert (response.status_code, response.json()) == (
         status.HTTP_200_OK,
-        LOCATION_LIST,
+        {"next": None, "previous": None, "results": LOCATION_LIST},
     )
 
 
@@ -458,3 +460,215 @@ def test_locations_viewset_destroy_errors(
 #     url = reverse("location-detail", kwargs={"pk": location.pk})
 #     response = auth_client1.delete(url)
 #     assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_locations_viewset_nearby_success(anon_client, locations_fixture):
+    response = anon_client.get(
+        reverse("location-nearby"), data={"lat": 1, "lon": 1, "radius": 200_000}
+    )
+
+    assert (response.status_code, response.json()) == (
+        status.HTTP_200_OK,
+        [
+            LOCATION_LIST[0] | {"distance": 0.0},
+            LOCATION_LIST[1] | {"distance": pytest.approx(157_226, abs=1)},
+        ],
+    )
+
+
+@pytest.mark.django_db
+def test_locations_viewset_nearby_limit(anon_client, locations_fixture):
+    response = anon_client.get(
+        reverse("location-nearby"),
+        data={"lat": 3.1, "lon": 3.1, "radius": 1_000_000, "limit": 2},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [location["title"] for location in response.json()] == [
+        "Location 3",
+        "Location 2",
+    ]
+
+
+@pytest.mark.parametrize(
+    "params, expected_response",
+    (
+        pytest.param(
+            {},
+            {
+                "lat": ["This field is required."],
+                "lon": ["This field is required."],
+            },
+            id="missing_coordinates",
+        ),
+        pytest.param(
+            {"lat": 91, "lon": 0, "radius": -1},
+            {
+                "lat": ["Ensure this value is less than or equal to 90."],
+                "radius": ["Ensure this value is greater than or equal to 0."],
+            },
+            id="out_of_range",
+        ),
+    ),
+)
+@pytest.mark.django_db
+def test_locations_viewset_nearby_errors(anon_client, params, expected_response):
+    response = anon_client.get(reverse("location-nearby"), data=params)
+
+    assert (response.status_code, response.json()) == (
+        status.HTTP_400_BAD_REQUEST,
+        expected_response,
+    )
+
+
+@pytest.mark.parametrize(
+    "bbox, expected_titles",
+    (
+        pytest.param("1.5,1.5,3.5,3.5", ["Location 2", "Location 3"], id="inside"),
+        pytest.param("179,-90,2.5,2.5", ["Location 1", "Location 2"], id="wrapped"),
+        pytest.param("10,10,20,20", [], id="empty"),
+    ),
+)
+@pytest.mark.django_db
+def test_locations_viewset_list_bbox(
+    anon_client, locations_fixture, bbox, expected_titles
+):
+    response = anon_client.get(reverse("location-list"), data={"bbox": bbox})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [
+        location["title"] for location in response.json()["results"]
+    ] == expected_titles
+
+
+@pytest.mark.parametrize(
+    "bbox",
+    (
+        pytest.param("1,2,3", id="too_short"),
+        pytest.param("a,b,c,d", id="not_numbers"),
+        pytest.param("0,10,1,5", id="inverted_latitude"),
+    ),
+)
+@pytest.mark.django_db
+def test_locations_viewset_list_bbox_errors(anon_client, bbox):
+    response = anon_client.get(reverse("location-list"), data={"bbox": bbox})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_locations_viewset_list_cursor_pages(anon_client, locations_fixture):
+    response = anon_client.get(reverse("location-list"), data={"page_size": 2})
+    first_page = response.json()
+
+    assert (response.status_code, first_page["previous"], first_page["results"]) == (
+        status.HTTP_200_OK,
+        None,
+        LOCATION_LIST[:2],
+    )
+
+    response = anon_client.get(first_page["next"])
+    second_page = response.json()
+
+    assert (response.status_code, second_page["next"], second_page["results"]) == (
+        status.HTTP_200_OK,
+        None,
+        LOCATION_LIST[2:],
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "url_name, detail",
+    [
+        pytest.param("location-list", False, id="list"),
+        pytest.param("location-detail", True, id="retrieve"),
+    ],
+)
+def test_locations_viewset_conditional_requests(
+    anon_client, locations_fixture, url_name, detail
+):
+    url = reverse(url_name, kwargs={"pk": locations_fixture[0].pk} if detail else None)
+    response = anon_client.get(url)
+    etag = response.headers["ETag"]
+
+    assert response.status_code == status.HTTP_200_OK
+
+    response = anon_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert (response.status_code, response.content) == (
+        status.HTTP_304_NOT_MODIFIED,
+        b"",
+    )
+    assert response.headers["ETag"] == etag
+
+    response = anon_client.get(url, {"fields": "id"}, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == status.HTTP_200_OK
+
+    location = Location.objects.get(pk=locations_fixture[0].pk)
+    location.title = "Renamed"
+    location.save()
+    response = anon_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["ETag"] != etag
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "url_name, detail, expected_status",
+    [
+        # Deletes don't move the latest modification time of a list
+        pytest.param("location-list", False, status.HTTP_200_OK, id="list"),
+        pytest.param(
+            "location-detail", True, status.HTTP_304_NOT_MODIFIED, id="retrieve"
+        ),
+    ],
+)
+def test_locations_viewset_if_modified_since(
+    anon_client, locations_fixture, url_name, detail, expected_status
+):
+    url = reverse(url_name, kwargs={"pk": locations_fixture[0].pk} if detail else None)
+    response = anon_client.get(url)
+
+    assert ("Last-Modified" in response.headers) == detail
+
+    response = anon_client.get(
+        url, HTTP_IF_MODIFIED_SINCE="Fri, 01 Jan 2100 00:00:00 GMT"
+    )
+
+    assert response.status_code == expected_status
+
+
+@pytest.mark.django_db
+def test_locations_viewset_list_etag_changes_on_delete(anon_client, locations_fixture):
+    url = reverse("location-list")
+    etag = anon_client.get(url).headers["ETag"]
+
+    Location.objects.filter(pk=locations_fixture[1].pk).delete()
+    response = anon_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["ETag"] != etag
+
+
+@pytest.mark.django_db
+def test_locations_viewset_list_etag_reads_page(anon_client, locations_fixture):
+    url = reverse("location-list")
+    etag = anon_client.get(url, {"page_size": 2}).headers["ETag"]
+
+    with CaptureQueriesContext(connection) as queries:
+        response = anon_client.get(url, {"page_size": 2}, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    # Only the rows of the page, rather than an aggregate over the table
+    assert [query["sql"].endswith("LIMIT 3") for query in queries] == [True]
+
+    # Rows past the page only change its next link
+    Location.objects.filter(pk=locations_fixture[2].pk).delete()
+    response = anon_client.get(url, {"page_size": 2}, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["next"] is None
@@ -0,0 +1,159 @@
+import gzip
+import json
+
+import pytest
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework import status
+
+from gotale import bundle
+from gotale.bundle import negotiate_coding
+from gotale.graph import scenario_graphs
+from gotale.models import Location, Step
+
+BUNDLE_STEPS = {
+    "01234567-89ab-cdef-0123-111111111111": {
+        "id": "01234567-89ab-cdef-0123-111111111111",
+        "title": "Root Step",
+        "description": None,
+        "location": None,
+        "choices": [
+            {
+                "id": "01234567-89ab-cdef-0123-000000000011",
+                "text": "Go to child 1",
+                "next": "01234567-89ab-aaaa-0123-123000000001",
+            },
+            {
+                "id": "01234567-89ab-cdef-0123-000000000022",
+                "text": "Go to child 2",
+                "next": "01234567-89ab-aaaa-0123-123000000002",
+            },
+        ],
+    },
+    "01234567-89ab-aaaa-0123-123000000001": {
+        "id": "01234567-89ab-aaaa-0123-123000000001",
+        "title": "Child 1 (ended)",
+        "description": None,
+        "location": None,
+        "choices": [],
+    },
+}
+
+
+def get_bundle(client, scenario_id, **headers):
+    return client.get(
+        reverse("scenario-bundle", kwargs={"pk": scenario_id}), headers=headers
+    )
+
+
+@pytest.mark.django_db
+def test_scenario_viewset_bundle(anon_client, scenario_fixture):
+    response = get_bundle(anon_client, scenario_fixture.id)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert "Content-Encoding" not in response
+    data = json.loads(response.content)
+    version = str(scenario_graphs.get(scenario_fixture.id).version)
+    assert {key: value for key, value in data.items() if key != "steps"} == {
+        "id": "01234567-89ab-cdef-0123-000000000000",
+        "version": version,
+        "title": "Test Scenario",
+        "description": "Test Description",
+        "root_step": "01234567-89ab-cdef-0123-111111111111",
+        "locations": [],
+    }
+    steps = {step["id"]: step for step in data["steps"]}
+    assert len(steps) == 3
+    assert {step_id: steps[step_id] for step_id in BUNDLE_STEPS} == BUNDLE_STEPS
+    assert response["ETag"] == f'"{version}-identity"'
+
+
+@pytest.mark.django_db
+def test_scenario_viewset_bundle_gzip(anon_client, scenario_fixture):
+    plain = get_bundle(anon_client, scenario_fixture.id)
+
+    response = get_bundle(
+        anon_client, scenario_fixture.id, Accept_Encoding="gzip, deflate"
+    )
+
+    assert response["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response["Vary"]
+    assert gzip.decompress(response.content) == plain.content
+    assert response["ETag"] != plain["ETag"]
+
+
+@pytest.mark.django_db
+def test_scenario_viewset_bundle_brotli(anon_client, scenario_fixture):
+    brotli = pytest.importorskip("brotli")
+    plain = get_bundle(anon_client, scenario_fixture.id)
+
+    response = get_bundle(anon_client, scenario_fixture.id, Accept_Encoding="br, gzip")
+
+    assert response["Content-Encoding"] == "br"
+    assert brotli.decompress(response.content) == plain.content
+
+
+@pytest.mark.django_db
+def test_scenario_viewset_bundle_not_modified(
+    anon_client, scenario_fixture, django_assert_num_queries
+):
+    etag = get_bundle(anon_client, scenario_fixture.id)["ETag"]
+
+    # The scenario lookup only, the graph is cached
+    with django_assert_num_queries(1):
+        response = get_bundle(anon_client, scenario_fixture.id, If_None_Match=etag)
+
+    assert (response.status_code, response.content) == (
+        status.HTTP_304_NOT_MODIFIED,
+        b"",
+    )
+
+
+# Scenarios are invalidated once the change commits
+@pytest.mark.django_db(transaction=True)
+def test_scenario_viewset_bundle_versioned(
+    anon_client, scenario_fixture, users_fixture
+):
+    location = baker.make(
+        Location,
+        title="Old Town",
+        latitude="52.229700",
+        longitude="21.012200",
+        created_by=users_fixture[0],
+    )
+    Step.objects.filter(pk=scenario_fixture.root_step_id).update(location=location)
+    first = get_bundle(anon_client, scenario_fixture.id)
+
+    location.title = "New Town"
+    location.save()
+    second = get_bundle(anon_client, scenario_fixture.id)
+
+    assert first["ETag"] != second["ETag"]
+    assert [
+        json.loads(response.content)["locations"][0]["title"]
+        for response in (first, second)
+    ] == ["Old Town", "New Town"]
+
+
+@pytest.mark.django_db
+def test_scenario_viewset_bundle_not_found(anon_client):
+    response = get_bundle(anon_client, "01234567-89ab-cdef-0123-000000000001")
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, brotli_installed, expected",
+    (
+        pytest.param("", True, None, id="none"),
+        pytest.param("gzip, deflate, br", True, "br", id="brotli_preferred"),
+        pytest.param("gzip, deflate, br", False, "gzip", id="brotli_missing"),
+        pytest.param("br;q=0, GZIP;q=0.5", True, "gzip", id="quality"),
+        pytest.param("identity, deflate", True, None, id="unsupported"),
+    ),
+)
+def test_negotiate_coding(monkeypatch, accept_encoding, brotli_installed, expected):
+    compress = (lambda content: content) if brotli_installed else None
+    monkeypatch.setitem(bundle.COMPRESSORS, "br", compress)
+
+    assert negotiate_coding(accept_encoding) == expected
@@ -0,0 +1,190 @@
+import json
+from unittest.mock import ANY
+
+import pytest
+from django.db import connection
+from django.http import StreamingHttpResponse
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework import status
+
+from gotale.models import Location, Scenario, Step
+
+EXPORTED_SCENARIO = {
+    "title": "Test Scenario",
+    "description": "Test Description",
+    "locations": [],
+    "steps": [
+        {
+            "id": "01234567-89ab-aaaa-0123-123000000001",
+            "title": "Child 1 (ended)",
+            "description": None,
+            "location": None,
+            "choices": [],
+        },
+        {
+            "id": "01234567-89ab-aaaa-0123-123000000002",
+            "title": ANY,
+            "description": None,
+            "location": None,
+            "choices": [],
+        },
+        {
+            "id": "01234567-89ab-cdef-0123-111111111111",
+            "title": "Root Step",
+            "description": None,
+            "location": None,
+            "choices": [
+                {
+                    "text": "Go to child 1",
+                    "next": "01234567-89ab-aaaa-0123-123000000001",
+                },
+                {
+                    "text": "Go to child 2",
+                    "next": "01234567-89ab-aaaa-0123-123000000002",
+                },
+            ],
+        },
+    ],
+}
+
+
+def export(client, scenario_id, **params):
+    response = client.get(
+        reverse("scenario-export", kwargs={"pk": scenario_id}), params
+    )
+    assert isinstance(response, StreamingHttpResponse)
+    return response, b"".join(response.streaming_content)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("chunk_size", [1, 2000])
+def test_scenario_viewset_export(anon_client, scenario_fixture, settings, chunk_size):
+    settings.SCENARIO_EXPORT_CHUNK_SIZE = chunk_size
+
+    response, content = export(anon_client, scenario_fixture.id)
+
+    assert (response.status_code, json.loads(content)) == (
+        status.HTTP_200_OK,
+        EXPORTED_SCENARIO,
+    )
+    assert response["Content-Type"] == "application/json"
+    assert response["Content-Disposition"] == (
+        f'attachment; filename="scenario-{scenario_fixture.id}.json"'
+    )
+
+
+@pytest.mark.django_db
+def test_scenario_viewset_export_locations(
+    anon_client, scenario_fixture, users_fixture
+):
+    location = baker.make(
+        Location,
+        id="01234567-89ab-cdef-0123-555555555555",
+        title="Old Town",
+        description="",
+        latitude="52.229700",
+        longitude="21.012200",
+        created_by=users_fixture[0],
+    )
+    Step.objects.filter(scenario=scenario_fixture).update(location=location)
+
+    _, content = export(anon_client, scenario_fixture.id)
+
+    exported = json.loads(content)
+    assert exported["locations"] == [
+        {
+            "id": "01234567-89ab-cdef-0123-555555555555",
+            "title": "Old Town",
+            "description": "",
+            "latitude": "52.229700",
+            "longitude": "21.012200",
+        }
+    ]
+    assert {step["location"] for step in exported["steps"]} == {location.id}
+
+
+@pytest.mark.django_db
+def test_scenario_viewset_export_ndjson(auth_client, scenario_fixture):
+    response, content = export(auth_client, scenario_fixture.id, format="ndjson")
+
+    assert response["Content-Type"] == "application/x-ndjson"
+    assert content.count(b"\n") == 1 and content.endswith(b"\n")
+
+    response = auth_client.post(
+        reverse("scenario-bulk-import"),
+        data=content + content,
+        content_type="application/x-ndjson",
+    )
+
+    assert response.json() | {"results": ANY} == {
+        "created": 2,
+        "failed": 0,
+        "results": ANY,
+    }
+
+
+@pytest.mark.django_db
+def test_scenario_viewset_export_round_trip(auth_client, scenario_fixture):
+    _, content = export(auth_client, scenario_fixture.id)
+
+    response = auth_client.post(
+        reverse("scenario-list"), data=content, content_type="application/json"
+    )
+
+    assert response.status_code == status.HTTP_201_CREATED
+    copy = Scenario.objects.get(pk=response.json()["id"])
+    assert copy.root_step.title == "Root Step"
+    _, copy_content = export(auth_client, copy.id)
+    # Same graph under new ids
+    assert _without_ids(json.loads(copy_content)) == _without_ids(json.loads(content))
+
+
+@pytest.mark.django_db
+def test_scenario_viewset_export_update_unchanged(admin_client, scenario_fixture):
+    _, content = export(admin_client, scenario_fixture.id)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = admin_client.put(
+            reverse("scenario-detail", kwargs={"pk": scenario_fixture.id}),
+            data=content,
+            content_type="application/json",
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    writes = [
+        query["sql"]
+        for query in queries
+        if query["sql"].startswith(("INSERT", "UPDATE", "DELETE"))
+    ]
+    # Only the scenario itself is saved
+    assert len(writes) == 1 and writes[0].startswith('UPDATE "gotale_scenario"')
+
+
+@pytest.mark.django_db
+def test_scenario_viewset_export_not_found(anon_client):
+    response = anon_client.get(
+        reverse(
+            "scenario-export", kwargs={"pk": "01234567-89ab-cdef-0123-000000000001"}
+        )
+    )
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def _without_ids(exported: dict) -> dict:
+    titles = {step["id"]: step["title"] for step in exported["steps"]}
+    return {
+        "title": exported["title"],
+        "steps": sorted(
+            (
+                step["title"],
+                sorted(
+                    (choice["text"], titles[choice["next"]])
+                    for choice in step["choices"]
+                ),
+            )
+            for step in exported["steps"]
+        ),
+    }
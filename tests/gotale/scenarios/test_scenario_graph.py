@@ -0,0 +1,200 @@
+from uuid import UUID
+
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+
+from gotale.graph import ScenarioGraphCache, scenario_graphs
+from gotale.models import Choice, Game, Scenario, Step
+from gotale.serializers import ScenarioCreateSerializer, StepSerializer
+
+
+@pytest.mark.django_db
+def test_compiled_steps_match_step_serializer(scenario_fixture):
+    graph = scenario_graphs.get(scenario_fixture.id)
+
+    assert graph.root_step_id == UUID(scenario_fixture.root_step.id)
+    assert len(graph.steps) == 3
+    for step in Step.objects.filter(scenario=scenario_fixture):
+        expected = JSONRenderer().render(StepSerializer(step).data)
+        assert JSONRenderer().render(graph.steps[step.id].as_data()) == expected
+        assert graph.payloads[step.id] == expected
+
+
+@pytest.mark.django_db
+def test_scenario_graph_cache_is_bounded(scenario_fixture, users_fixture):
+    other_scenario = baker.make(Scenario, created_by=users_fixture[0])
+    cache = ScenarioGraphCache(maxsize=1)
+
+    cache.get(scenario_fixture.id)
+    cache.get(other_scenario.id)
+
+    assert (len(cache), scenario_fixture.id in cache, other_scenario.id in cache) == (
+        1,
+        False,
+        True,
+    )
+
+
+# Scenarios are invalidated once the change commits
+@pytest.mark.django_db(transaction=True)
+def test_scenario_graph_invalidated_on_modification(scenario_fixture):
+    root_step = scenario_fixture.root_step
+    scenario_graphs.get(scenario_fixture.id)
+
+    root_step.title = "Renamed"
+    root_step.save()
+
+    assert scenario_fixture.id not in scenario_graphs
+    graph = scenario_graphs.get(scenario_fixture.id)
+    assert graph.steps[UUID(root_step.id)].title == "Renamed"
+
+    Scenario.objects.get(pk=scenario_fixture.id).delete()
+
+    assert scenario_fixture.id not in scenario_graphs
+
+
+def make_large_scenario(user, size: int = 200) -> Scenario:
+    """Steps in a chain, each with a second choice skipping to the end."""
+    steps = [
+        {
+            "id": index,
+            "title": f"step {index}",
+            "choices": [
+                {"text": "next", "next": index + 1},
+                {"text": "skip", "next": size - 1},
+            ],
+        }
+        for index in range(1, size - 1)
+    ]
+    steps.insert(0, {"id": 0, "title": "root", "choices": [{"text": "go", "next": 1}]})
+    steps.append({"id": size - 1, "title": "end", "choices": []})
+    serializer = ScenarioCreateSerializer(
+        data={"title": "Large", "description": "", "steps": steps}
+    )
+    serializer.is_valid(raise_exception=True)
+    return serializer.save(created_by=user)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_scenario_graph_invalidated_on_commit(scenario_fixture):
+    version = scenario_graphs.get(scenario_fixture.id).version
+
+    with transaction.atomic():
+        Step.objects.filter(pk=scenario_fixture.root_step_id).update(title="Renamed")
+        Step.objects.get(pk=scenario_fixture.root_step_id).save()
+        # Compiled in the meantime, the graph would be cached as the new version
+        assert scenario_graphs.get_version(scenario_fixture.id) == version
+
+    graph = scenario_graphs.get(scenario_fixture.id)
+    assert (graph.version != version, graph.steps[graph.root_step_id].title) == (
+        True,
+        "Renamed",
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_scenario_delete_cascade_writes(users_fixture):
+    scenario = make_large_scenario(users_fixture[0])
+    scenario_id = scenario.id
+    version = scenario_graphs.get(scenario_id).version
+
+    with CaptureQueriesContext(connection) as queries:
+        scenario.delete()
+
+    # No per-row handler work on rows deleted along with the scenario, only
+    # the cascade itself
+    assert not [
+        query["sql"]
+        for query in queries
+        if query["sql"].startswith(('UPDATE "gotale_step"', 'UPDATE "gotale_scenario"'))
+    ]
+    assert len(queries) < 20
+    assert scenario_graphs.get_version(scenario_id) != version
+
+
+@pytest.mark.django_db(transaction=True)
+def test_step_delete_adjusts_remaining_steps(users_fixture):
+    scenario = make_large_scenario(users_fixture[0], size=4)
+    step_2 = Step.objects.get(scenario=scenario, title="step 2")
+    modified_at = Scenario.objects.get(pk=scenario.pk).modified_at
+
+    with CaptureQueriesContext(connection) as queries:
+        step_2.delete()
+
+    # The choice leading to it is deleted from step 1, which is kept
+    assert dict(
+        Step.objects.filter(scenario=scenario).values_list("title", "choices_count")
+    ) == {"root": 1, "step 1": 1, "end": 0}
+    assert Choice.objects.filter(step__scenario=scenario).count() == 2
+    assert Scenario.objects.get(pk=scenario.pk).modified_at > modified_at
+    # The scenario is touched once, after the commit
+    assert [query["sql"] for query in queries][-1].startswith(
+        'UPDATE "gotale_scenario"'
+    )
+
+
+@pytest.mark.django_db
+def test_game_step_reads_only_game_row(
+    auth_client, scenario_fixture, users_fixture, django_assert_num_queries
+):
+    game = baker.make(
+        Game,
+        scenario=scenario_fixture,
+        current_step=scenario_fixture.root_step,
+        user=users_fixture[0],
+    )
+    url = reverse("game-current-step", kwargs={"pk": game.id})
+    scenario_graphs.get(scenario_fixture.id)
+
+    with django_assert_num_queries(1):
+        response = auth_client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+
+    # Select the game and update it, nothing else
+    with django_assert_num_queries(2):
+        response = auth_client.post(
+            url, data={"choice": "01234567-89ab-cdef-0123-000000000011"}
+        )
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_scenario_graph_shared_between_workers(
+    scenario_fixture, django_assert_num_queries
+):
+    worker = ScenarioGraphCache(maxsize=8, alias=scenario_graphs.alias)
+    other_worker = ScenarioGraphCache(maxsize=8, alias=scenario_graphs.alias)
+    graph = worker.get(scenario_fixture.id)
+
+    with django_assert_num_queries(0):
+        assert other_worker.get(scenario_fixture.id) == graph
+
+    # Modifications are seen by every worker through the version counter
+    Step.objects.filter(pk=scenario_fixture.root_step.id).update(title="Renamed")
+    worker.invalidate(scenario_fixture.id)
+
+    graph = other_worker.get(scenario_fixture.id)
+    assert graph.steps[UUID(scenario_fixture.root_step.id)].title == "Renamed"
+
+
+@pytest.mark.django_db
+def test_scenario_graph_file_based_backend(
+    scenario_fixture, settings, tmp_path, django_assert_num_queries
+):
+    settings.CACHES = settings.CACHES | {
+        "scenarios-file": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": str(tmp_path),
+        }
+    }
+    worker = ScenarioGraphCache(maxsize=8, alias="scenarios-file")
+    other_worker = ScenarioGraphCache(maxsize=8, alias="scenarios-file")
+    graph = worker.get(scenario_fixture.id)
+
+    with django_assert_num_queries(0):
+        assert other_worker.get(scenario_fixture.id) == graph
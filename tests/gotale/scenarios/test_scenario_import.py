@@ -0,0 +1,138 @@
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from gotale.models import Choice, Scenario, Step
+from tests.gotale.scenarios.test_scenario_viewset import SCENARIO_CREATE_PAYLOAD
+
+# Root step listed last, so it isn't picked by position
+REVERSED_PAYLOAD = SCENARIO_CREATE_PAYLOAD | {
+    "title": "Reversed",
+    "steps": SCENARIO_CREATE_PAYLOAD["steps"][::-1],
+}
+INVALID_PAYLOAD = {"title": "Invalid", "description": "", "steps": []}
+
+
+def assert_imported(scenario_id, title):
+    scenario = Scenario.objects.get(pk=scenario_id)
+
+    assert (scenario.title, scenario.root_step.title) == (title, "step 1")
+    assert sorted(
+        Step.objects.filter(scenario=scenario).values_list("title", "choices_count")
+    ) == [
+        ("step 1", 2),
+        ("step 2", 2),
+        ("step 3", 1),
+        ("step 4", 0),
+        ("step 5", 0),
+        ("step 6", 0),
+    ]
+    assert Choice.objects.filter(step__scenario=scenario).count() == 5
+    assert not Choice.objects.filter(step__scenario=scenario).exclude(
+        next__scenario=scenario
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "content_type, body",
+    [
+        pytest.param(
+            "application/json",
+            json.dumps([SCENARIO_CREATE_PAYLOAD, INVALID_PAYLOAD, REVERSED_PAYLOAD]),
+            id="json_array",
+        ),
+        pytest.param(
+            "application/x-ndjson",
+            "\n".join(
+                json.dumps(payload)
+                for payload in (
+                    SCENARIO_CREATE_PAYLOAD,
+                    INVALID_PAYLOAD,
+                    REVERSED_PAYLOAD,
+                )
+            ),
+            id="ndjson",
+        ),
+    ],
+)
+def test_scenario_viewset_bulk_import_success(
+    auth_client, users_fixture, content_type, body
+):
+    response = auth_client.post(
+        reverse("scenario-bulk-import"), data=body, content_type=content_type
+    )
+    data = response.json()
+
+    assert (response.status_code, data) == (
+        status.HTTP_200_OK,
+        {
+            "created": 2,
+            "failed": 1,
+            "results": [
+                {"index": 0, "id": data["results"][0]["id"]},
+                {
+                    "index": 1,
+                    "errors": {"steps": ["A scenario must have at least one step."]},
+                },
+                {"index": 2, "id": data["results"][2]["id"]},
+            ],
+        },
+    )
+    assert_imported(data["results"][0]["id"], "Time Travel Adventure")
+    assert_imported(data["results"][2]["id"], "Reversed")
+    assert Scenario.objects.filter(created_by=users_fixture[0]).count() == 2
+
+
+@pytest.mark.django_db
+def test_scenario_viewset_bulk_import_malformed(auth_client, users_fixture):
+    body = json.dumps([SCENARIO_CREATE_PAYLOAD])[:-1] + ", {]"
+
+    response = auth_client.post(
+        reverse("scenario-bulk-import"), data=body, content_type="application/json"
+    )
+
+    assert (response.status_code, response.json()["results"]) == (
+        status.HTTP_200_OK,
+        [
+            {"index": 0, "id": response.json()["results"][0]["id"]},
+            {
+                "index": 1,
+                "errors": {
+                    "non_field_errors": [
+                        "Invalid JSON: Expecting property name enclosed in double quotes."
+                    ]
+                },
+            },
+        ],
+    )
+
+
+@pytest.mark.django_db
+def test_scenario_viewset_bulk_import_chunks(auth_client, users_fixture, settings):
+    settings.SCENARIO_IMPORT_CHUNK_SIZE = 2
+
+    with CaptureQueriesContext(connection) as queries:
+        response = auth_client.post(
+            reverse("scenario-bulk-import"),
+            data=json.dumps([SCENARIO_CREATE_PAYLOAD] * 5),
+            content_type="application/json",
+        )
+
+    assert response.json()["created"] == 5
+    inserts = [query["sql"] for query in queries if query["sql"].startswith("INSERT")]
+    # One insert per table for each of the 3 chunks
+    assert len(inserts) == 9
+
+
+@pytest.mark.django_db
+def test_scenario_viewset_bulk_import_anonymous(anon_client):
+    response = anon_client.post(
+        reverse("scenario-bulk-import"), data="[]", content_type="application/json"
+    )
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -1,4 +1,7 @@
 import pytest
+from model_bakery import baker
+
+from gotale.models import Choice, Game, GameStatus
 
 
 @pytest.mark.django_db
@@ -18,3 +21,36 @@ def test_choice_str(scenario_fixture):
     choice = scenario_fixture.root_step.choices.all()[0]
 
     assert str(choice) == choice.text
+
+
+@pytest.mark.django_db
+def test_step_choices_count_follows_choices(scenario_fixture):
+    root_step = scenario_fixture.root_step
+    child_step = root_step.choices.all()[0].next
+
+    assert (root_step.choices_count, root_step.is_last_step()) == (2, False)
+    assert (child_step.choices_count, child_step.is_last_step()) == (0, True)
+
+    choice = baker.make(Choice, step=child_step, next=root_step)
+    child_step.refresh_from_db()
+    assert child_step.choices_count == 1
+
+    choice.delete()
+    child_step.refresh_from_db()
+    assert child_step.choices_count == 0
+
+
+@pytest.mark.django_db
+def test_game_status_without_queries(
+    scenario_fixture, users_fixture, django_assert_num_queries
+):
+    game = baker.make(
+        Game,
+        scenario=scenario_fixture,
+        current_step=scenario_fixture.root_step,
+        user=users_fixture[0],
+    )
+    game = Game.objects.select_related("current_step").get(pk=game.pk)
+
+    with django_assert_num_queries(0):
+        assert game.status == GameStatus.RUNNING
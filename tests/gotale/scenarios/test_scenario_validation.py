@@ -0,0 +1,108 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+
+from gotale.validation import (
+    CLOSED_CYCLE,
+    NO_ENDING,
+    UNREACHABLE,
+    validate_scenario_graph,
+)
+
+
+@pytest.mark.parametrize(
+    "successors, expected",
+    [
+        pytest.param({1: [2, 3], 2: [3], 3: []}, [], id="valid"),
+        pytest.param({1: [2], 2: [1, 3], 3: []}, [], id="cycle_with_exit"),
+        pytest.param(
+            {1: [2], 2: [], 3: [4], 4: [3, 2]},
+            [(UNREACHABLE, (3, 4))],
+            id="unreachable",
+        ),
+        pytest.param(
+            {1: [2, 4], 2: [3], 3: [2], 4: []},
+            [(CLOSED_CYCLE, (2, 3))],
+            id="closed_cycle",
+        ),
+        pytest.param(
+            {1: [2, 5], 2: [2], 3: [4], 4: [3], 5: [6, 3], 6: []},
+            [(CLOSED_CYCLE, (2,)), (CLOSED_CYCLE, (3, 4))],
+            id="closed_cycles",
+        ),
+        pytest.param(
+            {1: [2, 3], 2: [4], 3: [], 4: [5], 5: [4]},
+            [(CLOSED_CYCLE, (4, 5)), (NO_ENDING, (2,))],
+            id="leads_into_closed_cycle",
+        ),
+        pytest.param(
+            {1: [2], 2: [1]},
+            [(CLOSED_CYCLE, (1, 2))],
+            id="no_ending_at_all",
+        ),
+    ],
+)
+def test_validate_scenario_graph(successors, expected):
+    errors = validate_scenario_graph(successors, 1)
+
+    assert [(error.code, error.steps) for error in errors] == expected
+
+
+def test_validate_scenario_graph_large():
+    size = 50_000
+    # A deep chain ending in a closed cycle, deeper than any recursion limit
+    successors = {step: [step + 1] for step in range(size)}
+    successors[size] = [size - 2]
+
+    errors = validate_scenario_graph(successors, 0)
+
+    assert [(error.code, len(error.steps)) for error in errors] == [
+        (CLOSED_CYCLE, 3),
+        (NO_ENDING, size - 2),
+    ]
+
+
+@pytest.mark.django_db
+def test_scenario_viewset_create_closed_cycle(auth_client):
+    response = auth_client.post(
+        reverse("scenario-list"),
+        data={
+            "title": "Stuck",
+            "description": "",
+            "steps": [
+                {"id": 1, "title": "start", "choices": [{"text": "a", "next": 2}]},
+                {"id": 2, "title": "loop", "choices": [{"text": "b", "next": 3}]},
+                {"id": 3, "title": "back", "choices": [{"text": "c", "next": 2}]},
+            ],
+        },
+        format="json",
+    )
+
+    assert (response.status_code, response.json()) == (
+        status.HTTP_400_BAD_REQUEST,
+        {
+            "steps": [
+                "Steps [2, 3] form a cycle with no choice leading out of it.",
+                "Steps [1] never lead to a step without choices.",
+            ]
+        },
+    )
+
+
+def test_benchmark_graph_validation_command():
+    stdout = StringIO()
+
+    call_command(
+        "benchmark_graph_validation",
+        "--sizes",
+        "100",
+        "1000",
+        "--repeat",
+        "1",
+        stdout=stdout,
+    )
+
+    assert len(stdout.getvalue().splitlines()) == 3
@@ -1,11 +1,18 @@
+import uuid
 from unittest.mock import ANY
 
 import pytest
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from model_bakery import baker
 from rest_framework import status
+from rest_framework.test import APIClient
 
-from gotale.models import Choice, Scenario, Step
+from gotale.geo import MAX_DISTANCE
+from gotale.graph import scenario_graphs
+from gotale.models import Choice, Game, Location, Scenario, Step
 from tests.core.test_user_viewset import USER_LIST
 from tests.utils import is_valid_uuid4
 
@@ -177,6 +184,19 @@ def test_scenario_viewset_create_success(auth_client):
         },
     ]
 
+    assert sorted(
+        Step.objects.filter(scenario=response_json["id"]).values_list(
+            "title", "choices_count"
+        )
+    ) == [
+        ("step 1", 2),
+        ("step 2", 2),
+        ("step 3", 1),
+        ("step 4", 0),
+        ("step 5", 0),
+        ("step 6", 0),
+    ]
+
     # Check if the steps ids are correctly changed to UUID from the Frontend
     assert all(
         [
@@ -188,6 +208,30 @@ def test_scenario_viewset_create_success(auth_client):
     )
 
 
+@pytest.mark.django_db
+def test_scenario_viewset_create_root_step_not_first(auth_client):
+    payload = SCENARIO_CREATE_PAYLOAD | {
+        "steps": SCENARIO_CREATE_PAYLOAD["steps"][::-1]
+    }
+
+    with CaptureQueriesContext(connection) as queries:
+        response = auth_client.post(
+            reverse("scenario-list"), data=payload, format="json"
+        )
+
+    assert response.status_code == status.HTTP_201_CREATED
+    scenario = Scenario.objects.get(pk=response.json()["id"])
+    assert scenario.root_step.title == "step 1"
+    assert response.json()["root_step"]["title"] == "step 1"
+    writes = [
+        query["sql"].split()[0]
+        for query in queries
+        if query["sql"].startswith(("INSERT", "UPDATE", "DELETE"))
+    ]
+    # The scenario is inserted with its root step, one statement per table
+    assert writes == ["INSERT", "INSERT", "INSERT"]
+
+
 @pytest.mark.parametrize(
     "payload, expected_status_code, expected_response_data",
     (
@@ -344,14 +388,283 @@ def test_scenario_viewset_create_errors(
     )
 
 
-def test_scenario_viewset_update_success():
-    # TODO: replace whole scenario
-    pass
+ROOT_STEP_ID = "01234567-89ab-cdef-0123-111111111111"
+CHILD_1_ID = "01234567-89ab-aaaa-0123-123000000001"
+CHILD_2_ID = "01234567-89ab-aaaa-0123-123000000002"
+
+
+@pytest.fixture
+def owner_client(scenario_fixture):
+    client = APIClient()
+    # Reloaded, as fixture instances keep their string primary keys
+    client.force_authenticate(User.objects.get(pk=scenario_fixture.created_by_id))
+    return client
+
+
+@pytest.mark.django_db
+def test_scenario_viewset_update_success(
+    owner_client, scenario_fixture, users_fixture, django_capture_on_commit_callbacks
+):
+    scenario_graphs.get(scenario_fixture.id)
+    modified_at = Scenario.objects.get(pk=scenario_fixture.id).modified_at
+    payload = {
+        "steps": [
+            {
+                "id": ROOT_STEP_ID,
+                "title": "Root Step",
+                "choices": [
+                    {"text": "Go to child 1", "next": CHILD_1_ID},
+                    {"text": "Go to new step", "next": 1},
+                ],
+            },
+            {"id": CHILD_1_ID, "title": "Child 1 (renamed)", "choices": []},
+            {"id": 1, "title": "New step", "choices": []},
+        ],
+    }
+
+    with django_capture_on_commit_callbacks(execute=True):
+        with CaptureQueriesContext(connection) as queries:
+            response = owner_client.patch(
+                reverse("scenario-detail", kwargs={"pk": scenario_fixture.id}),
+                data=payload,
+                format="json",
+            )
+
+    assert (response.status_code, response.json()) == (
+        status.HTTP_200_OK,
+        SCENARIO_LIST[0]
+        | {
+            "modified_by": USER_LIST[0],
+            "root_step": SCENARIO_LIST[0]["root_step"]
+            | {
+                "choices": [
+                    {
+                        "id": "01234567-89ab-cdef-0123-000000000011",
+                        "text": "Go to child 1",
+                    },
+                    {"id": ANY, "text": "Go to new step"},
+                ]
+            },
+        },
+    )
+    scenario = Scenario.objects.get(pk=scenario_fixture.id)
+    assert scenario.modified_at > modified_at
+    assert sorted(
+        Step.objects.filter(scenario=scenario).values_list("title", "choices_count")
+    ) == [("Child 1 (renamed)", 0), ("New step", 0), ("Root Step", 2)]
+    # The choice to the deleted step is replaced, its id can't lead elsewhere
+    choice = Choice.objects.get(step=ROOT_STEP_ID, text="Go to new step")
+    assert choice.next.title == "New step"
+    assert not Choice.objects.filter(pk="01234567-89ab-cdef-0123-000000000022").exists()
+    assert scenario_fixture.id not in scenario_graphs
+    writes = sorted(
+        " ".join(query["sql"].split()[:3])
+        for query in queries
+        if query["sql"].startswith(("INSERT", "UPDATE", "DELETE"))
+    )
+    # The new step, the removed one, the renamed one and the replaced choice
+    assert [
+        write for write in writes if "gotale_step" in write or "choice" in write
+    ] == [
+        'DELETE FROM "gotale_choice"',
+        'DELETE FROM "gotale_step"',
+        'INSERT INTO "gotale_choice"',
+        'INSERT INTO "gotale_step"',
+        'UPDATE "gotale_step" SET',
+    ]
+
+
+@pytest.mark.django_db
+def test_scenario_viewset_update_stale_choices(owner_client, scenario_fixture):
+    payload = {
+        "steps": [
+            {
+                "id": ROOT_STEP_ID,
+                "title": "Root Step",
+                "choices": [{"text": "Go to child 1", "next": CHILD_1_ID}],
+            },
+            {
+                "id": CHILD_1_ID,
+                "title": "Child 1 (ended)",
+                "choices": [{"text": "Go on", "next": CHILD_2_ID}],
+            },
+            {"id": CHILD_2_ID, "title": "Child 2", "choices": []},
+        ],
+    }
+
+    with CaptureQueriesContext(connection) as queries:
+        response = owner_client.patch(
+            reverse("scenario-detail", kwargs={"pk": scenario_fixture.id}),
+            data=payload,
+            format="json",
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert sorted(
+        Step.objects.filter(scenario=scenario_fixture.id).values_list(
+            "title", "choices_count"
+        )
+    ) == [("Child 1 (ended)", 1), ("Child 2", 0), ("Root Step", 1)]
+    writes = sorted(
+        " ".join(query["sql"].split()[:3])
+        for query in queries
+        if query["sql"].startswith(("INSERT", "UPDATE", "DELETE"))
+    )
+    # The stale choice is deleted without adjusting its step's count row by row
+    assert [
+        write for write in writes if "gotale_step" in write or "choice" in write
+    ] == [
+        'DELETE FROM "gotale_choice"',
+        'INSERT INTO "gotale_choice"',
+        'UPDATE "gotale_step" SET',
+    ]
+
+
+@pytest.mark.django_db
+def test_scenario_viewset_update_played_step_kept(
+    owner_client, scenario_fixture, users_fixture
+):
+    baker.make(
+        Game,
+        scenario=scenario_fixture,
+        current_step_id=CHILD_2_ID,
+        user=users_fixture[1],
+    )
+    payload = {
+        "steps": [
+            {
+                "id": ROOT_STEP_ID,
+                "title": "Root Step",
+                "choices": [{"text": "Go to child 1", "next": CHILD_1_ID}],
+            },
+            {"id": CHILD_1_ID, "title": "Child 1 (ended)", "choices": []},
+        ],
+    }
+
+    response = owner_client.patch(
+        reverse("scenario-detail", kwargs={"pk": scenario_fixture.id}),
+        data=payload,
+        format="json",
+    )
+
+    assert (response.status_code, response.json()) == (
+        status.HTTP_400_BAD_REQUEST,
+        {"steps": [f"Step {CHILD_2_ID} cannot be removed, games are on it."]},
+    )
+    assert Game.objects.get().current_step_id == uuid.UUID(CHILD_2_ID)
+
+
+@pytest.mark.django_db
+def test_scenario_viewset_update_new_root(owner_client, scenario_fixture):
+    payload = {
+        "title": "Prequel",
+        "steps": [
+            {
+                "id": 1,
+                "title": "Prologue",
+                "choices": [{"text": "Begin", "next": ROOT_STEP_ID}],
+            },
+            {
+                "id": ROOT_STEP_ID,
+                "title": "Root Step",
+                "choices": [{"text": "Go to child 1", "next": CHILD_1_ID}],
+            },
+            {"id": CHILD_1_ID, "title": "Child 1 (ended)", "choices": []},
+        ],
+    }
+
+    response = owner_client.put(
+        reverse("scenario-detail", kwargs={"pk": scenario_fixture.id}),
+        data=payload | {"description": "Test Description"},
+        format="json",
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert (response.json()["title"], response.json()["root_step"]["title"]) == (
+        "Prequel",
+        "Prologue",
+    )
+    assert sorted(
+        Step.objects.filter(scenario=scenario_fixture.id).values_list(
+            "title", "choices_count"
+        )
+    ) == [("Child 1 (ended)", 0), ("Prologue", 1), ("Root Step", 1)]
+    assert list(
+        Choice.objects.filter(step__scenario=scenario_fixture.id).values_list(
+            "text", flat=True
+        )
+    ) == ["Go to child 1", "Begin"]
+
+
+@pytest.mark.django_db
+def test_scenario_viewset_partial_update_without_steps(owner_client, scenario_fixture):
+    response = owner_client.patch(
+        reverse("scenario-detail", kwargs={"pk": scenario_fixture.id}),
+        data={"title": "Renamed"},
+        format="json",
+    )
+
+    assert (response.status_code, response.json()["title"]) == (
+        status.HTTP_200_OK,
+        "Renamed",
+    )
+    assert Step.objects.filter(scenario=scenario_fixture.id).count() == 3
+    assert Choice.objects.filter(step__scenario=scenario_fixture.id).count() == 2
+
+
+@pytest.mark.parametrize(
+    "steps, expected_response_data",
+    (
+        pytest.param(
+            [
+                {"id": ROOT_STEP_ID, "title": "Root", "choices": []},
+                {
+                    "id": "01234567-89ab-cdef-0123-999999999999",
+                    "title": "Foreign",
+                    "choices": [{"text": "Back", "next": ROOT_STEP_ID}],
+                },
+            ],
+            {
+                "steps": [
+                    "Step 01234567-89ab-cdef-0123-999999999999 does not belong to "
+                    "this scenario."
+                ]
+            },
+            id="foreign_step",
+        ),
+        pytest.param(
+            [{"id": "first", "title": "Root", "choices": []}],
+            {"steps": [{"id": ["A valid integer or UUID is required."]}]},
+            id="invalid_step_id",
+        ),
+    ),
+)
+@pytest.mark.django_db
+def test_scenario_viewset_update_errors(
+    owner_client, scenario_fixture, steps, expected_response_data
+):
+    response = owner_client.patch(
+        reverse("scenario-detail", kwargs={"pk": scenario_fixture.id}),
+        data={"steps": steps},
+        format="json",
+    )
+
+    assert (response.status_code, response.json()) == (
+        status.HTTP_400_BAD_REQUEST,
+        expected_response_data,
+    )
+    assert Step.objects.filter(scenario=scenario_fixture.id).count() == 3
+
 
+@pytest.mark.django_db
+def test_scenario_viewset_update_not_owner(auth_client2, scenario_fixture):
+    response = auth_client2.patch(
+        reverse("scenario-detail", kwargs={"pk": scenario_fixture.id}),
+        data={"title": "Renamed"},
+        format="json",
+    )
 
-def test_scenario_viewset_update_errors():
-    # TODO:
-    pass
+    assert response.status_code == status.HTTP_403_FORBIDDEN
 
 
 @pytest.mark.django_db
@@ -384,3 +697,154 @@ def test_scenario_viewset_destroy_errors(
     response = admin_client.delete(reverse("scenario-detail", kwargs={"pk": pk}))
 
     assert response.status_code == expected_status_code
+
+
+@pytest.mark.django_db
+def test_scenario_viewset_nearby(anon_client, scenario_fixture, users_fixture):
+    location = baker.make(
+        Location, latitude=52.2297, longitude=21.0122, created_by=users_fixture[0]
+    )
+    Step.objects.filter(pk=scenario_fixture.root_step.id).update(location=location)
+
+    response = anon_client.get(
+        reverse("scenario-nearby"), data={"lat": 52.23, "lon": 21.01, "radius": 500}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [
+        (scenario["id"], round(scenario["distance"])) for scenario in response.json()
+    ] == [(scenario_fixture.id, 154)]
+
+    response = anon_client.get(
+        reverse("scenario-nearby"), data={"lat": 52.3, "lon": 21.01, "radius": 500}
+    )
+
+    assert (response.status_code, response.json()) == (status.HTTP_200_OK, [])
+
+
+@pytest.mark.django_db
+def test_scenario_viewset_nearby_reads_scenario_rows_only(
+    anon_client, scenario_fixture, users_fixture, django_assert_num_queries
+):
+    location, *_ = baker.make(
+        Location,
+        latitude=iter([52.2297, 10.0, 20.0]),
+        longitude=21.0122,
+        created_by=users_fixture[0],
+        _quantity=3,
+    )
+    Step.objects.filter(pk=scenario_fixture.root_step.id).update(location=location)
+
+    # Candidates, the page of scenarios and their root step choices, without
+    # loading the locations no scenario starts at
+    with django_assert_num_queries(3) as queries:
+        response = anon_client.get(
+            reverse("scenario-nearby"),
+            data={"lat": 0, "lon": 0, "radius": MAX_DISTANCE, "limit": 1},
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [scenario["id"] for scenario in response.json()] == [scenario_fixture.id]
+    assert all(
+        not query["sql"].startswith('SELECT "gotale_location"')
+        for query in queries.captured_queries
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "params, expected",
+    [
+        pytest.param(
+            {"fields": "id,title"},
+            {"id": SCENARIO_LIST[0]["id"], "title": "Test Scenario"},
+            id="fields",
+        ),
+        pytest.param(
+            {"fields": "id,root_step.title,root_step.choices.text"},
+            {
+                "id": SCENARIO_LIST[0]["id"],
+                "root_step": {
+                    "title": "Root Step",
+                    "choices": [{"text": "Go to child 1"}, {"text": "Go to child 2"}],
+                },
+            },
+            id="nested_fields",
+        ),
+        pytest.param(
+            {"fields": "created_by,modified_by,root_step", "expand": ""},
+            {
+                "created_by": USER_LIST[0]["id"],
+                "modified_by": None,
+                "root_step": SCENARIO_LIST[0]["root_step"]["id"],
+            },
+            id="ids_only",
+        ),
+        pytest.param(
+            {"fields": "created_by,root_step", "expand": "root_step"},
+            {
+                "created_by": USER_LIST[0]["id"],
+                "root_step": {
+                    **SCENARIO_LIST[0]["root_step"],
+                    "choices": [
+                        choice["id"]
+                        for choice in SCENARIO_LIST[0]["root_step"]["choices"]
+                    ],
+                },
+            },
+            id="expand",
+        ),
+        pytest.param(
+            {"fields": "id,unknown"},
+            {"id": SCENARIO_LIST[0]["id"]},
+            id="unknown_field",
+        ),
+    ],
+)
+def test_scenario_viewset_retrieve_sparse(
+    anon_client, scenario_fixture, users_fixture, params, expected
+):
+    response = anon_client.get(
+        reverse("scenario-detail", kwargs={"pk": scenario_fixture.pk}), data=params
+    )
+
+    assert (response.status_code, response.json()) == (status.HTTP_200_OK, expected)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "params, expected_queries",
+    [
+        pytest.param({}, (3, True), id="expanded"),
+        pytest.param({"expand": "root_step"}, (3, True), id="root_step_expanded"),
+        pytest.param({"expand": ""}, (2, False), id="ids_only"),
+        pytest.param({"fields": "id,title"}, (2, False), id="no_relations"),
+    ],
+)
+def test_scenario_viewset_list_sparse_queries(
+    anon_client, scenario_fixture, users_fixture, params, expected_queries
+):
+    with CaptureQueriesContext(connection) as queries:
+        response = anon_client.get(reverse("scenario-list"), data=params)
+
+    assert response.status_code == status.HTTP_200_OK
+    # The first query computes the ETag
+    assert (len(queries), "JOIN" in queries[1]["sql"]) == expected_queries
+
+
+# Scenarios are invalidated once the change commits
+@pytest.mark.django_db(transaction=True)
+def test_scenario_viewset_retrieve_not_modified(anon_client, scenario_fixture):
+    url = reverse("scenario-detail", kwargs={"pk": scenario_fixture.pk})
+    etag = anon_client.get(url).headers["ETag"]
+
+    response = anon_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    # Choices are embedded through the root step
+    Choice.objects.get(pk="01234567-89ab-cdef-0123-000000000011").delete()
+    response = anon_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()["root_step"]["choices"]) == 1
@@ -0,0 +1,24 @@
+import pytest
+
+from gotale.checks import check_scenario_cache_shared
+
+
+@pytest.mark.parametrize(
+    "backend, workers, expected_ids",
+    (
+        pytest.param("locmem.LocMemCache", 1, [], id="locmem_single_worker"),
+        pytest.param("locmem.LocMemCache", 4, ["gotale.E001"], id="locmem_workers"),
+        pytest.param("filebased.FileBasedCache", 4, [], id="filebased_workers"),
+    ),
+)
+def test_check_scenario_cache_shared(settings, backend, workers, expected_ids):
+    settings.CACHES = settings.CACHES | {
+        settings.SCENARIO_CACHE_ALIAS: {
+            "BACKEND": f"django.core.cache.backends.{backend}",
+        }
+    }
+    settings.WEB_CONCURRENCY = workers
+
+    errors = check_scenario_cache_shared(None)
+
+    assert [error.id for error in errors] == expected_ids